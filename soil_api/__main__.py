@@ -1,4 +1,8 @@
+import argparse
+import asyncio
+import logging
 import pathlib
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
@@ -8,9 +12,65 @@ from fastapi.responses import JSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic_core import PydanticUndefinedType
 
+from soil_api import constants
 from soil_api.config import settings
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
 from soil_api.openapi import openapi
 from soil_api.routes import soil_routes, system_resources
+from soil_api.utils.cog_reader import cog_reader
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.raster_manifest import build_raster_manifest
+from soil_api.utils.raster_source import (
+    RemoteRasterSource,
+    list_soil_maps,
+    raster_source,
+)
+from soil_api.utils.raster_sync import sync_region
+from soil_api.utils.soil_type_index import build_soil_type_index
+from soil_api.utils.summary_index import build_summary_index
+from soil_api.utils.warmup import warmup
+
+logger = logging.getLogger(__name__)
+
+
+def log_task_error(task: asyncio.Task) -> None:
+    """Logs the error of a background task that failed."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            f"Background task {task.get_name()} failed",
+            exc_info=task.exception(),
+        )
+
+
+@asynccontextmanager
+async def lifespan(_api: FastAPI):
+    """Runs the readiness probe in the background, and warms up the soil
+    maps while the service starts, so /ready reports not ready until the
+    warm-up is far enough. On shutdown, the background tasks are awaited,
+    the connections of the COG reader are closed, and the raster I/O
+    executor and the raster handles are shut down."""
+    tasks = [
+        asyncio.create_task(
+            system_resources.readiness_probe.run(), name="readiness probe"
+        )
+    ]
+    if settings.warmup_enabled:
+        tasks.append(asyncio.create_task(warmup.run(), name="warm-up"))
+    for task in tasks:
+        task.add_done_callback(log_task_error)
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await cog_reader.close()
+    # Waits for the running raster reads without blocking the event loop
+    await asyncio.to_thread(raster_executor.shutdown)
+    dataset_pool.close()
 
 
 def get_application() -> FastAPI:
@@ -19,6 +79,7 @@ def get_application() -> FastAPI:
     api = FastAPI(
         root_path=settings.api_root_path,
         redoc_url=None,
+        lifespan=lifespan,
     )
     api.include_router(soil_routes.router)
     api.include_router(system_resources.router)
@@ -61,11 +122,127 @@ def redoc():
     )
 
 
-if __name__ == "__main__":
-    import uvicorn
+def add_soil_map_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments that select the soil maps of a command."""
+    parser.add_argument(
+        "--properties",
+        nargs="+",
+        type=SoilPropertiesCodes,
+        default=list(SoilPropertiesCodes),
+        metavar="PROPERTY",
+    )
+    parser.add_argument(
+        "--depths",
+        nargs="+",
+        type=SoilDepthLabels,
+        default=list(SoilDepthLabels),
+        metavar="DEPTH",
+    )
+    parser.add_argument(
+        "--values",
+        nargs="+",
+        type=SoilPropertyValueTypes,
+        default=list(SoilPropertyValueTypes),
+        metavar="VALUE",
+    )
+    parser.add_argument(
+        "--no-soil-types",
+        action="store_true",
+        help="Leave out the WRB soil maps",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m soil_api")
+    subparsers = parser.add_subparsers(dest="command")
+
+    type_index_parser = subparsers.add_parser(
+        "build-type-index",
+        help="Build a precomputed soil type probability index for a region",
+    )
+    type_index_parser.add_argument(
+        "--bbox",
+        nargs=4,
+        type=float,
+        required=True,
+        metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"),
+    )
+    type_index_parser.add_argument(
+        "--output", required=True, help="Path of the index GeoTIFF to write"
+    )
 
-    uvicorn.run(
-        "soil_api.__main__:app",
-        host=settings.server_bind_host,
-        port=settings.server_bind_port,
+    summary_index_parser = subparsers.add_parser(
+        "build-summary-index",
+        help="Build a precomputed soil type histogram index for a region",
     )
+    summary_index_parser.add_argument(
+        "--bbox",
+        nargs=4,
+        type=float,
+        required=True,
+        metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"),
+    )
+    summary_index_parser.add_argument(
+        "--output", required=True, help="Path of the index file to write"
+    )
+    summary_index_parser.add_argument(
+        "--tile-size", type=int, default=64, help="Size of the index tiles in pixels"
+    )
+
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Copy the soil maps of a region to a local mirror",
+    )
+    sync_parser.add_argument(
+        "--bbox",
+        nargs=4,
+        type=float,
+        required=True,
+        metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"),
+    )
+    sync_parser.add_argument(
+        "--output", required=True, help="Directory of the mirror to write"
+    )
+    sync_parser.add_argument(
+        "--source",
+        default=constants.SOIL_MAPS_URL,
+        help="Root of the soil maps to copy",
+    )
+    add_soil_map_arguments(sync_parser)
+
+    manifest_parser = subparsers.add_parser(
+        "build-manifest",
+        help="Build a manifest of the metadata of the soil maps",
+    )
+    manifest_parser.add_argument(
+        "--output", required=True, help="Path of the manifest file to write"
+    )
+    add_soil_map_arguments(manifest_parser)
+
+    args = parser.parse_args()
+    if args.command == "build-type-index":
+        build_soil_type_index(args.bbox, args.output)
+    elif args.command == "build-summary-index":
+        build_summary_index(args.bbox, args.output, args.tile_size)
+    elif args.command == "sync":
+        soil_maps = list_soil_maps(
+            args.properties, args.depths, args.values, not args.no_soil_types
+        )
+        sync_region(args.bbox, args.output, soil_maps, RemoteRasterSource(args.source))
+    elif args.command == "build-manifest":
+        soil_maps = list_soil_maps(
+            args.properties, args.depths, args.values, not args.no_soil_types
+        )
+        build_raster_manifest(soil_maps, args.output, raster_source)
+    else:
+        import uvicorn
+
+        uvicorn.run(
+            "soil_api.__main__:app",
+            host=settings.server_bind_host,
+            port=settings.server_bind_port,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,51 @@ class Settings(BaseSettings):
 
     api_domain: str = "localhost"
 
+    raster_source: str = "remote"
+    raster_source_path: str | None = None
+
+    raster_manifest_path: str | None = None
+
+    raster_pool_size: int = 512
+    raster_pool_idle_timeout: float = 600.0
+    raster_fused_job_size: int = 8
+
+    raster_executor_workers: int = 16
+    raster_executor_max_queue_size: int = 128
+    raster_executor_queue_timeout: float = 10.0
+
+    cog_reader_enabled: bool = False
+    cog_reader_max_connections: int = 64
+    cog_reader_timeout: float = 10.0
+    cog_reader_header_size: int = 16384
+    cog_reader_http2: bool = True
+
+    point_batch_window: float = 0.0
+    point_batch_max_points: int = 1024
+
+    response_cache_size: int = 10000
+    response_cache_ttl: float = 3600.0
+
+    block_cache_max_bytes: int = 256 * 1024 * 1024
+
+    batch_max_points: int = 10000
+    grid_max_points: int = 250_000
+    stream_chunk_size: int = 1000
+
+    soil_type_index_path: str | None = None
+
+    summary_max_pixels: int = 4_000_000
+    summary_index_path: str | None = None
+
+    readiness_probe_interval: float = 30.0
+    readiness_probe_timeout: float = 10.0
+
+    warmup_enabled: bool = False
+    warmup_soil_maps: list[str] | None = None
+    warmup_points_path: str | None = None
+    warmup_concurrency: int = 16
+    warmup_ready_threshold: float = 1.0
+
     @property
     def api_url(self):
         if self.api_domain == "localhost":
@@ -1,7 +1,9 @@
 from typing import Annotated, List
 
-from fastapi import Depends, Query
+from fastapi import Depends, Header, Query
+from pydantic import Field
 
+from soil_api.config import settings
 from soil_api.models.soil_property import (
     SoilDepthLabels,
     SoilPropertiesCodes,
@@ -139,3 +141,78 @@ def bbox_query_dependency(
 
 
 BboxQueryDep = Annotated[List[float], Depends(bbox_query_dependency)]
+
+
+def summary_resolution_dependency(
+    resolution: Annotated[
+        float | None,
+        Query(
+            title="resolution",
+            description=(
+                "Approximate pixel size to compute the summary at, in the units "
+                "of the soil map. The finest available resolution that is at "
+                "least this coarse is used."
+            ),
+            gt=0,
+        ),
+    ] = None,
+    max_pixels: Annotated[
+        int | None,
+        Query(
+            title="max_pixels",
+            description=(
+                "Maximum number of pixels to summarize. If the bounding box has "
+                "more pixels at full resolution, a coarser resolution is used. "
+                "Ignored if resolution is given."
+            ),
+            ge=1,
+        ),
+    ] = None,
+) -> tuple[float | None, int]:
+    return resolution, max_pixels or settings.summary_max_pixels
+
+
+SummaryResolutionDep = Annotated[
+    tuple[float | None, int], Depends(summary_resolution_dependency)
+]
+
+
+def percentile_dependency(
+    percentiles: Annotated[
+        List[Annotated[float, Field(ge=0, le=100)]],
+        Query(
+            title="percentiles",
+            description="List of percentiles of the pixel values to compute.",
+        ),
+    ] = [5, 50, 95],
+) -> List[float]:
+    return percentiles
+
+
+PercentileQueryDep = Annotated[List[float], Depends(percentile_dependency)]
+
+
+def grid_step_dependency(
+    step: Annotated[
+        float,
+        Query(
+            title="step",
+            description="Distance between the grid nodes in decimal degrees",
+            example=0.01,
+            gt=0,
+        ),
+    ],
+) -> float:
+    return step
+
+
+GridStepDep = Annotated[float, Depends(grid_step_dependency)]
+
+
+def accept_header_dependency(
+    accept: Annotated[str | None, Header(include_in_schema=False)] = None
+) -> str | None:
+    return accept
+
+
+AcceptHeaderDep = Annotated[str | None, Depends(accept_header_dependency)]
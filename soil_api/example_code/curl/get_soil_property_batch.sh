@@ -0,0 +1,4 @@
+# Get the mean value of the soil property at each of the queried locations and depths
+curl -i -X POST $endpoint_url \
+  -H "Content-Type: application/json" \
+  -d '{"points": [[9.58, 60.1], [10.75, 59.91]], "depths": ["0-5cm"], "properties": ["bdod"], "values": ["mean"]}'
@@ -0,0 +1,2 @@
+# Get the mean value of the soil property at the queried depth on a grid over the bounding box
+curl -i -X GET "$endpoint_url?min_lon=9.5&max_lon=9.6&min_lat=60.1&max_lat=60.12&step=0.01&depths=0-5cm&properties=bdod&values=mean"
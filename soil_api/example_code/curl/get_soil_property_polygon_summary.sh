@@ -0,0 +1,4 @@
+# Get statistics of the mean value of the soil property in the queried polygon and depth
+curl -i -X POST "$endpoint_url?depths=0-5cm&properties=bdod&values=mean" \
+  -H "Content-Type: application/json" \
+  -d '{"type": "Polygon", "coordinates": [[[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]]}'
@@ -0,0 +1,2 @@
+# Get statistics of the mean value of the soil property in the queried bounding box and depth
+curl -i -X GET "$endpoint_url?min_lon=9.5&max_lon=9.6&min_lat=60.1&max_lat=60.12&depths=0-5cm&properties=bdod&values=mean&percentiles=5&percentiles=50&percentiles=95"
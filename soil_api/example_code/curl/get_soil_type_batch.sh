@@ -0,0 +1,5 @@
+# Get the most probable soil type at each of the queried locations
+# and the probability of the top 3 most probable soil types
+curl -i -X POST $endpoint_url \
+  -H "Content-Type: application/json" \
+  -d '{"points": [[9.58, 60.1], [10.75, 59.91]], "top_k": 3}'
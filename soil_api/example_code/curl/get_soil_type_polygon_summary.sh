@@ -0,0 +1,4 @@
+# Get a summary of the soil types in the queried polygon
+curl -i -X POST $endpoint_url \
+  -H "Content-Type: application/json" \
+  -d '{"type": "Polygon", "coordinates": [[[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]]}'
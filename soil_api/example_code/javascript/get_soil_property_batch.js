@@ -0,0 +1,21 @@
+// Get the mean value of the soil property at each of the queried locations and depths
+const response = await fetch("$endpoint_url", {
+  method: "POST",
+  headers: { "Content-Type": "application/json" },
+  body: JSON.stringify({
+    points: [[9.58, 60.1], [10.75, 59.91]],
+    depths: ["0-5cm"],
+    properties: ["bdod"],
+    values: ["mean"]
+  })
+});
+const json = await response.json();
+
+// The features are returned in the order of the queried points
+for (const feature of json.features) {
+  const [lon, lat] = feature.geometry.coordinates;
+  const bdod = feature.properties.layers[0];
+  const bdodUnit = bdod.unit_measure.mapped_units;
+  const bdodValue = bdod.depths[0].values.mean;
+  console.log(`Location: ${lon}, ${lat}, Value: ${bdodValue} ${bdodUnit}`);
+}
@@ -0,0 +1,31 @@
+// Get the mean value of the soil property at the queried depth
+// on a grid over the bounding box, with a step of 0.01 degrees
+const response = await fetch(
+  "$endpoint_url?" + new URLSearchParams({
+    min_lon: "9.5",
+    max_lon: "9.6",
+    min_lat: "60.1",
+    max_lat: "60.12",
+    step: "0.01",
+    depths: "0-5cm",
+    properties: "bdod",
+    values: "mean"
+  })
+);
+const json = await response.json();
+
+// Get the coordinates of the grid columns and rows
+const lons = json.properties.lons;
+const lats = json.properties.lats;
+
+// Get the grid of mean values of the bdod property at depth 0-5cm,
+// with one row per latitude and one column per longitude
+const bdod = json.properties.layers[0];
+const bdodUnit = bdod.unit_measure.mapped_units;
+const bdodGrid = bdod.depths[0].values.mean;
+
+lats.forEach((lat, row) => {
+  lons.forEach((lon, column) => {
+    console.log(`Location: ${lon}, ${lat}, Value: ${bdodGrid[row][column]} ${bdodUnit}`);
+  });
+});
@@ -0,0 +1,27 @@
+// Get statistics of the mean value of the soil property
+// in the queried polygon and depth
+const response = await fetch(
+  "$endpoint_url?" + new URLSearchParams({
+    depths: "0-5cm",
+    properties: "bdod",
+    values: "mean"
+  }),
+  {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      type: "Polygon",
+      coordinates: [[[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]]
+    })
+  }
+);
+const json = await response.json();
+
+// Get the soil information for the bdod property
+const bdod = json.properties.layers[0];
+const bdodUnit = bdod.unit_measure.mapped_units;
+
+// Get the statistics of the mean value at depth 0-5cm
+const statistics = bdod.depths[0].values.mean;
+
+console.log(`Soil property: ${bdod.name}, Mean: ${statistics.mean} ${bdodUnit}, Std: ${statistics.std} ${bdodUnit}, Pixels: ${statistics.count}`);
@@ -0,0 +1,29 @@
+// Get statistics of the mean value of the soil property
+// in the queried bounding box and depth
+const response = await fetch(
+  "$endpoint_url?" + new URLSearchParams([
+    ["min_lon", "9.5"],
+    ["max_lon", "9.6"],
+    ["min_lat", "60.1"],
+    ["max_lat", "60.12"],
+    ["depths", "0-5cm"],
+    ["properties", "bdod"],
+    ["values", "mean"],
+    ["percentiles", "5"],
+    ["percentiles", "50"],
+    ["percentiles", "95"]
+  ])
+);
+const json = await response.json();
+
+// Get the soil information for the bdod property
+const bdod = json.properties.layers[0];
+const bdodUnit = bdod.unit_measure.mapped_units;
+
+// Get the statistics of the mean value at depth 0-5cm
+const statistics = bdod.depths[0].values.mean;
+
+console.log(`Soil property: ${bdod.name}, Mean: ${statistics.mean} ${bdodUnit}, Min: ${statistics.min} ${bdodUnit}, Max: ${statistics.max} ${bdodUnit}`);
+for (const percentile of statistics.percentiles) {
+  console.log(`Percentile ${percentile.percentile}: ${percentile.value} ${bdodUnit}`);
+}
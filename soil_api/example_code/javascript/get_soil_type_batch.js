@@ -0,0 +1,18 @@
+// Get the most probable soil type at each of the queried locations
+// and the probability of the top 3 most probable soil types
+const response = await fetch("$endpoint_url", {
+  method: "POST",
+  headers: { "Content-Type": "application/json" },
+  body: JSON.stringify({
+    points: [[9.58, 60.1], [10.75, 59.91]],
+    top_k: 3
+  })
+});
+const json = await response.json();
+
+// The features are returned in the order of the queried points
+for (const feature of json.features) {
+  const [lon, lat] = feature.geometry.coordinates;
+  const mostProbableSoilType = feature.properties.most_probable_soil_type;
+  console.log(`Location: ${lon}, ${lat}, Most probable soil type: ${mostProbableSoilType}`);
+}
@@ -0,0 +1,20 @@
+// Get a summary of the soil types in the queried polygon, represented
+// by a mapping of each soil type to the number of occurrences in the polygon
+const response = await fetch("$endpoint_url", {
+  method: "POST",
+  headers: { "Content-Type": "application/json" },
+  body: JSON.stringify({
+    type: "Polygon",
+    coordinates: [[[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]]
+  })
+});
+const json = await response.json();
+
+// Get the summary of the soil types in the polygon
+const summaryList = json.properties.summaries;
+
+// Get the soil type and the number of occurrences
+const soilType1 = summaryList[0].soil_type;
+const count1 = summaryList[0].count;
+
+console.log(`Soil type: ${soilType1}, Count: ${count1}`);
@@ -0,0 +1,24 @@
+from httpx import Client
+
+with Client() as client:
+    # Get the mean value of the soil property at each of the queried locations and depths
+    response = client.post(
+        url="$endpoint_url",
+        json={
+            "points": [[9.58, 60.1], [10.75, 59.91]],
+            "depths": ["0-5cm"],
+            "properties": ["bdod"],
+            "values": ["mean"],
+        },
+    )
+
+    json = response.json()
+
+    # The features are returned in the order of the queried points
+    for feature in json["features"]:
+        lon, lat = feature["geometry"]["coordinates"]
+        bdod = feature["properties"]["layers"][0]
+        bdod_unit = bdod["unit_measure"]["mapped_units"]
+        bdod_value = bdod["depths"][0]["values"]["mean"]
+
+        print(f"Location: {lon}, {lat}, Value: {bdod_value} {bdod_unit}")
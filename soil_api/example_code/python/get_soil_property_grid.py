@@ -0,0 +1,34 @@
+from httpx import Client
+
+with Client() as client:
+    # Get the mean value of the soil property at the queried depth
+    # on a grid over the bounding box, with a step of 0.01 degrees
+    response = client.get(
+        url="$endpoint_url",
+        params={
+            "min_lon": 9.5,
+            "max_lon": 9.6,
+            "min_lat": 60.1,
+            "max_lat": 60.12,
+            "step": 0.01,
+            "depths": "0-5cm",
+            "properties": "bdod",
+            "values": "mean",
+        },
+    )
+
+    json = response.json()
+
+    # Get the coordinates of the grid columns and rows
+    lons = json["properties"]["lons"]
+    lats = json["properties"]["lats"]
+
+    # Get the grid of mean values of the bdod property at depth 0-5cm,
+    # with one row per latitude and one column per longitude
+    bdod = json["properties"]["layers"][0]
+    bdod_unit = bdod["unit_measure"]["mapped_units"]
+    bdod_grid = bdod["depths"][0]["values"]["mean"]
+
+    for lat, row in zip(lats, bdod_grid):
+        for lon, value in zip(lons, row):
+            print(f"Location: {lon}, {lat}, Value: {value} {bdod_unit}")
@@ -0,0 +1,29 @@
+from httpx import Client
+
+with Client() as client:
+    # Get statistics of the mean value of the soil property
+    # in the queried polygon and depth
+    response = client.post(
+        url="$endpoint_url",
+        params={"depths": "0-5cm", "properties": "bdod", "values": "mean"},
+        json={
+            "type": "Polygon",
+            "coordinates": [
+                [[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]
+            ],
+        },
+    )
+
+    json = response.json()
+
+    # Get the soil information for the bdod property
+    bdod = json["properties"]["layers"][0]
+    bdod_unit = bdod["unit_measure"]["mapped_units"]
+
+    # Get the statistics of the mean value at depth 0-5cm
+    statistics = bdod["depths"][0]["values"]["mean"]
+
+    print(
+        f"Soil property: {bdod['name']}, Mean: {statistics['mean']} {bdod_unit}, "
+        f"Std: {statistics['std']} {bdod_unit}, Pixels: {statistics['count']}"
+    )
@@ -0,0 +1,36 @@
+from httpx import Client
+
+with Client() as client:
+    # Get statistics of the mean value of the soil property
+    # in the queried bounding box and depth
+    response = client.get(
+        url="$endpoint_url",
+        params={
+            "min_lon": 9.5,
+            "max_lon": 9.6,
+            "min_lat": 60.1,
+            "max_lat": 60.12,
+            "depths": "0-5cm",
+            "properties": "bdod",
+            "values": "mean",
+            "percentiles": [5, 50, 95],
+        },
+    )
+
+    json = response.json()
+
+    # Get the soil information for the bdod property
+    bdod = json["properties"]["layers"][0]
+    bdod_unit = bdod["unit_measure"]["mapped_units"]
+
+    # Get the statistics of the mean value at depth 0-5cm
+    statistics = bdod["depths"][0]["values"]["mean"]
+
+    print(
+        f"Soil property: {bdod['name']}, Mean: {statistics['mean']} {bdod_unit}, "
+        f"Min: {statistics['min']} {bdod_unit}, Max: {statistics['max']} {bdod_unit}"
+    )
+    for percentile in statistics["percentiles"]:
+        print(
+            f"Percentile {percentile['percentile']}: {percentile['value']} {bdod_unit}"
+        )
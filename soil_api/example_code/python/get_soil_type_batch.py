@@ -0,0 +1,20 @@
+from httpx import Client
+
+with Client() as client:
+    # Get the most probable soil type at each of the queried locations
+    # and the probability of the top 3 most probable soil types
+    response = client.post(
+        url="$endpoint_url",
+        json={"points": [[9.58, 60.1], [10.75, 59.91]], "top_k": 3},
+    )
+
+    json = response.json()
+
+    # The features are returned in the order of the queried points
+    for feature in json["features"]:
+        lon, lat = feature["geometry"]["coordinates"]
+        most_probable_soil_type = feature["properties"]["most_probable_soil_type"]
+
+        print(
+            f"Location: {lon}, {lat}, Most probable soil type: {most_probable_soil_type}"
+        )
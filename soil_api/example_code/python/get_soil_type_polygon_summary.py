@@ -0,0 +1,25 @@
+from httpx import Client
+
+with Client() as client:
+    # Get a summary of the soil types in the queried polygon, represented
+    # by a mapping of each soil type to the number of occurrences in the polygon
+    response = client.post(
+        url="$endpoint_url",
+        json={
+            "type": "Polygon",
+            "coordinates": [
+                [[9.5, 60.1], [9.6, 60.1], [9.6, 60.12], [9.5, 60.12], [9.5, 60.1]]
+            ],
+        },
+    )
+
+    json = response.json()
+
+    # Get the summary of the soil types in the polygon
+    summary_list = json["properties"]["summaries"]
+
+    # Get the soil type and the number of occurrences
+    soil_type_1 = summary_list[0]["soil_type"]
+    count_1 = summary_list[0]["count"]
+
+    print(f"Soil type: {soil_type_1}, Count: {count_1}")
@@ -1,16 +1,21 @@
 from enum import Enum
 from typing import List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class FeatureType(Enum):
     Feature = "Feature"
 
 
+class FeatureCollectionType(Enum):
+    FeatureCollection = "FeatureCollection"
+
+
 class GeometryType(Enum):
     Point = "Point"
     Polygon = "Polygon"
+    MultiPolygon = "MultiPolygon"
 
 
 class PointGeometry(BaseModel):
@@ -31,3 +36,63 @@ class BoundingBoxGeometry(BaseModel):
         ],
     )
     type: GeometryType
+
+
+class PolygonGeometry(BaseModel):
+    coordinates: List[List[List[float]]] | List[List[List[List[float]]]] = Field(
+        description=(
+            "The linear rings of a Polygon, or the polygons of a MultiPolygon, "
+            "as [longitude, latitude] decimal coordinates"
+        ),
+        example=[
+            [[9.58, 60.1], [9.6, 60.1], [9.6, 60.12], [9.58, 60.12], [9.58, 60.1]]
+        ],
+    )
+    type: GeometryType
+
+    @model_validator(mode="after")
+    def validate_geometry(self) -> "PolygonGeometry":
+        polygons = self.coordinates
+        if self.type == GeometryType.Polygon:
+            polygons = [self.coordinates]
+        elif self.type != GeometryType.MultiPolygon:
+            raise ValueError("The geometry must be a Polygon or a MultiPolygon")
+        for polygon in polygons:
+            if not isinstance(polygon, list) or not polygon:
+                raise ValueError(f"Invalid {self.type.value} coordinates")
+            for ring in polygon:
+                if not isinstance(ring, list) or len(ring) < 4:
+                    raise ValueError("Each linear ring must have at least 4 positions")
+                for position in ring:
+                    if not isinstance(position, list) or len(position) != 2:
+                        raise ValueError(
+                            f"Invalid {self.type.value} coordinates. Each position "
+                            "must be a [longitude, latitude] pair"
+                        )
+                    lon, lat = position
+                    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                        raise ValueError(
+                            f"Position {position} is outside the valid "
+                            "coordinate range"
+                        )
+        return self
+
+
+class PointList(BaseModel):
+    points: List[List[float]] = Field(
+        ...,
+        description="List of [longitude, latitude] decimal coordinates",
+        example=[[9.58, 60.1], [10.75, 59.91]],
+        min_length=1,
+    )
+
+    @field_validator("points")
+    @classmethod
+    def validate_points(cls, points: List[List[float]]) -> List[List[float]]:
+        for point in points:
+            if len(point) != 2:
+                raise ValueError("Each point must be a [longitude, latitude] pair")
+            lon, lat = point
+            if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                raise ValueError(f"Point {point} is outside the valid coordinate range")
+        return points
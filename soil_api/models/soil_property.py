@@ -3,7 +3,14 @@ from typing import List
 
 from pydantic import BaseModel, Field
 
-from soil_api.models.shared import FeatureType, PointGeometry
+from soil_api.models.shared import (
+    BoundingBoxGeometry,
+    FeatureCollectionType,
+    FeatureType,
+    PointGeometry,
+    PointList,
+    PolygonGeometry,
+)
 
 
 class SoilPropertiesCodes(Enum):
@@ -280,3 +287,228 @@ class SoilPropertyJSON(BaseModel):
         ...,
         description="The queried soil property information",
     )
+
+
+class SoilPropertyBatchQuery(PointList):
+    depths: List[SoilDepthLabels] = Field(
+        ..., description="List of depths to include in the query.", min_length=1
+    )
+    properties: List[SoilPropertiesCodes] = Field(
+        ...,
+        description="List of soil properties to include in the query.",
+        min_length=1,
+    )
+    values: List[SoilPropertyValueTypes] = Field(
+        ..., description="List of values to include in the query.", min_length=1
+    )
+
+
+class SoilPropertyBatchJSON(BaseModel):
+    type: FeatureCollectionType = Field(
+        description="The feature collection type of the geojson-object",
+    )
+    features: List[SoilPropertyJSON] = Field(
+        ...,
+        description="The soil property information of the queried locations, "
+        "in the order of the queried points",
+    )
+
+
+class SoilPropertyPercentile(BaseModel):
+    percentile: float = Field(..., description="The percentile", example=50)
+    value: float = Field(
+        ..., description="The value of the soil property at the percentile", example=50
+    )
+
+
+class SoilPropertyStatistics(BaseModel):
+    count: int = Field(
+        ...,
+        description="The number of pixels with a value within the queried area",
+        example=1200,
+    )
+    mean: float | None = Field(
+        None, description="The mean of the pixel values", example=50.2
+    )
+    min: float | None = Field(
+        None, description="The minimum of the pixel values", example=31
+    )
+    max: float | None = Field(
+        None, description="The maximum of the pixel values", example=72
+    )
+    std: float | None = Field(
+        None, description="The standard deviation of the pixel values", example=6.1
+    )
+    percentiles: List[SoilPropertyPercentile] | None = Field(
+        None, description="The queried percentiles of the pixel values"
+    )
+
+
+class SoilPropertySummaryValues(BaseModel):
+    mean: SoilPropertyStatistics | None = Field(
+        None, description="Statistics of the mean value of the soil property"
+    )
+    Q0_05: SoilPropertyStatistics | None = Field(
+        None,
+        description="Statistics of the 5th percentile of the soil property",
+        alias="Q0.05",
+    )
+    Q0_5: SoilPropertyStatistics | None = Field(
+        None,
+        description="Statistics of the 50th percentile of the soil property",
+        alias="Q0.5",
+    )
+    Q0_95: SoilPropertyStatistics | None = Field(
+        None,
+        description="Statistics of the 95th percentile of the soil property",
+        alias="Q0.95",
+    )
+    uncertainty: SoilPropertyStatistics | None = Field(
+        None, description="Statistics of the uncertainty of the soil property"
+    )
+
+
+class SoilDepthSummary(BaseModel):
+    range: DepthRange = Field(..., description="The soil depth range")
+    label: SoilDepthLabels = Field(..., description="The soil depth label")
+    values: SoilPropertySummaryValues = Field(
+        ..., description="Statistics of the queried soil property values"
+    )
+
+
+class SoilLayerSummary(BaseModel):
+    code: SoilPropertiesCodes = Field(
+        ..., description="The soil property code", example="bdod"
+    )
+    name: str = Field(
+        ..., description="The name of the soil property", example="Bulk density"
+    )
+    unit_measure: SoilPropertyUnit = Field(
+        ..., description="The unit of the soil property"
+    )
+    depths: List[SoilDepthSummary] = Field(
+        ..., description="The queried soil depths with statistics"
+    )
+
+
+class SoilLayerSummaryList(BaseModel):
+    layers: List[SoilLayerSummary] = Field(
+        ..., description="Statistics of the queried soil property layers"
+    )
+    resolution: float | None = Field(
+        None,
+        description=(
+            "The pixel size the statistics are based on, in the units of the "
+            "soil maps. Large areas are summarized at a coarser resolution"
+        ),
+        example=250,
+    )
+
+
+class SoilPropertySummaryJSON(BaseModel):
+    type: FeatureType = Field(
+        description="The feature type of this geojson-object",
+    )
+    geometry: BoundingBoxGeometry = Field(
+        ...,
+        description="The geometry of the queried location",
+    )
+    properties: SoilLayerSummaryList = Field(
+        ...,
+        description="The soil property statistics",
+    )
+
+
+class SoilPropertyPolygonSummaryJSON(BaseModel):
+    type: FeatureType = Field(
+        description="The feature type of this geojson-object",
+    )
+    geometry: PolygonGeometry = Field(
+        ...,
+        description="The geometry of the queried polygon",
+    )
+    properties: SoilLayerSummaryList = Field(
+        ...,
+        description="The soil property statistics",
+    )
+
+
+class SoilPropertyGridValues(BaseModel):
+    mean: List[List[float | None]] | None = Field(
+        None, description="The mean value of the soil property at every grid node"
+    )
+    Q0_05: List[List[float | None]] | None = Field(
+        None,
+        description="The 5th percentile of the soil property at every grid node",
+        alias="Q0.05",
+    )
+    Q0_5: List[List[float | None]] | None = Field(
+        None,
+        description="The 50th percentile of the soil property at every grid node",
+        alias="Q0.5",
+    )
+    Q0_95: List[List[float | None]] | None = Field(
+        None,
+        description="The 95th percentile of the soil property at every grid node",
+        alias="Q0.95",
+    )
+    uncertainty: List[List[float | None]] | None = Field(
+        None, description="The uncertainty of the soil property at every grid node"
+    )
+
+
+class SoilDepthGrid(BaseModel):
+    range: DepthRange = Field(..., description="The soil depth range")
+    label: SoilDepthLabels = Field(..., description="The soil depth label")
+    values: SoilPropertyGridValues = Field(
+        ...,
+        description=(
+            "The queried soil property values, indexed by [latitude index]"
+            "[longitude index]"
+        ),
+    )
+
+
+class SoilLayerGrid(BaseModel):
+    code: SoilPropertiesCodes = Field(
+        ..., description="The soil property code", example="bdod"
+    )
+    name: str = Field(
+        ..., description="The name of the soil property", example="Bulk density"
+    )
+    unit_measure: SoilPropertyUnit = Field(
+        ..., description="The unit of the soil property"
+    )
+    depths: List[SoilDepthGrid] = Field(
+        ..., description="The queried soil depths with values"
+    )
+
+
+class SoilLayerGridList(BaseModel):
+    lons: List[float] = Field(
+        ...,
+        description="The longitudes of the grid columns, from west to east",
+        example=[9.58, 9.59, 9.6],
+    )
+    lats: List[float] = Field(
+        ...,
+        description="The latitudes of the grid rows, from north to south",
+        example=[60.12, 60.11, 60.1],
+    )
+    layers: List[SoilLayerGrid] = Field(
+        ..., description="The queried soil property layers"
+    )
+
+
+class SoilPropertyGridJSON(BaseModel):
+    type: FeatureType = Field(
+        description="The feature type of this geojson-object",
+    )
+    geometry: BoundingBoxGeometry = Field(
+        ...,
+        description="The geometry of the queried location",
+    )
+    properties: SoilLayerGridList = Field(
+        ...,
+        description="The soil property values on the grid",
+    )
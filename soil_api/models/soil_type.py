@@ -3,7 +3,14 @@ from typing import List
 
 from pydantic import BaseModel, Field, field_serializer
 
-from soil_api.models.shared import BoundingBoxGeometry, FeatureType, PointGeometry
+from soil_api.models.shared import (
+    BoundingBoxGeometry,
+    FeatureCollectionType,
+    FeatureType,
+    PointGeometry,
+    PointList,
+    PolygonGeometry,
+)
 
 
 class SoilTypes(Enum):
@@ -130,10 +137,39 @@ class SoilTypeJSON(BaseModel):
     )
 
 
+class SoilTypeBatchQuery(PointList):
+    top_k: int = Field(
+        0,
+        description="Number of most probable soil types that will be returned, sorted by probability in descending order",
+        ge=0,
+        le=30,
+        example=0,
+    )
+
+
+class SoilTypeBatchJSON(BaseModel):
+    type: FeatureCollectionType = Field(
+        description="The feature collection type of the geojson-object",
+    )
+    features: List[SoilTypeJSON] = Field(
+        ...,
+        description="The soil type information at the queried locations, "
+        "in the order of the queried points",
+    )
+
+
 class SoilTypeSummaryInfo(BaseModel):
     summaries: List[SoilTypeSummary] = Field(
         ..., description="The soil type summaries within the queried bounding box"
     )
+    resolution: float = Field(
+        ...,
+        description=(
+            "The pixel size the counts are based on, in the units of the soil "
+            "map. Large bounding boxes are summarized at a coarser resolution"
+        ),
+        example=0.0020833,
+    )
 
 
 class SoilTypeSummaryJSON(BaseModel):
@@ -148,3 +184,17 @@ class SoilTypeSummaryJSON(BaseModel):
         ...,
         description="The soil type summary information",
     )
+
+
+class SoilTypePolygonSummaryJSON(BaseModel):
+    type: FeatureType = Field(
+        description="The feature type of this geojson-object",
+    )
+    geometry: PolygonGeometry = Field(
+        ...,
+        description="The geometry of the queried polygon",
+    )
+    properties: SoilTypeSummaryInfo = Field(
+        ...,
+        description="The soil type summary information",
+    )
@@ -1,34 +1,49 @@
 import asyncio
 import logging
-import os
-import time
+import math
 
+import numpy as np
 from fastapi import APIRouter
 
 from soil_api import constants
+from soil_api.config import settings
 from soil_api.dependencies.queryparams import (
+    AcceptHeaderDep,
     BboxQueryDep,
     DepthQueryDep,
+    GridStepDep,
     LocationQueryDep,
+    PercentileQueryDep,
     PropertyQueryDep,
     SoilTypeTopKDep,
+    SummaryResolutionDep,
     ValueQueryDep,
 )
 from soil_api.models.shared import (
     BoundingBoxGeometry,
+    FeatureCollectionType,
     FeatureType,
     GeometryType,
     PointGeometry,
+    PolygonGeometry,
 )
 from soil_api.models.soil_property import (
     SoilDepthLabels,
-    SoilLayerList,
     SoilPropertiesCodes,
+    SoilPropertyBatchJSON,
+    SoilPropertyBatchQuery,
+    SoilPropertyGridJSON,
     SoilPropertyJSON,
+    SoilPropertyPolygonSummaryJSON,
+    SoilPropertySummaryJSON,
+    SoilPropertyValueTypes,
 )
 from soil_api.models.soil_type import (
+    SoilTypeBatchJSON,
+    SoilTypeBatchQuery,
     SoilTypeInfo,
     SoilTypeJSON,
+    SoilTypePolygonSummaryJSON,
     SoilTypeProbability,
     SoilTypes,
     SoilTypeSummary,
@@ -36,12 +51,50 @@ from soil_api.models.soil_type import (
     SoilTypeSummaryJSON,
     soil_type_dict,
 )
-from soil_api.utils.bbox_extraction import extract_bbox_from_raster
+from soil_api.utils.bbox_extraction import (
+    extract_bbox_from_raster,
+    extract_polygon_from_raster,
+    extract_statistics_from_rasters,
+)
+from soil_api.utils.columnar_response import (
+    BATCH_MEDIA_TYPES,
+    GRID_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    TABLE_MEDIA_TYPES,
+    binary_response_docs,
+    negotiate_media_type,
+    npy_response,
+    soil_map_statistics_columns,
+    soil_map_value_columns,
+    soil_type_batch_columns,
+    soil_type_count_columns,
+    table_response,
+)
+from soil_api.utils.ndjson_response import ndjson_response
 from soil_api.utils.point_extraction import (
     extract_point_from_raster,
+    extract_point_from_rasters,
+    extract_points_from_rasters,
+    get_raster_transform,
+    pixel_index,
+    transform_coordinates_to_homolosine_crs_array,
+    transform_geometry_to_homolosine_crs,
     transfrom_coordinates_to_homolosine_crs,
 )
-from soil_api.utils.response_generator import generate_soil_layer
+from soil_api.utils.raster_source import property_soil_map_fname, raster_source
+from soil_api.utils.response_cache import soil_property_cache, soil_type_cache
+from soil_api.utils.response_generator import (
+    generate_soil_layer_grid_list,
+    generate_soil_layer_summary_list,
+    generate_soil_property_features,
+    generate_soil_type_features,
+    serialize_soil_layer_list,
+    soil_property_response,
+)
+from soil_api.utils.soil_type_index import read_soil_type_index
+from soil_api.utils.validation_helpers import validate_batch_size, validate_grid_size
 
 logging.basicConfig(level=logging.INFO)
 
@@ -61,13 +114,30 @@ async def get_soil_type(
     # soil type at the given location
     wrb_soil_map = "wrb"
     wrb_soil_map_fname = constants.SOIL_MAPS[wrb_soil_map]
-    wrb_soil_map_path = os.path.join(
-        constants.SOIL_MAPS_URL, wrb_soil_map, wrb_soil_map_fname
-    )
+    wrb_soil_map_path = raster_source.path(wrb_soil_map, wrb_soil_map_fname)
     lat, lon = location_query
-    value = await extract_point_from_raster(
-        raster_path=wrb_soil_map_path, latitude=lat, longitude=lon
-    )
+
+    # Serve repeated lookups within the same pixel from the cache
+    raster_transform = await get_raster_transform(wrb_soil_map_path)
+    cache_key = (raster_transform, *pixel_index(raster_transform, lat, lon), top_k)
+    cached_soil_type_info = soil_type_cache.get(cache_key)
+    if cached_soil_type_info is not None:
+        return SoilTypeJSON(
+            type=FeatureType.Feature,
+            properties=cached_soil_type_info,
+            geometry=PointGeometry(coordinates=[lon, lat], type=GeometryType.Point),
+        )
+
+    # Read the most probable soil type and all probabilities with a single
+    # read from the precomputed soil type index when it covers the location
+    index_probabilities = None
+    index_values = await read_soil_type_index(lat, lon)
+    if index_values is not None:
+        value, index_probabilities = index_values
+    else:
+        value = await extract_point_from_raster(
+            raster_path=wrb_soil_map_path, latitude=lat, longitude=lon
+        )
     # Extract the name of the most probable soil type
     # from the SoilTypes enum using the value extracted from the raster
     most_probable_soil_type = soil_type_dict[value]
@@ -84,8 +154,7 @@ async def get_soil_type(
         if top_k == 1:
             additional_soil_types = [most_probable_soil_type]
             additional_soil_maps = [
-                os.path.join(
-                    constants.SOIL_MAPS_URL,
+                raster_source.path(
                     wrb_soil_map,
                     f"{most_probable_soil_type.name}.vrt",
                 )
@@ -98,17 +167,20 @@ async def get_soil_type(
                 if soil_type != SoilTypes.No_information
             ]
             additional_soil_maps = [
-                os.path.join(
-                    constants.SOIL_MAPS_URL, wrb_soil_map, f"{soil_type.name}.vrt"
-                )
+                raster_source.path(wrb_soil_map, f"{soil_type.name}.vrt")
                 for soil_type in additional_soil_types
             ]
 
-    # Run parallel extraction for the additional soil mapsq
-    soil_type_probabilities = await run_parallel(
-        extract_point_from_raster,
-        [(raster_path, lat, lon) for raster_path in additional_soil_maps],
-    )
+    # Run fused extraction for the additional soil maps,
+    # unless the probabilities were read from the index
+    if index_probabilities is not None:
+        soil_type_probabilities = [
+            index_probabilities[soil_type] for soil_type in additional_soil_types
+        ]
+    else:
+        soil_type_probabilities = await extract_point_from_rasters(
+            additional_soil_maps, lat, lon
+        )
 
     # Merge the additional soil types and their probabilities
     merged_soil_type_probabilities = list(
@@ -145,6 +217,7 @@ async def get_soil_type(
         most_probable_soil_type=most_probable_soil_type,
         probabilities=probabilities,
     )
+    soil_type_cache.set(cache_key, soil_type_info)
 
     response = SoilTypeJSON(
         type=FeatureType.Feature,
@@ -154,6 +227,66 @@ async def get_soil_type(
     return response
 
 
+@router.post(
+    "/type/batch",
+    summary="Get soil type for many locations",
+    description=(
+        "Returns the most probable soil type for each of the given "
+        "locations, in the order of the given points. "
+        "Request application/x-ndjson to stream one feature per line "
+        "as the locations are processed."
+    ),
+    response_model_exclude_none=True,
+    responses=binary_response_docs(BATCH_MEDIA_TYPES),
+)
+async def get_soil_type_batch(
+    query: SoilTypeBatchQuery, accept: AcceptHeaderDep
+) -> SoilTypeBatchJSON:
+    validate_batch_size(len(query.points))
+    media_type = negotiate_media_type(accept, BATCH_MEDIA_TYPES)
+
+    points = np.asarray(query.points, dtype=np.float64)
+    lons, lats = points[:, 0], points[:, 1]
+
+    if media_type == NDJSON_MEDIA_TYPE:
+
+        async def extract_features(chunk: slice) -> list[SoilTypeJSON]:
+            return generate_soil_type_features(
+                query.points[chunk],
+                *await extract_soil_types_at_points(
+                    lats[chunk], lons[chunk], query.top_k
+                ),
+            )
+
+        return ndjson_response(extract_features, len(points), exclude_none=True)
+
+    (
+        most_probable_codes,
+        top_k_codes,
+        top_k_probabilities,
+    ) = await extract_soil_types_at_points(lats, lons, query.top_k)
+
+    if media_type != JSON_MEDIA_TYPE:
+        id_columns = {
+            "point_id": np.arange(len(points), dtype=np.int32),
+            "lon": lons,
+            "lat": lats,
+        }
+        return table_response(
+            soil_type_batch_columns(
+                most_probable_codes, top_k_codes, top_k_probabilities, id_columns
+            ),
+            media_type,
+        )
+
+    features = generate_soil_type_features(
+        query.points, most_probable_codes, top_k_codes, top_k_probabilities
+    )
+    return SoilTypeBatchJSON(
+        type=FeatureCollectionType.FeatureCollection, features=features
+    )
+
+
 @router.get(
     "/property",
     summary="Get soil property",
@@ -172,37 +305,9 @@ async def get_soil_property(
     properties: PropertyQueryDep,
     value_types: ValueQueryDep,
 ) -> SoilPropertyJSON:
-    # Define paths to the soil maps and store property names, depths
-    # and value types in lists for easier creation of the response model
-    soil_map_fnames = []
-    all_properties = []
-    all_depths = []
-    all_value_types = []
-    for property in properties:
-        for depth in depths:
-            for value_type in value_types:
-                all_properties.append(property)
-                all_depths.append(depth)
-                all_value_types.append(value_type)
-                # ocs is only available for 0-30cm (and vice versa)
-                # for uncompatible cases, set the soil map path to None
-                # so that the raster extraction step is skipped
-                if (
-                    property == SoilPropertiesCodes.ocs
-                    and depth != SoilDepthLabels.depth_0_30
-                ) or (
-                    depth == SoilDepthLabels.depth_0_30
-                    and property != SoilPropertiesCodes.ocs
-                ):
-                    soil_map_fnames.append(None)
-                else:
-                    soil_map_fname = (
-                        f"{property.value}_{depth.value}_{value_type.value}.vrt"
-                    )
-                    soil_map_path = os.path.join(
-                        constants.SOIL_MAPS_URL, property.value, soil_map_fname
-                    )
-                    soil_map_fnames.append(soil_map_path)
+    # Define paths to the soil maps of all requested combinations
+    soil_maps = get_soil_property_maps(properties, depths, value_types)
+    soil_map_fnames = [soil_map_path for *_, soil_map_path in soil_maps]
 
     # Convert the coordinates to the homolosine CRS
     # because the soil maps are in this CRS
@@ -211,52 +316,316 @@ async def get_soil_property(
         latitude=input_lat, longitude=input_lon
     )
 
-    # Run parallel extraction for the soil maps
-    values = await run_parallel(
-        extract_point_from_raster,
-        [(raster_path, lat, lon) for raster_path in soil_map_fnames],
+    # Serve repeated lookups within the same pixel from the cache.
+    # All soil property maps share the same grid, so the first map
+    # that is queried is used to find the pixel
+    cache_key = None
+    queried_soil_map = next((path for path in soil_map_fnames if path), None)
+    if queried_soil_map is not None:
+        raster_transform = await get_raster_transform(queried_soil_map)
+        cache_key = (
+            raster_transform,
+            *pixel_index(raster_transform, lat, lon),
+            tuple(properties),
+            tuple(depths),
+            tuple(value_types),
+        )
+        cached_soil_layer_list = soil_property_cache.get(cache_key)
+        if cached_soil_layer_list is not None:
+            return soil_property_response(input_lon, input_lat, cached_soil_layer_list)
+
+    # Run fused extraction for the soil maps
+    values = await extract_point_from_rasters(soil_map_fnames, lat, lon)
+
+    # Serialize the soil layers directly, the response is the same
+    # as serializing a SoilPropertyJSON, which is kept as the response model
+    soil_layer_list = serialize_soil_layer_list(properties, soil_maps, values)
+    if cache_key is not None:
+        soil_property_cache.set(cache_key, soil_layer_list)
+    return soil_property_response(input_lon, input_lat, soil_layer_list)
+
+
+@router.post(
+    "/property/batch",
+    summary="Get soil properties for many locations",
+    description=(
+        "Returns the values of the soil properties for each of the given "
+        "locations and depths, in the order of the given points. "
+        "Request application/x-ndjson to stream one feature per line "
+        "as the locations are processed. "
+        "Note: The ocs property is only available for the 0-30cm "
+        "depth and vice versa. If the depth and property are "
+        "incompatible, the response will not include the property."
+    ),
+    response_model_exclude_unset=True,
+    responses=binary_response_docs(BATCH_MEDIA_TYPES),
+)
+async def get_soil_property_batch(
+    query: SoilPropertyBatchQuery, accept: AcceptHeaderDep
+) -> SoilPropertyBatchJSON:
+    validate_batch_size(len(query.points))
+    media_type = negotiate_media_type(accept, BATCH_MEDIA_TYPES)
+
+    # Define paths to the soil maps of all requested combinations
+    soil_maps = get_soil_property_maps(query.properties, query.depths, query.values)
+    soil_map_fnames = [soil_map_path for *_, soil_map_path in soil_maps]
+
+    # Convert all coordinates to the homolosine CRS in one pass
+    points = np.asarray(query.points, dtype=np.float64)
+    lats, lons = transform_coordinates_to_homolosine_crs_array(
+        latitudes=points[:, 1], longitudes=points[:, 0]
     )
 
-    # Create a dictionary to store the extracted values
-    soil_map_info = {}
-    for property, depth, value_type, value in zip(
-        all_properties, all_depths, all_value_types, values
-    ):
-        # If the value is a no data value, skip it
-        if value != constants.NO_DATA_VAL:
-            # If the property is not in the dictionary, add it
-            if property not in soil_map_info:
-                soil_map_info[property] = {}
-            # If the depth is not in the dictionary, add it
-            if depth not in soil_map_info[property]:
-                soil_map_info[property][depth] = {}
-            # If the value is a soilgrids no data value, set it to None
-            # A soilgrids no data value often represents a body of water
-            if value in constants.NO_DATA_VALS_SOILGRIDS:
-                value = None
-            soil_map_info[property][depth][value_type.value] = value
-
-    # Create a list of SoilLayer objects and fill them using
-    # the soil_map_info dictionary. Skip the properties that
-    # are not in the dictionary (i.e., the ones with all no data values)
-    all_soil_layers = []
-    for property in properties:
-        if property in soil_map_info:
-            all_soil_layers.append(
-                generate_soil_layer(property, soil_map_info[property])
+    if media_type == NDJSON_MEDIA_TYPE:
+
+        async def extract_features(chunk: slice) -> list[SoilPropertyJSON]:
+            values = await extract_points_from_rasters(
+                soil_map_fnames, lats[chunk], lons[chunk]
+            )
+            return generate_soil_property_features(
+                query.properties, soil_maps, query.points[chunk], values
             )
 
-    soil_layer_list = SoilLayerList(
-        layers=all_soil_layers,
+        return ndjson_response(extract_features, len(points), exclude_unset=True)
+
+    # Sample every soil map at all points, reading each block only once
+    values = await extract_points_from_rasters(soil_map_fnames, lats, lons)
+    if media_type != JSON_MEDIA_TYPE:
+        id_columns = {
+            "point_id": np.arange(len(points), dtype=np.int32),
+            "lon": points[:, 0],
+            "lat": points[:, 1],
+        }
+        return table_response(
+            soil_map_value_columns(soil_maps, values, id_columns), media_type
+        )
+
+    features = generate_soil_property_features(
+        query.properties, soil_maps, query.points, values
+    )
+    return SoilPropertyBatchJSON(
+        type=FeatureCollectionType.FeatureCollection, features=features
+    )
+
+
+@router.get(
+    "/property/summary",
+    summary="Get soil property statistics",
+    description=(
+        "Returns the count, mean, minimum, maximum, standard deviation and "
+        "percentiles of the pixel values of the soil properties in the given "
+        "bounding box, for each of the given depths and value types. "
+        "No data pixels are skipped. The values are in the mapped units. "
+        "Large bounding boxes are summarized at a coarser resolution, "
+        "which is reported in the response. "
+        "Note: The ocs property is only available for the 0-30cm "
+        "depth and vice versa. If the depth and property are "
+        "incompatible, the response will not include the property."
+    ),
+    response_model_exclude_none=True,
+    responses=binary_response_docs(TABLE_MEDIA_TYPES),
+)
+async def get_soil_property_summary(
+    bbox: BboxQueryDep,
+    depths: DepthQueryDep,
+    properties: PropertyQueryDep,
+    value_types: ValueQueryDep,
+    percentiles: PercentileQueryDep,
+    summary_resolution: SummaryResolutionDep,
+    accept: AcceptHeaderDep,
+) -> SoilPropertySummaryJSON:
+    media_type = negotiate_media_type(accept, TABLE_MEDIA_TYPES)
+
+    # create a Polygon from the bounding box
+    polygon = [
+        [
+            [bbox[0], bbox[1]],
+            [bbox[2], bbox[1]],
+            [bbox[2], bbox[3]],
+            [bbox[0], bbox[3]],
+            [bbox[0], bbox[1]],
+        ]
+    ]
+    geometry = BoundingBoxGeometry(coordinates=polygon, type=GeometryType.Polygon)
+
+    soil_maps, statistics = await extract_soil_property_statistics(
+        geometry.model_dump(mode="json"),
+        properties,
+        depths,
+        value_types,
+        percentiles,
+        summary_resolution,
+    )
+    if media_type != JSON_MEDIA_TYPE:
+        return table_response(
+            soil_map_statistics_columns(soil_maps, statistics, percentiles),
+            media_type,
+        )
+    return SoilPropertySummaryJSON(
+        type=FeatureType.Feature,
+        properties=generate_soil_layer_summary_list(properties, soil_maps, statistics),
+        geometry=geometry,
+    )
+
+
+@router.post(
+    "/property/summary",
+    summary="Get soil property statistics for a polygon",
+    description=(
+        "Returns the count, mean, minimum, maximum, standard deviation and "
+        "percentiles of the pixel values of the soil properties in the given "
+        "GeoJSON Polygon or MultiPolygon, for each of the given depths and "
+        "value types. No data pixels are skipped. The values are in the "
+        "mapped units. Large polygons are summarized at a coarser resolution, "
+        "which is reported in the response. "
+        "Note: The ocs property is only available for the 0-30cm "
+        "depth and vice versa. If the depth and property are "
+        "incompatible, the response will not include the property."
+    ),
+    response_model_exclude_none=True,
+    responses=binary_response_docs(TABLE_MEDIA_TYPES),
+)
+async def get_soil_property_polygon_summary(
+    geometry: PolygonGeometry,
+    depths: DepthQueryDep,
+    properties: PropertyQueryDep,
+    value_types: ValueQueryDep,
+    percentiles: PercentileQueryDep,
+    summary_resolution: SummaryResolutionDep,
+    accept: AcceptHeaderDep,
+) -> SoilPropertyPolygonSummaryJSON:
+    media_type = negotiate_media_type(accept, TABLE_MEDIA_TYPES)
+
+    soil_maps, statistics = await extract_soil_property_statistics(
+        geometry.model_dump(mode="json"),
+        properties,
+        depths,
+        value_types,
+        percentiles,
+        summary_resolution,
+    )
+    if media_type != JSON_MEDIA_TYPE:
+        return table_response(
+            soil_map_statistics_columns(soil_maps, statistics, percentiles),
+            media_type,
+        )
+    return SoilPropertyPolygonSummaryJSON(
+        type=FeatureType.Feature,
+        properties=generate_soil_layer_summary_list(properties, soil_maps, statistics),
+        geometry=geometry,
+    )
+
+
+@router.get(
+    "/property/grid",
+    summary="Get soil properties on a grid",
+    description=(
+        "Returns the values of the soil properties for the given depths "
+        "at the nodes of a regular grid over the given bounding box, with "
+        "the given step in decimal degrees. The grid starts at the north "
+        "west corner of the bounding box. The values are arrays with one row "
+        "per latitude, from north to south, and one column per longitude, "
+        "from west to east. "
+        "Request application/x-ndjson to stream one point feature per "
+        "grid node instead, row by row. "
+        "Note: The ocs property is only available for the 0-30cm "
+        "depth and vice versa. If the depth and property are "
+        "incompatible, the response will not include the property."
+    ),
+    response_model_exclude_none=True,
+    responses=binary_response_docs(GRID_MEDIA_TYPES),
+)
+async def get_soil_property_grid(
+    bbox: BboxQueryDep,
+    step: GridStepDep,
+    depths: DepthQueryDep,
+    properties: PropertyQueryDep,
+    value_types: ValueQueryDep,
+    accept: AcceptHeaderDep,
+) -> SoilPropertyGridJSON:
+    media_type = negotiate_media_type(accept, GRID_MEDIA_TYPES)
+
+    # Compute the coordinates of the grid nodes
+    min_lon, min_lat, max_lon, max_lat = bbox
+    num_lons = math.floor((max_lon - min_lon) / step + 1e-9) + 1
+    num_lats = math.floor((max_lat - min_lat) / step + 1e-9) + 1
+    validate_grid_size(num_lons * num_lats)
+    # Round away floating point noise of the multiples of the step
+    grid_lons = np.round(min_lon + step * np.arange(num_lons), 10)
+    grid_lats = np.round(max_lat - step * np.arange(num_lats), 10)
+
+    # Define paths to the soil maps of all requested combinations
+    soil_maps = get_soil_property_maps(properties, depths, value_types)
+    soil_map_fnames = [soil_map_path for *_, soil_map_path in soil_maps]
+
+    # Convert all grid nodes to the homolosine CRS in one pass
+    node_lons, node_lats = np.meshgrid(grid_lons, grid_lats)
+    lats, lons = transform_coordinates_to_homolosine_crs_array(
+        latitudes=node_lats, longitudes=node_lons
     )
-    response = SoilPropertyJSON(
+
+    if media_type == NDJSON_MEDIA_TYPE:
+        # Stream every grid node as a feature, a number of whole grid rows
+        # at a time, so that every chunk covers a compact set of blocks
+        node_points = np.column_stack([node_lons.ravel(), node_lats.ravel()])
+
+        async def extract_features(chunk: slice) -> list[SoilPropertyJSON]:
+            values = await extract_points_from_rasters(
+                soil_map_fnames, lats[chunk], lons[chunk]
+            )
+            return generate_soil_property_features(
+                properties, soil_maps, node_points[chunk].tolist(), values
+            )
+
+        return ndjson_response(
+            extract_features,
+            num_lats * num_lons,
+            chunk_size=max(1, settings.stream_chunk_size // num_lons) * num_lons,
+            exclude_unset=True,
+        )
+
+    # Sample every soil map at all grid nodes, reading each block only once
+    values = await extract_points_from_rasters(soil_map_fnames, lats, lons)
+    grids = [value.reshape(num_lats, num_lons) for value in values]
+    if media_type == NPY_MEDIA_TYPE:
+        available = [
+            (soil_map, grid) for soil_map, grid in zip(soil_maps, grids) if soil_map[-1]
+        ]
+        layers = ",".join(
+            f"{property.value}/{depth.value}/{value_type.value}"
+            for (property, depth, value_type, _), _ in available
+        )
+        return npy_response(
+            (
+                np.stack([grid for _, grid in available])
+                if available
+                else np.empty((0, num_lats, num_lons), dtype=np.int16)
+            ),
+            headers={"X-Soil-Layers": layers},
+        )
+    if media_type != JSON_MEDIA_TYPE:
+        id_columns = {"lon": node_lons, "lat": node_lats}
+        return table_response(
+            soil_map_value_columns(soil_maps, values, id_columns), media_type
+        )
+
+    # create a Polygon from the bounding box
+    polygon = [
+        [
+            [bbox[0], bbox[1]],
+            [bbox[2], bbox[1]],
+            [bbox[2], bbox[3]],
+            [bbox[0], bbox[3]],
+            [bbox[0], bbox[1]],
+        ]
+    ]
+    return SoilPropertyGridJSON(
         type=FeatureType.Feature,
-        properties=soil_layer_list,
-        geometry=PointGeometry(
-            coordinates=[input_lon, input_lat], type=GeometryType.Point
+        properties=generate_soil_layer_grid_list(
+            properties, soil_maps, grids, grid_lons.tolist(), grid_lats.tolist()
         ),
+        geometry=BoundingBoxGeometry(coordinates=polygon, type=GeometryType.Polygon),
     )
-    return response
 
 
 @router.get(
@@ -265,20 +634,35 @@ async def get_soil_property(
     description=(
         "Returns the a summary of the soil types present in the "
         "given bounding box, represented by a mapping of each soil "
-        "type to the number of occurrences in the bounding box"
+        "type to the number of occurrences in the bounding box. "
+        "Large bounding boxes are summarized at a coarser resolution, "
+        "which is reported in the response."
     ),
     response_model_exclude_none=True,
+    responses=binary_response_docs(TABLE_MEDIA_TYPES),
 )
-async def get_soil_type_summary(bbox: BboxQueryDep) -> SoilTypeSummaryJSON:
+async def get_soil_type_summary(
+    bbox: BboxQueryDep,
+    summary_resolution: SummaryResolutionDep,
+    accept: AcceptHeaderDep,
+) -> SoilTypeSummaryJSON:
+    media_type = negotiate_media_type(accept, TABLE_MEDIA_TYPES)
+
     # Define the path to the WRB soil map
     wrb_soil_map = "wrb"
     wrb_soil_map_fname = constants.SOIL_MAPS[wrb_soil_map]
-    wrb_soil_map_path = os.path.join(
-        constants.SOIL_MAPS_URL, wrb_soil_map, wrb_soil_map_fname
-    )
+    wrb_soil_map_path = raster_source.path(wrb_soil_map, wrb_soil_map_fname)
 
-    # Extract the soil types and their counts from the WRB soil map
-    types_counts = extract_bbox_from_raster(wrb_soil_map_path, bbox)
+    # Extract the soil types and their counts from the WRB soil map,
+    # at a coarser resolution if the bounding box is large
+    resolution, max_pixels = summary_resolution
+    types_counts, used_resolution = await extract_bbox_from_raster(
+        wrb_soil_map_path, bbox, max_pixels=max_pixels, resolution=resolution
+    )
+    if media_type != JSON_MEDIA_TYPE:
+        return table_response(
+            soil_type_count_columns(types_counts, used_resolution), media_type
+        )
 
     # create a Polygon from the bounding box
     polygon = [
@@ -300,7 +684,9 @@ async def get_soil_type_summary(bbox: BboxQueryDep) -> SoilTypeSummaryJSON:
         for key, count in sorted(types_counts.items(), key=lambda x: x[1], reverse=True)
     ]
 
-    soil_type_summaries = SoilTypeSummaryInfo(summaries=summaries)
+    soil_type_summaries = SoilTypeSummaryInfo(
+        summaries=summaries, resolution=used_resolution
+    )
     response = SoilTypeSummaryJSON(
         type=FeatureType.Feature,
         properties=soil_type_summaries,
@@ -310,26 +696,217 @@ async def get_soil_type_summary(bbox: BboxQueryDep) -> SoilTypeSummaryJSON:
     return response
 
 
-async def run_parallel(target_function: callable, args_list: list) -> list:
-    start_time = time.time()
-    logging.info(f"Running parallel extraction for {len(args_list)} rasters")
-    tasks = [target_function(*args) for args in args_list]
-    results = await asyncio.gather(*tasks)
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    logging.info(f"Parallel execution time: {elapsed_time} seconds")
-    return results
-
-
-# Just to see the difference between sequential and parallel execution
-async def run_sequential(target_function: callable, args_list: list) -> list:
-    start_time = time.time()
-    logging.info(f"Running sequential extraction for {len(args_list)} rasters")
-    results = []
-    for args in args_list:
-        value = await target_function(*args)
-        results.append(value)
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    logging.info(f"Sequential execution time: {elapsed_time} seconds")
-    return results
+@router.post(
+    "/type/summary",
+    summary="Get soil type summary for a polygon",
+    description=(
+        "Returns the a summary of the soil types present in the "
+        "given GeoJSON Polygon or MultiPolygon, represented by a mapping of "
+        "each soil type to the number of occurrences in the polygon. "
+        "Large polygons are summarized at a coarser resolution, "
+        "which is reported in the response."
+    ),
+    response_model_exclude_none=True,
+    responses=binary_response_docs(TABLE_MEDIA_TYPES),
+)
+async def get_soil_type_polygon_summary(
+    geometry: PolygonGeometry,
+    summary_resolution: SummaryResolutionDep,
+    accept: AcceptHeaderDep,
+) -> SoilTypePolygonSummaryJSON:
+    media_type = negotiate_media_type(accept, TABLE_MEDIA_TYPES)
+
+    # Define the path to the WRB soil map
+    wrb_soil_map = "wrb"
+    wrb_soil_map_fname = constants.SOIL_MAPS[wrb_soil_map]
+    wrb_soil_map_path = raster_source.path(wrb_soil_map, wrb_soil_map_fname)
+
+    # Extract the soil types and their counts inside the polygon
+    # from the WRB soil map, at a coarser resolution if the polygon is large
+    resolution, max_pixels = summary_resolution
+    types_counts, used_resolution = await extract_polygon_from_raster(
+        wrb_soil_map_path,
+        geometry.model_dump(mode="json"),
+        max_pixels=max_pixels,
+        resolution=resolution,
+    )
+    if media_type != JSON_MEDIA_TYPE:
+        return table_response(
+            soil_type_count_columns(types_counts, used_resolution), media_type
+        )
+
+    # Create a list of SoilTypeSummary objects
+    summaries = [
+        SoilTypeSummary(
+            soil_type=soil_type_dict[key],
+            count=count,
+        )
+        for key, count in sorted(types_counts.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+    soil_type_summaries = SoilTypeSummaryInfo(
+        summaries=summaries, resolution=used_resolution
+    )
+    response = SoilTypePolygonSummaryJSON(
+        type=FeatureType.Feature,
+        properties=soil_type_summaries,
+        geometry=geometry,
+    )
+
+    return response
+
+
+async def extract_soil_types_at_points(
+    latitudes: np.ndarray, longitudes: np.ndarray, top_k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Extracts the most probable soil type and the top k most probable
+    soil types with their probabilities at many locations.
+
+    Args:
+    - latitudes (np.ndarray): Latitudes in decimal degrees.
+    - longitudes (np.ndarray): Longitudes in decimal degrees.
+    - top_k (int): Number of most probable soil types to extract.
+
+    Returns:
+    tuple: The most probable soil type code of every location, and the codes
+        and probabilities of the top k soil types of every location, with
+        one column per rank.
+    """
+    # Extract the most probable soil type at all locations at once
+    wrb_soil_map = "wrb"
+    wrb_soil_map_fname = constants.SOIL_MAPS[wrb_soil_map]
+    wrb_soil_map_path = raster_source.path(wrb_soil_map, wrb_soil_map_fname)
+    (most_probable_codes,) = await extract_points_from_rasters(
+        [wrb_soil_map_path], latitudes, longitudes
+    )
+
+    # Extract the probabilities into a (points x soil types) matrix, where
+    # the column index is the soil type code. Locations without information
+    # (SoilGrids WRB code 255) are skipped and keep a probability of 0
+    soil_types = [
+        soil_type for soil_type in SoilTypes if soil_type != SoilTypes.No_information
+    ]
+    soil_type_probabilities = np.zeros(
+        (len(latitudes), len(soil_types)), dtype=np.int64
+    )
+    if top_k == 1:
+        # Only query the map of the most probable soil type at each location
+        codes = np.unique(most_probable_codes[most_probable_codes != 255])
+        selections = [np.flatnonzero(most_probable_codes == code) for code in codes]
+        probabilities = await asyncio.gather(
+            *(
+                extract_points_from_rasters(
+                    [
+                        raster_source.path(
+                            wrb_soil_map,
+                            f"{soil_type_dict[code].name}.vrt",
+                        )
+                    ],
+                    latitudes[selection],
+                    longitudes[selection],
+                )
+                for code, selection in zip(codes.tolist(), selections)
+            )
+        )
+        for code, selection, (values,) in zip(codes, selections, probabilities):
+            soil_type_probabilities[selection, code] = values
+    elif top_k > 1:
+        selection = np.flatnonzero(most_probable_codes != 255)
+        if selection.size:
+            probabilities = await extract_points_from_rasters(
+                [
+                    raster_source.path(wrb_soil_map, f"{soil_type.name}.vrt")
+                    for soil_type in soil_types
+                ],
+                latitudes[selection],
+                longitudes[selection],
+            )
+            soil_type_probabilities[selection] = np.column_stack(probabilities)
+
+    # Sort the soil types by probability for all locations at once and keep
+    # the top k. The stable sort keeps ties in soil type order, like /type
+    top_k_codes = np.argsort(-soil_type_probabilities, axis=1, kind="stable")[:, :top_k]
+    top_k_probabilities = np.take_along_axis(
+        soil_type_probabilities, top_k_codes, axis=1
+    )
+    return most_probable_codes, top_k_codes, top_k_probabilities
+
+
+def get_soil_property_maps(
+    properties: list[SoilPropertiesCodes],
+    depths: list[SoilDepthLabels],
+    value_types: list[SoilPropertyValueTypes],
+) -> list[
+    tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+]:
+    """Lists the soil map of every combination of the given properties,
+    depths and value types. The soil map path is None for combinations
+    that are not available.
+
+    Args:
+    - properties (list[SoilPropertiesCodes]): The soil properties.
+    - depths (list[SoilDepthLabels]): The soil depths.
+    - value_types (list[SoilPropertyValueTypes]): The value types.
+
+    Returns:
+    list[tuple]: The property, depth, value type and soil map path
+        of every combination.
+    """
+    soil_maps = []
+    for property in properties:
+        for depth in depths:
+            for value_type in value_types:
+                # ocs is only available for 0-30cm (and vice versa)
+                # for uncompatible cases, set the soil map path to None
+                # so that the raster extraction step is skipped
+                soil_map_fname = property_soil_map_fname(property, depth, value_type)
+                if soil_map_fname is None:
+                    soil_map_path = None
+                else:
+                    soil_map_path = raster_source.path(property.value, soil_map_fname)
+                soil_maps.append((property, depth, value_type, soil_map_path))
+    return soil_maps
+
+
+async def extract_soil_property_statistics(
+    geometry: dict,
+    properties: list[SoilPropertiesCodes],
+    depths: list[SoilDepthLabels],
+    value_types: list[SoilPropertyValueTypes],
+    percentiles: list[float],
+    summary_resolution: tuple[float | None, int],
+) -> tuple[list[tuple], list[tuple[dict, float] | None]]:
+    """Computes statistics of the soil properties within the polygon for
+    every combination of the given properties, depths and value types.
+
+    Args:
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in decimal degrees.
+    - properties (list[SoilPropertiesCodes]): The soil properties.
+    - depths (list[SoilDepthLabels]): The soil depths.
+    - value_types (list[SoilPropertyValueTypes]): The value types.
+    - percentiles (list[float]): Percentiles to compute, between 0 and 100.
+    - summary_resolution (tuple[float | None, int]): The requested resolution
+        and maximum number of pixels to summarize.
+
+    Returns:
+    tuple: The property, depth, value type and soil map path of every
+        combination, and the statistics and the pixel size they are based
+        on for every soil map, or None for soil maps that are not available.
+    """
+    # Define paths to the soil maps of all requested combinations
+    soil_maps = get_soil_property_maps(properties, depths, value_types)
+    soil_map_fnames = [soil_map_path for *_, soil_map_path in soil_maps]
+
+    # Convert the polygon to the homolosine CRS
+    # because the soil maps are in this CRS
+    homolosine_geometry = transform_geometry_to_homolosine_crs(geometry)
+
+    resolution, max_pixels = summary_resolution
+    statistics = await extract_statistics_from_rasters(
+        soil_map_fnames,
+        homolosine_geometry,
+        percentiles,
+        max_pixels=max_pixels,
+        resolution=resolution,
+    )
+    return soil_maps, statistics
@@ -1,11 +1,15 @@
-import os
-
 import rasterio
 from fastapi import APIRouter, Response
 from healthcheck import HealthCheck
 
 from soil_api import constants
 from soil_api.config import settings
+from soil_api.utils.block_cache import block_cache
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.raster_source import raster_source
+from soil_api.utils.readiness_probe import ReadinessProbe
+from soil_api.utils.warmup import warmup
 
 router = APIRouter()
 
@@ -13,17 +17,49 @@ router = APIRouter()
 def soilgrids_healthcheck():
     soil_map = "wrb"
     soil_map_fname = constants.SOIL_MAPS[soil_map]
-    soil_map_path = os.path.join(constants.SOIL_MAPS_URL, soil_map, soil_map_fname)
+    soil_map_path = raster_source.path(soil_map, soil_map_fname)
     try:
-        with rasterio.open(soil_map_path) as src:
-            return True, "SoilGrids service is available"
+        # Reach the server instead of GDAL's cache of remote files
+        with rasterio.Env(CPL_VSIL_CURL_NON_CACHED=f"/vsicurl/{soil_map_path}"):
+            with rasterio.open(soil_map_path):
+                return True, "SoilGrids service is available"
     except Exception as e:
         return False, f"SoilGrids service not available: {str(e)}"
 
 
-health = HealthCheck(success_ttl=120)
-health.add_check(soilgrids_healthcheck)
+def raster_io_status() -> dict:
+    """Reports the use of the raster I/O resources. A saturated executor
+    only rejects the requests it cannot admit, it does not make the
+    service unready."""
+    return {
+        "admitted_jobs": raster_executor.admitted,
+        "job_capacity": raster_executor.capacity,
+        "saturated": raster_executor.admitted >= raster_executor.capacity,
+        "open_datasets": dataset_pool.size(),
+        "block_cache_bytes": block_cache.nbytes,
+        "block_cache_max_bytes": block_cache.max_bytes,
+    }
+
+
+def warmup_healthcheck():
+    if warmup.ready:
+        return True, "Soil maps are warmed up"
+    return False, f"Warming up soil maps: {warmup.progress:.0%} done"
+
+
+readiness_probe = ReadinessProbe(
+    [soilgrids_healthcheck],
+    interval=settings.readiness_probe_interval,
+    timeout=settings.readiness_probe_timeout,
+)
+
+# The checks only read the results of the readiness probe and the warm-up,
+# so there is nothing to cache
+health = HealthCheck(success_ttl=0, failed_ttl=0)
+health.add_check(readiness_probe.cached(soilgrids_healthcheck))
+health.add_check(warmup_healthcheck)
 health.add_section("version", settings.version)
+health.add_section("warmup", warmup.status)
 
 
 @router.get(
@@ -40,8 +76,11 @@ async def ready() -> Response:
 @router.get(
     "/health",
     summary="Check if this service is alive",
-    description="Returns a simple message to indicate that this service is alive",
+    description=(
+        "Returns a simple message to indicate that this service is alive, "
+        "and the use of its raster I/O resources"
+    ),
     tags=["health"],
 )
-async def liveness() -> dict[str, str]:
-    return {"message": "Ok"}
+async def liveness() -> dict:
+    return {"message": "Ok", "raster_io": raster_io_status()}
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+import rasterio
+from fastapi.testclient import TestClient
+from rasterio.transform import from_origin
+
+from soil_api import constants
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
+from soil_api.models.soil_type import SoilTypes, soil_type_dict
+from soil_api.routes import soil_routes
+from soil_api.utils import point_extraction
+from soil_api.utils.block_cache import block_cache
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.raster_source import LocalRasterSource, list_soil_maps
+from soil_api.utils.response_cache import soil_property_cache, soil_type_cache
+
+# The soil maps of the tests cover 9-11E, 59-61N. Like in SoilGrids, the
+# WRB soil maps are read in decimal degrees and the soil property maps in
+# the Homolosine CRS
+WRB_TRANSFORM = from_origin(9.0, 61.0, 0.01, 0.01)
+WRB_SHAPE = (200, 200)
+PROPERTY_TRANSFORM = from_origin(1940000.0, 6640000.0, 1000.0, 1000.0)
+PROPERTY_SHAPE = (200, 200)
+PROPERTY_SOIL_MAPS = list_soil_maps(
+    [SoilPropertiesCodes.clay, SoilPropertiesCodes.sand, SoilPropertiesCodes.ocs],
+    [
+        SoilDepthLabels.depth_0_5,
+        SoilDepthLabels.depth_5_15,
+        SoilDepthLabels.depth_0_30,
+    ],
+    [SoilPropertyValueTypes.mean, SoilPropertyValueTypes.Q0_5],
+    soil_types=False,
+)
+
+
+def write_soil_map(path, values, crs, transform, nodata):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=values.shape[1],
+        height=values.shape[0],
+        count=1,
+        dtype=values.dtype,
+        crs=crs,
+        transform=transform,
+        nodata=nodata,
+        tiled=True,
+        blockxsize=16,
+        blockysize=16,
+    ) as dst:
+        dst.write(values, 1)
+        dst.build_overviews([2, 4], rasterio.enums.Resampling.nearest)
+
+
+@pytest.fixture(scope="session")
+def soil_maps_dir(tmp_path_factory):
+    """A directory with the layout of SoilGrids, holding small random
+    soil maps. The files are GeoTIFFs, named like the SoilGrids VRTs."""
+    root = tmp_path_factory.mktemp("soilgrids")
+    rng = np.random.default_rng(0)
+
+    (root / "wrb").mkdir()
+    codes = rng.integers(0, 30, WRB_SHAPE, dtype=np.uint8)
+    codes[:20, :20] = 255
+    write_soil_map(
+        root / "wrb" / constants.SOIL_MAPS["wrb"],
+        codes,
+        "EPSG:4326",
+        WRB_TRANSFORM,
+        nodata=255,
+    )
+    for soil_type in soil_type_dict.values():
+        if soil_type == SoilTypes.No_information:
+            continue
+        write_soil_map(
+            root / "wrb" / f"{soil_type.name}.vrt",
+            rng.integers(0, 100, WRB_SHAPE, dtype=np.uint8),
+            "EPSG:4326",
+            WRB_TRANSFORM,
+            nodata=None,
+        )
+
+    for soil_map, fname in PROPERTY_SOIL_MAPS:
+        values = rng.integers(0, 1000, PROPERTY_SHAPE, dtype=np.int16)
+        values[rng.random(PROPERTY_SHAPE) < 0.05] = -32768
+        (root / soil_map).mkdir(exist_ok=True)
+        write_soil_map(
+            root / soil_map / fname,
+            values,
+            constants.HOMOLOSINE_CRS_WKT,
+            PROPERTY_TRANSFORM,
+            nodata=-32768,
+        )
+    return root
+
+
+def clear_caches():
+    soil_type_cache.clear()
+    soil_property_cache.clear()
+    block_cache.clear()
+    point_extraction._raster_transforms.clear()
+    dataset_pool.close()
+
+
+@pytest.fixture
+def client(soil_maps_dir, monkeypatch):
+    """A client of the API that reads the soil maps of soil_maps_dir,
+    with empty caches."""
+    from soil_api.__main__ import app
+
+    monkeypatch.setattr(
+        soil_routes, "raster_source", LocalRasterSource(str(soil_maps_dir))
+    )
+    clear_caches()
+    yield TestClient(app)
+    clear_caches()
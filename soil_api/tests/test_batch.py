@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from soil_api.config import settings
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(9, 11, 20), rng.uniform(59, 61, 20)])
+    # A point outside of the soil maps
+    return [*np.round(points, 4).tolist(), [20.0, 50.0]]
+
+
+class TestSoilPropertyBatch:
+    def test_features_match_single_point_queries(self, client, points):
+        query = {
+            "depths": ["0-5cm", "5-15cm", "0-30cm"],
+            "properties": ["clay", "ocs"],
+            "values": ["mean", "Q0.5"],
+        }
+        response = client.post("/property/batch", json={**query, "points": points})
+        assert response.status_code == 200
+        features = response.json()["features"]
+        assert len(features) == len(points)
+        for (lon, lat), feature in zip(points, features):
+            expected = client.get("/property", params={**query, "lon": lon, "lat": lat})
+            assert feature == expected.json()
+
+    def test_too_many_points(self, client, points, monkeypatch):
+        monkeypatch.setattr(settings, "batch_max_points", 5)
+        response = client.post(
+            "/property/batch",
+            json={
+                "points": points,
+                "depths": ["0-5cm"],
+                "properties": ["clay"],
+                "values": ["mean"],
+            },
+        )
+        assert response.status_code == 400
+
+
+class TestSoilTypeBatch:
+    @pytest.mark.parametrize("top_k", [0, 1, 3])
+    def test_features_match_single_point_queries(self, client, points, top_k):
+        # A point without soil type information
+        points = [*points, [9.05, 60.95]]
+        response = client.post("/type/batch", json={"points": points, "top_k": top_k})
+        assert response.status_code == 200
+        features = response.json()["features"]
+        assert len(features) == len(points)
+        for (lon, lat), feature in zip(points, features):
+            expected = client.get(
+                "/type", params={"lon": lon, "lat": lat, "top_k": top_k}
+            )
+            assert feature == expected.json()
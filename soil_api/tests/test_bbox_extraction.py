@@ -0,0 +1,97 @@
+import numpy as np
+import rasterio
+from rasterio.windows import Window, from_bounds
+
+from soil_api import constants
+from soil_api.tests.conftest import clear_caches
+from soil_api.utils.bbox_extraction import count_classes_in_bbox, select_overview_level
+from soil_api.utils.block_cache import read_window
+
+BBOX = [9.123, 59.456, 9.789, 60.912]
+
+
+def direct_counts(raster_path, bbox, overview_level=None):
+    with rasterio.open(raster_path, overview_level=overview_level) as src:
+        window = from_bounds(*bbox, transform=src.transform)
+        codes = src.read(1, window=window.round_offsets().round_lengths())
+    return dict(
+        zip(*(values.tolist() for values in np.unique(codes, return_counts=True)))
+    )
+
+
+class TestBboxSummary:
+    def test_counts_match_direct_histogram(self, soil_maps_dir):
+        clear_caches()
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        counts, resolution = count_classes_in_bbox(raster_path, BBOX)
+        assert counts == direct_counts(raster_path, BBOX)
+        assert resolution == 0.01
+        # Counting again from the block cache gives the same counts
+        assert count_classes_in_bbox(raster_path, BBOX)[0] == counts
+        clear_caches()
+
+    def test_route_matches_direct_histogram(self, client, soil_maps_dir):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        response = client.get(
+            "/type/summary",
+            params={
+                "min_lon": BBOX[0],
+                "min_lat": BBOX[1],
+                "max_lon": BBOX[2],
+                "max_lat": BBOX[3],
+            },
+        )
+        assert response.status_code == 200
+        summaries = response.json()["properties"]["summaries"]
+        assert sum(summary["count"] for summary in summaries) == sum(
+            direct_counts(raster_path, BBOX).values()
+        )
+
+    def test_read_window_matches_direct_read(self, soil_maps_dir):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        clear_caches()
+        with rasterio.open(raster_path) as src:
+            for window in [Window(5, 7, 50, 33), Window(0, 0, 200, 200)]:
+                np.testing.assert_array_equal(
+                    read_window(src, raster_path, window), src.read(1, window=window)
+                )
+            # Windows partly outside of the raster are clipped
+            assert read_window(src, raster_path, Window(190, 195, 20, 20)).shape == (
+                5,
+                10,
+            )
+        clear_caches()
+
+
+class TestOverviewSummary:
+    def test_select_overview_level(self, soil_maps_dir):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        bbox = [9.0, 59.0, 11.0, 61.0]
+        with rasterio.open(raster_path) as src:
+            assert select_overview_level(src, bbox, max_pixels=40000) is None
+            assert select_overview_level(src, bbox, max_pixels=10000) == 0
+            assert select_overview_level(src, bbox, max_pixels=2500) == 1
+            # The coarsest overview is used if no level is small enough
+            assert select_overview_level(src, bbox, max_pixels=100) == 1
+            assert select_overview_level(src, bbox, resolution=0.015) == 0
+            assert select_overview_level(src, bbox, resolution=0.01) is None
+
+    def test_large_bbox_is_counted_on_an_overview(self, soil_maps_dir):
+        clear_caches()
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        bbox = [9.0, 59.0, 11.0, 61.0]
+        counts, resolution = count_classes_in_bbox(raster_path, bbox, max_pixels=3000)
+        assert resolution == 0.04
+        assert counts == direct_counts(raster_path, bbox, overview_level=1)
+        # Full resolution blocks are cached separately from the overview blocks
+        assert count_classes_in_bbox(raster_path, bbox)[0] == direct_counts(
+            raster_path, bbox
+        )
+        clear_caches()
+
+    def test_route_reports_resolution(self, client):
+        params = {"min_lon": 9.0, "min_lat": 59.0, "max_lon": 11.0, "max_lat": 61.0}
+        response = client.get("/type/summary", params={**params, "resolution": 0.02})
+        assert response.json()["properties"]["resolution"] == 0.02
+        summaries = response.json()["properties"]["summaries"]
+        assert sum(summary["count"] for summary in summaries) == 100 * 100
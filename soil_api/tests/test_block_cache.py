@@ -0,0 +1,70 @@
+import numpy as np
+import rasterio
+
+from soil_api.tests.conftest import PROPERTY_SOIL_MAPS
+from soil_api.utils.block_cache import BlockCache, block_cache, sample_points
+
+
+def block(value: int) -> np.ndarray:
+    # 16 x 16 int16 blocks of 512 bytes
+    return np.full((16, 16), value, dtype=np.int16)
+
+
+class TestBlockCache:
+    def test_hits_and_misses(self):
+        cache = BlockCache(max_bytes=2048)
+        assert cache.get(("a", 0, 0)) is None
+        cache.put(("a", 0, 0), block(1))
+        np.testing.assert_array_equal(cache.get(("a", 0, 0)), block(1))
+        assert cache.get(("a", 0, 1)) is None
+
+    def test_byte_budget_evicts_least_recently_used_blocks(self):
+        cache = BlockCache(max_bytes=1024)
+        cache.put(("a", 0, 0), block(1))
+        cache.put(("a", 0, 1), block(2))
+        cache.get(("a", 0, 0))
+        cache.put(("a", 0, 2), block(3))
+        assert cache.nbytes == 1024
+        assert cache.get(("a", 0, 1)) is None
+        assert cache.get(("a", 0, 0)) is not None
+        assert cache.get(("a", 0, 2)) is not None
+
+    def test_zero_budget_disables_the_cache(self):
+        cache = BlockCache(max_bytes=0)
+        cache.put(("a", 0, 0), block(1))
+        assert cache.get(("a", 0, 0)) is None
+        assert cache.nbytes == 0
+
+    def test_get_or_read_reads_once(self):
+        cache = BlockCache(max_bytes=1024)
+        reads = []
+
+        def read():
+            reads.append(1)
+            return block(1)
+
+        cache.get_or_read(("a", 0, 0), read)
+        cache.get_or_read(("a", 0, 0), read)
+        assert len(reads) == 1
+
+
+class TestSamplePoints:
+    def test_values_match_direct_reads(self, soil_maps_dir):
+        soil_map, fname = PROPERTY_SOIL_MAPS[0]
+        raster_path = str(soil_maps_dir / soil_map / fname)
+        rng = np.random.default_rng(0)
+        with rasterio.open(raster_path) as src:
+            left, bottom, right, top = src.bounds
+            # Some of the points are outside of the raster
+            xs = rng.uniform(left - 5000, right + 5000, 500)
+            ys = rng.uniform(bottom - 5000, top + 5000, 500)
+            expected = np.array([value[0] for value in src.sample(zip(xs, ys))])
+            outside = (xs < left) | (xs >= right) | (ys <= bottom) | (ys > top)
+            expected[outside] = src.nodata
+
+            block_cache.clear()
+            values = sample_points(src, raster_path, xs, ys)
+            cached_values = sample_points(src, raster_path, xs, ys)
+            block_cache.clear()
+        np.testing.assert_array_equal(values, expected)
+        np.testing.assert_array_equal(cached_values, expected)
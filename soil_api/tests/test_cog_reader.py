@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import http.server
+import os
+import threading
+from unittest import mock
+
+import numpy as np
+import pytest
+import rasterio
+from fastapi.testclient import TestClient
+from rasterio.windows import Window
+
+from soil_api.utils import cog_reader
+from soil_api.utils.cog_reader import CogReader, UnsupportedTiffError
+from soil_api.utils.raster_manifest import RasterInfo
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files with support for single byte ranges, like the servers
+    COGs are read from."""
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            content = f.read()
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        byte_range = self.headers.get("Range")
+        if byte_range is None:
+            self.send_response(200)
+            body = content
+        else:
+            start, end = byte_range.removeprefix("bytes=").split("-")
+            start, end = int(start), min(int(end), len(content) - 1)
+            body = content[start : end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    handler = functools.partial(RangeRequestHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.requests = []
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def write_geotiff(path, values, **profile):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=values.shape[1],
+        height=values.shape[0],
+        count=1,
+        dtype=values.dtype,
+        tiled=True,
+        blockxsize=64,
+        blockysize=64,
+        **profile,
+    ) as dst:
+        dst.write(values, 1)
+
+
+def read_window(url, window, reader=None):
+    reader = reader or CogReader(8, 10.0, 4096, http2=True)
+    return asyncio.run(reader.read_window(url, 1, window))
+
+
+class TestCogReader:
+    @pytest.mark.parametrize(
+        "dtype,profile",
+        [
+            ("int16", {"compress": "deflate", "predictor": 2}),
+            ("uint8", {}),
+            ("float32", {"compress": "deflate", "bigtiff": "yes"}),
+            ("int16", {"compress": "deflate", "endianness": "big"}),
+        ],
+    )
+    def test_read_window_matches_gdal(self, server, tmp_path, dtype, profile):
+        _, url = server
+        rng = np.random.default_rng(0)
+        values = (rng.random((150, 200)) * 100).astype(dtype)
+        write_geotiff(tmp_path / "a.tif", values, **profile)
+
+        for window in [Window(0, 0, 200, 150), Window(50, 30, 100, 70)]:
+            np.testing.assert_array_equal(
+                read_window(f"{url}/a.tif", window),
+                values[window.toslices()],
+            )
+
+    def test_layout_is_fetched_once(self, server, tmp_path):
+        http_server, url = server
+        values = np.arange(150 * 200, dtype=np.int32).reshape(150, 200)
+        write_geotiff(tmp_path / "a.tif", values, compress="deflate")
+        reader = CogReader(8, 10.0, 4096, http2=True)
+
+        async def read_twice():
+            await reader.read_window(f"{url}/a.tif", 1, Window(70, 70, 1, 1))
+            await reader.read_window(f"{url}/a.tif", 1, Window(130, 10, 1, 1))
+
+        asyncio.run(read_twice())
+        # A header and one tile, then only the other tile
+        assert len(http_server.requests) == 3
+        assert http_server.requests[0][1].startswith("bytes=0-")
+
+    def test_sparse_tiles_are_nodata(self, server, tmp_path):
+        _, url = server
+        values = np.full((150, 200), -1, dtype=np.int16)
+        values[:64, :64] = 7
+        write_geotiff(tmp_path / "a.tif", values, nodata=-1, sparse_ok=True)
+        np.testing.assert_array_equal(
+            read_window(f"{url}/a.tif", Window(0, 0, 200, 150)), values
+        )
+
+    def test_unsupported_compression(self, server, tmp_path):
+        _, url = server
+        values = np.zeros((150, 200), dtype=np.int16)
+        write_geotiff(tmp_path / "a.tif", values, compress="lzw")
+        with pytest.raises(UnsupportedTiffError):
+            read_window(f"{url}/a.tif", Window(0, 0, 1, 1))
+
+    def test_vrt_block_matches_gdal(self, server, tmp_path):
+        _, url = server
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 1000, (150, 200), dtype=np.int16)
+        write_geotiff(
+            tmp_path / "a.tif", values, compress="deflate", predictor=2, nodata=-32768
+        )
+        (tmp_path / "a.vrt").write_text(
+            """<VRTDataset rasterXSize="300" rasterYSize="200">
+  <SRS>EPSG:4326</SRS>
+  <GeoTransform>10, 0.01, 0, 60, 0, -0.01</GeoTransform>
+  <VRTRasterBand dataType="Int16" band="1">
+    <NoDataValue>-32768</NoDataValue>
+    <SimpleSource>
+      <SourceFilename relativeToVRT="1">a.tif</SourceFilename>
+      <SourceBand>1</SourceBand>
+      <SrcRect xOff="0" yOff="0" xSize="200" ySize="150" />
+      <DstRect xOff="90" yOff="40" xSize="200" ySize="150" />
+    </SimpleSource>
+  </VRTRasterBand>
+</VRTDataset>
+"""
+        )
+        with rasterio.open(tmp_path / "a.vrt") as src:
+            raster_info = RasterInfo.from_dataset(f"{url}/a.vrt", src)
+            expected = src.read(1)
+        assert raster_info.cog_urls == [f"{url}/a.tif"]
+
+        block_height, block_width = raster_info.block_shapes[0]
+
+        async def read_blocks():
+            return {
+                (block_row, block_col): await raster_info.read_block_async(
+                    block_row, block_col
+                )
+                for block_row in range(-(-200 // block_height))
+                for block_col in range(-(-300 // block_width))
+            }
+
+        for (block_row, block_col), block in asyncio.run(read_blocks()).items():
+            window = raster_info.block_window(block_row, block_col)
+            np.testing.assert_array_equal(block, expected[window.toslices()])
+
+    def test_close_closes_the_connections(self, server, tmp_path):
+        _, url = server
+        write_geotiff(tmp_path / "a.tif", np.zeros((150, 200), dtype=np.int16))
+        reader = CogReader(8, 10.0, 4096, http2=True)
+
+        async def read_and_close():
+            await reader.read_window(f"{url}/a.tif", 1, Window(0, 0, 1, 1))
+            client = reader._get_client()
+            await reader.close()
+            return client
+
+        assert asyncio.run(read_and_close()).is_closed
+        # The reader can be used again after closing
+        assert read_window(f"{url}/a.tif", Window(0, 0, 1, 1), reader).shape == (1, 1)
+
+    def test_warns_if_http2_is_unavailable(self, caplog):
+        with mock.patch.object(cog_reader, "HTTP2_AVAILABLE", False):
+            reader = CogReader(8, 10.0, 4096, http2=True)
+        assert not reader.http2
+        assert "h2 package is not installed" in caplog.text
+
+    def test_connections_are_closed_on_shutdown(self):
+        from soil_api.__main__ import app, dataset_pool, raster_executor
+
+        with (
+            mock.patch.object(cog_reader.cog_reader, "close") as close,
+            mock.patch.object(raster_executor, "shutdown") as shutdown,
+            mock.patch.object(dataset_pool, "close") as close_pool,
+        ):
+            with TestClient(app):
+                close.assert_not_awaited()
+                shutdown.assert_not_called()
+            close.assert_awaited_once()
+            shutdown.assert_called_once()
+            close_pool.assert_called_once()
@@ -0,0 +1,139 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from soil_api.utils.columnar_response import (
+    ARROW_MEDIA_TYPE,
+    GRID_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    TABLE_MEDIA_TYPES,
+    negotiate_media_type,
+)
+
+POINTS = [[9.5, 59.5], [10.25, 60.75], [9.05, 60.95], [20.0, 50.0]]
+QUERY = {
+    "properties": ["clay", "ocs"],
+    "depths": ["0-5cm", "0-30cm"],
+    "values": ["mean", "Q0.5"],
+}
+GRID_PARAMS = {
+    **QUERY,
+    "min_lon": 9.5,
+    "min_lat": 59.5,
+    "max_lon": 10.0,
+    "max_lat": 60.0,
+    "step": 0.1,
+}
+
+
+def read_table(response):
+    if response.headers["content-type"] == PARQUET_MEDIA_TYPE:
+        return pq.read_table(io.BytesIO(response.content))
+    return pa.ipc.open_stream(response.content).read_all()
+
+
+def row_key(row):
+    return row["point_id"], row["property"], row["depth"], row["value_type"]
+
+
+class TestNegotiateMediaType:
+    @pytest.mark.parametrize(
+        "accept, media_type",
+        [
+            (None, JSON_MEDIA_TYPE),
+            ("*/*", JSON_MEDIA_TYPE),
+            (ARROW_MEDIA_TYPE, ARROW_MEDIA_TYPE),
+            (f"{JSON_MEDIA_TYPE};q=0.5, {PARQUET_MEDIA_TYPE}", PARQUET_MEDIA_TYPE),
+            (f"{PARQUET_MEDIA_TYPE};q=0.5, {JSON_MEDIA_TYPE}", JSON_MEDIA_TYPE),
+            (f"{PARQUET_MEDIA_TYPE}, {ARROW_MEDIA_TYPE}", PARQUET_MEDIA_TYPE),
+            (f"{ARROW_MEDIA_TYPE};q=0, */*", JSON_MEDIA_TYPE),
+            (f"{ARROW_MEDIA_TYPE};q=invalid", JSON_MEDIA_TYPE),
+            # Media types the route does not support are ignored
+            (NPY_MEDIA_TYPE, JSON_MEDIA_TYPE),
+            ("text/csv, application/vnd.apache.parquet;q=0.1", PARQUET_MEDIA_TYPE),
+        ],
+    )
+    def test_selects_media_type(self, accept, media_type):
+        assert negotiate_media_type(accept, TABLE_MEDIA_TYPES) == media_type
+
+
+class TestColumnarResponses:
+    @pytest.mark.parametrize("media_type", TABLE_MEDIA_TYPES)
+    def test_property_batch_matches_json(self, client, media_type):
+        body = {**QUERY, "points": POINTS}
+        response = client.post(
+            "/property/batch", json=body, headers={"Accept": media_type}
+        )
+        assert response.headers["content-type"] == media_type
+        table = read_table(response).to_pylist()
+
+        features = client.post("/property/batch", json=body).json()["features"]
+        expected = [
+            {
+                "point_id": point_id,
+                "lon": lon,
+                "lat": lat,
+                "property": layer["code"],
+                "depth": depth["label"],
+                "value_type": value_type,
+                "value": value,
+            }
+            for point_id, ((lon, lat), feature) in enumerate(zip(POINTS, features))
+            for layer in feature["properties"]["layers"]
+            for depth in layer["depths"]
+            for value_type, value in depth["values"].items()
+        ]
+        assert sorted(table, key=row_key) == sorted(expected, key=row_key)
+
+    @pytest.mark.parametrize("media_type", TABLE_MEDIA_TYPES)
+    def test_soil_type_summary_matches_json(self, client, media_type):
+        params = {"min_lon": 9.0, "min_lat": 59.0, "max_lon": 9.5, "max_lat": 59.5}
+        response = client.get(
+            "/type/summary", params=params, headers={"Accept": media_type}
+        )
+        table = read_table(response).to_pydict()
+        properties = client.get("/type/summary", params=params).json()["properties"]
+        assert table["count"] == [s["count"] for s in properties["summaries"]]
+        assert set(table["resolution"]) == {properties["resolution"]}
+
+    def test_grid_npy_matches_json(self, client):
+        response = client.get(
+            "/property/grid", params=GRID_PARAMS, headers={"Accept": NPY_MEDIA_TYPE}
+        )
+        assert response.headers["content-type"] == NPY_MEDIA_TYPE
+        array = np.load(io.BytesIO(response.content), allow_pickle=False)
+        layers = response.headers["X-Soil-Layers"].split(",")
+        assert layers == [
+            "clay/0-5cm/mean",
+            "clay/0-5cm/Q0.5",
+            "ocs/0-30cm/mean",
+            "ocs/0-30cm/Q0.5",
+        ]
+
+        properties = client.get("/property/grid", params=GRID_PARAMS).json()
+        grids = {
+            f"{layer['code']}/{depth['label']}/{value_type}": grid
+            for layer in properties["properties"]["layers"]
+            for depth in layer["depths"]
+            for value_type, grid in depth["values"].items()
+        }
+        assert array.shape == (4, 6, 6)
+        for layer, grid in zip(layers, array):
+            # The arrays hold the no data values that are null in JSON
+            expected = np.array(grids[layer], dtype=float)
+            np.testing.assert_array_equal(
+                grid, np.where(np.isnan(expected), -32768, expected)
+            )
+
+    def test_unsupported_media_type_falls_back_to_json(self, client):
+        response = client.get(
+            "/property/grid", params=GRID_PARAMS, headers={"Accept": "text/csv"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == JSON_MEDIA_TYPE
+        assert NPY_MEDIA_TYPE in GRID_MEDIA_TYPES
@@ -0,0 +1,114 @@
+import threading
+from unittest import mock
+
+import numpy as np
+import pytest
+import rasterio
+
+from soil_api.utils.dataset_pool import DatasetPool
+
+
+@pytest.fixture
+def raster_paths(tmp_path):
+    raster_paths = []
+    for name in ["a", "b", "c"]:
+        raster_path = str(tmp_path / f"{name}.tif")
+        with rasterio.open(
+            raster_path,
+            "w",
+            driver="GTiff",
+            width=4,
+            height=4,
+            count=1,
+            dtype="int16",
+        ) as dst:
+            dst.write(np.zeros((4, 4), dtype=np.int16), 1)
+        raster_paths.append(raster_path)
+    return raster_paths
+
+
+def run_on_thread(func):
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+class TestDatasetPool:
+    def test_handles_are_reused(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+        src = pool.get(raster_paths[0])
+        assert pool.get(raster_paths[0]) is src
+        pool.close()
+        assert src.closed
+
+    def test_least_recently_used_handles_are_evicted(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+        a, b = pool.get(raster_paths[0]), pool.get(raster_paths[1])
+        pool.get(raster_paths[0])
+        pool.get(raster_paths[2])
+        assert b.closed and not a.closed
+        assert pool.size() == 2
+        pool.close()
+
+    def test_idle_handles_of_other_threads_are_closed(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+        opened = []
+        run_on_thread(lambda: opened.append(pool.get(raster_paths[0])))
+        assert pool.size() == 1
+
+        # The thread has exited, so only a sweep from another thread closes it
+        with mock.patch("time.monotonic", return_value=pool._last_sweep + 1000):
+            src = pool.get(raster_paths[1])
+        assert opened[0].closed
+        assert not src.closed
+        assert pool.size() == 1
+        pool.close()
+
+    def test_handles_in_use_are_not_swept(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+        in_use = threading.Event()
+        done = threading.Event()
+
+        def use_handle(src):
+            in_use.set()
+            done.wait()
+            return src.closed
+
+        closed = []
+        thread = threading.Thread(
+            target=lambda: closed.append(pool.run(raster_paths[0], use_handle))
+        )
+        thread.start()
+        in_use.wait()
+        with mock.patch("time.monotonic", return_value=pool._last_sweep + 1000):
+            pool.sweep()
+        done.set()
+        thread.join()
+        assert closed == [False]
+        pool.close()
+
+    def test_failed_reused_handle_is_reopened(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+        first = pool.get(raster_paths[0])
+        calls = []
+
+        def read(src):
+            calls.append(src)
+            if len(calls) == 1:
+                raise rasterio.errors.RasterioIOError("Connection reset")
+            return src.read(1).sum()
+
+        assert pool.run(raster_paths[0], read) == 0
+        assert calls[0] is first and first.closed
+        assert calls[1] is not first and not calls[1].closed
+        pool.close()
+
+    def test_failed_new_handle_raises(self, raster_paths):
+        pool = DatasetPool(max_size=2, idle_timeout=600.0)
+
+        def read(src):
+            raise rasterio.errors.RasterioIOError("Connection reset")
+
+        with pytest.raises(rasterio.errors.RasterioIOError):
+            pool.run(raster_paths[0], read)
+        assert pool.size() == 0
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from pydantic import BaseModel
+
+from soil_api.utils.columnar_response import NDJSON_MEDIA_TYPE
+from soil_api.utils.ndjson_response import ndjson_response
+
+POINTS = [[9.5, 59.5], [10.25, 60.75], [9.05, 60.95], [20.0, 50.0], [10.0, 60.0]]
+QUERY = {"properties": ["clay", "ocs"], "depths": ["0-5cm"], "values": ["mean"]}
+
+
+class Item(BaseModel):
+    index: int
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestNdjsonResponse:
+    def test_items_are_streamed_in_order(self):
+        async def extract_features(chunk):
+            return [Item(index=index) for index in range(chunk.start, chunk.stop)]
+
+        async def stream():
+            response = ndjson_response(extract_features, 10, chunk_size=3)
+            return [line async for line in response.body_iterator]
+
+        lines = asyncio.run(stream())
+        assert len(lines) == 4
+        assert [json.loads(item) for line in lines for item in line.splitlines()] == [
+            {"index": index} for index in range(10)
+        ]
+
+    def test_disconnect_cancels_extraction(self):
+        started, cancelled = [], []
+
+        async def extract_features(chunk):
+            started.append(chunk.start)
+            if chunk.start > 0:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(chunk.start)
+                    raise
+            return [Item(index=chunk.start)]
+
+        async def stream():
+            response = ndjson_response(extract_features, 10, chunk_size=1)
+            lines = response.body_iterator
+            await lines.__anext__()
+            # The next chunk is extracted while the first one is sent
+            await asyncio.sleep(0)
+            # Closing the stream like a disconnected client stops extracting
+            await lines.aclose()
+            await asyncio.sleep(0)
+
+        asyncio.run(stream())
+        assert started == [0, 1]
+        assert cancelled == [1]
+
+
+class TestNdjsonRoutes:
+    def test_property_batch_matches_json(self, client):
+        body = {**QUERY, "points": POINTS}
+        response = client.post(
+            "/property/batch", json=body, headers={"Accept": NDJSON_MEDIA_TYPE}
+        )
+        assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+        expected = client.post("/property/batch", json=body).json()["features"]
+        assert read_lines(response) == expected
+
+    def test_soil_type_batch_matches_json(self, client):
+        body = {"points": POINTS, "top_k": 2}
+        response = client.post(
+            "/type/batch", json=body, headers={"Accept": NDJSON_MEDIA_TYPE}
+        )
+        expected = client.post("/type/batch", json=body).json()["features"]
+        assert read_lines(response) == expected
+
+    def test_grid_matches_single_point_queries(self, client):
+        params = {
+            **QUERY,
+            "min_lon": 9.5,
+            "min_lat": 59.5,
+            "max_lon": 9.8,
+            "max_lat": 59.7,
+            "step": 0.1,
+        }
+        response = client.get(
+            "/property/grid", params=params, headers={"Accept": NDJSON_MEDIA_TYPE}
+        )
+        features = read_lines(response)
+        # One feature per node, row by row from north to south
+        assert [feature["geometry"]["coordinates"] for feature in features] == [
+            [lon, lat] for lat in [59.7, 59.6, 59.5] for lon in [9.5, 9.6, 9.7, 9.8]
+        ]
+        for feature in features:
+            lon, lat = feature["geometry"]["coordinates"]
+            expected = client.get("/property", params={**QUERY, "lon": lon, "lat": lat})
+            assert feature == expected.json()
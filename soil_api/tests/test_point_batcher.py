@@ -0,0 +1,142 @@
+import asyncio
+import time
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from soil_api.config import settings
+from soil_api.tests.conftest import PROPERTY_SOIL_MAPS, PROPERTY_TRANSFORM, clear_caches
+from soil_api.utils import point_batcher, point_extraction
+from soil_api.utils.point_batcher import PointBatcher
+
+
+class FakeSampler:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, raster_path, ys, xs):
+        self.calls.append((raster_path, ys.tolist(), xs.tolist()))
+        return np.array([int(y * 10 + x) for y, x in zip(ys, xs)])
+
+
+class TestPointBatcher:
+    def test_concurrent_reads_are_merged_per_raster(self):
+        sample = FakeSampler()
+        batcher = PointBatcher(sample, window=0.01, max_points=100)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.sample_rasters(["a", "b"], 1, 2),
+                batcher.sample_rasters(["b"], 3, 4),
+                batcher.sample_rasters(["a", "b"], 5, 6),
+            )
+
+        assert asyncio.run(run()) == [[12, 12], [34], [56, 56]]
+        assert sorted(sample.calls) == [
+            ("a", [1, 5], [2, 6]),
+            ("b", [1, 3, 5], [2, 4, 6]),
+        ]
+
+    def test_max_points_triggers_a_read_before_the_window_ends(self):
+        sample = FakeSampler()
+        batcher = PointBatcher(sample, window=10, max_points=2)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.sample_rasters(["a"], 1, 2),
+                batcher.sample_rasters(["a"], 3, 4),
+            )
+
+        started = time.monotonic()
+        assert asyncio.run(run()) == [[12], [34]]
+        assert time.monotonic() - started < 1
+        assert len(sample.calls) == 1
+
+    def test_rasters_are_fused_into_jobs(self, monkeypatch):
+        monkeypatch.setattr(settings, "raster_fused_job_size", 2)
+        sample = FakeSampler()
+        batcher = PointBatcher(sample, window=0.01, max_points=100)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.sample_rasters(["a", "b", "c"], 1, 2),
+                batcher.sample_rasters(["c"], 3, 4),
+            )
+
+        with mock.patch.object(
+            point_batcher.raster_executor,
+            "run",
+            wraps=point_batcher.raster_executor.run,
+        ) as run_job:
+            values = asyncio.run(run())
+        assert values == [[12, 12, 12], [34]]
+        # The values are numpy scalars, like the values of unbatched reads
+        assert all(isinstance(value, np.integer) for value in values[0])
+        assert run_job.call_count == 2
+        assert sorted(sample.calls) == [
+            ("a", [1], [2]),
+            ("b", [1], [2]),
+            ("c", [1, 3], [2, 4]),
+        ]
+
+    def test_errors_are_raised_in_every_request(self):
+        def sample(raster_path, ys, xs):
+            raise ValueError("read failed")
+
+        batcher = PointBatcher(sample, window=0.01, max_points=100)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.sample_rasters(["a"], 1, 2),
+                batcher.sample_rasters(["a"], 3, 4),
+                return_exceptions=True,
+            )
+
+        assert [type(error) for error in asyncio.run(run())] == [ValueError] * 2
+
+
+class TestBatchedPointExtraction:
+    def test_values_match_unbatched_reads(self, soil_maps_dir, monkeypatch):
+        raster_paths = [
+            str(soil_maps_dir / soil_map / fname)
+            for soil_map, fname in PROPERTY_SOIL_MAPS[:3]
+        ]
+        # Points in different pixels of the same blocks and of other blocks
+        points = [
+            PROPERTY_TRANSFORM * (col + 0.5, row + 0.5)
+            for row, col in [(50, 70), (51, 70), (50, 75), (120, 10), (199, 199)]
+        ]
+
+        async def extract():
+            return await asyncio.gather(
+                *(
+                    point_extraction.extract_point_from_rasters(raster_paths, y, x)
+                    for x, y in points
+                )
+            )
+
+        clear_caches()
+        expected = asyncio.run(extract())
+        clear_caches()
+
+        calls = []
+        sample_raster_at_points = point_extraction.sample_raster_at_points
+
+        def counting_sample(raster_path, ys, xs):
+            calls.append(raster_path)
+            return sample_raster_at_points(raster_path, ys, xs)
+
+        monkeypatch.setattr(
+            point_extraction,
+            "point_batcher",
+            PointBatcher(counting_sample, window=0.01, max_points=1024),
+        )
+        assert asyncio.run(extract()) == expected
+        # Every raster is sampled once for all of the points
+        assert sorted(calls) == sorted(raster_paths)
+        clear_caches()
+
+    @pytest.mark.parametrize("window", [0, -1])
+    def test_disabled(self, window):
+        assert not PointBatcher(FakeSampler(), window=window, max_points=1).enabled
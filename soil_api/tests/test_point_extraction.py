@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pytest
+import rasterio
+from fastapi import HTTPException
+from rasterio.crs import CRS
+from rasterio.warp import transform
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.tests.conftest import PROPERTY_SOIL_MAPS, PROPERTY_TRANSFORM, clear_caches
+from soil_api.utils.point_extraction import (
+    extract_point_from_rasters,
+    transform_coordinates_to_homolosine_crs_array,
+    transfrom_coordinates_to_homolosine_crs,
+)
+
+# The center of the pixel in row 50 and column 70 of the soil property maps
+X, Y = PROPERTY_TRANSFORM * (70.5, 50.5)
+
+
+def read_pixel(raster_path, x, y):
+    with rasterio.open(raster_path) as src:
+        return next(src.sample([(x, y)]))[0]
+
+
+@pytest.fixture
+def raster_paths(soil_maps_dir):
+    clear_caches()
+    yield [
+        str(soil_maps_dir / soil_map / fname) for soil_map, fname in PROPERTY_SOIL_MAPS
+    ]
+    clear_caches()
+
+
+class TestExtractPointFromRasters:
+    def test_values_match_direct_reads(self, raster_paths, monkeypatch):
+        # Split the rasters into several fused jobs
+        monkeypatch.setattr(settings, "raster_fused_job_size", 3)
+        paths = [raster_paths[0], None, *raster_paths[1:]]
+        values = asyncio.run(extract_point_from_rasters(paths, Y, X))
+        assert values[1] == constants.NO_DATA_VAL
+        assert values[:1] + values[2:] == [
+            read_pixel(path, X, Y) for path in raster_paths
+        ]
+
+    def test_duplicate_rasters_are_read_once(self, raster_paths):
+        paths = [raster_paths[0], raster_paths[0]]
+        values = asyncio.run(extract_point_from_rasters(paths, Y, X))
+        assert values == [read_pixel(raster_paths[0], X, Y)] * 2
+
+    def test_missing_raster(self, raster_paths, tmp_path):
+        paths = [raster_paths[0], str(tmp_path / "missing.vrt")]
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(extract_point_from_rasters(paths, Y, X))
+        assert exc_info.value.status_code == 404
+
+
+class TestHomolosineTransform:
+    def test_array_transform_matches_point_transforms(self):
+        latitudes = np.array([[59.0, 60.5], [-33.9, 0.0]])
+        longitudes = np.array([[10.0, 9.25], [18.4, -70.0]])
+        ys, xs = transform_coordinates_to_homolosine_crs_array(latitudes, longitudes)
+        assert ys.shape == xs.shape == (4,)
+        for lat, lon, y, x in zip(latitudes.ravel(), longitudes.ravel(), ys, xs):
+            expected_xs, expected_ys = transform(
+                CRS.from_epsg(4326),
+                CRS.from_wkt(constants.HOMOLOSINE_CRS_WKT),
+                [lon],
+                [lat],
+            )
+            assert (y, x) == pytest.approx((expected_ys[0], expected_xs[0]))
+            assert transfrom_coordinates_to_homolosine_crs(lat, lon) == (y, x)
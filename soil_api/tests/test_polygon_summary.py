@@ -0,0 +1,91 @@
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+
+from soil_api import constants
+from soil_api.models.soil_type import soil_type_dict
+from soil_api.tests.conftest import clear_caches
+from soil_api.utils.bbox_extraction import count_classes_in_bbox
+
+TRIANGLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[9.213, 59.321], [10.876, 59.654], [9.987, 60.789], [9.213, 59.321]]
+    ],
+}
+# A triangle with a hole, and a second polygon that spans several blocks
+MULTI_POLYGON = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [
+            TRIANGLE["coordinates"][0],
+            [[9.9, 59.9], [10.1, 59.9], [10.0, 60.1], [9.9, 59.9]],
+        ],
+        [[[10.5, 60.5], [10.9, 60.5], [10.9, 60.9], [10.5, 60.5]]],
+    ],
+}
+
+
+def direct_counts(raster_path, geometry):
+    with rasterio.open(raster_path) as src:
+        codes = src.read(1)
+        inside = geometry_mask(
+            [geometry], out_shape=codes.shape, transform=src.transform, invert=True
+        )
+    values, counts = np.unique(codes[inside], return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+class TestPolygonSummary:
+    def test_counts_match_direct_mask(self, soil_maps_dir):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        clear_caches()
+        for geometry in [TRIANGLE, MULTI_POLYGON]:
+            counts, _ = count_classes_in_bbox(
+                raster_path, [9.2, 59.3, 10.9, 60.9], geometry=geometry
+            )
+            assert counts == direct_counts(raster_path, geometry)
+        clear_caches()
+
+    def test_rectangle_matches_bbox_summary(self, client):
+        min_lon, min_lat, max_lon, max_lat = 9.5, 59.5, 10.25, 60.75
+        rectangle = {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [min_lon, min_lat],
+                    [max_lon, min_lat],
+                    [max_lon, max_lat],
+                    [min_lon, max_lat],
+                    [min_lon, min_lat],
+                ]
+            ],
+        }
+        response = client.post("/type/summary", json=rectangle)
+        assert response.status_code == 200
+        expected = client.get(
+            "/type/summary",
+            params={
+                "min_lon": min_lon,
+                "min_lat": min_lat,
+                "max_lon": max_lon,
+                "max_lat": max_lat,
+            },
+        )
+        assert response.json()["properties"] == expected.json()["properties"]
+        assert response.json()["geometry"] == rectangle
+
+    def test_route_counts_match_direct_mask(self, client, soil_maps_dir):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        response = client.post("/type/summary", json=TRIANGLE)
+        summaries = response.json()["properties"]["summaries"]
+        assert {summary["soil_type"]: summary["count"] for summary in summaries} == {
+            soil_type_dict[code].value: count
+            for code, count in direct_counts(raster_path, TRIANGLE).items()
+        }
+
+    def test_invalid_geometry(self, client):
+        response = client.post(
+            "/type/summary", json={"type": "Point", "coordinates": [[[9.5, 60.0]]]}
+        )
+        assert response.status_code == 422
@@ -0,0 +1,55 @@
+import pytest
+
+from soil_api.config import settings
+
+QUERY = {
+    "properties": ["clay", "sand", "ocs"],
+    "depths": ["0-5cm", "5-15cm", "0-30cm"],
+    "values": ["mean", "Q0.5"],
+}
+
+
+class TestSoilPropertyGrid:
+    def test_values_match_single_point_queries(self, client):
+        # The grid extends beyond the soil maps in the east
+        bbox = {"min_lon": 9.03, "min_lat": 59.11, "max_lon": 11.3, "max_lat": 60.95}
+        response = client.get("/property/grid", params={**QUERY, **bbox, "step": 0.17})
+        assert response.status_code == 200
+        properties = response.json()["properties"]
+        lons, lats = properties["lons"], properties["lats"]
+        assert lons[0] == bbox["min_lon"] and lats[0] == bbox["max_lat"]
+        assert len(lons) == 14 and len(lats) == 11
+
+        for i, lat in enumerate(lats):
+            for j, lon in enumerate(lons):
+                expected = client.get(
+                    "/property", params={**QUERY, "lon": lon, "lat": lat}
+                ).json()["properties"]["layers"]
+                assert [
+                    {
+                        **layer,
+                        "depths": [
+                            {
+                                **depth,
+                                "values": {
+                                    value_type: grid[i][j]
+                                    for value_type, grid in depth["values"].items()
+                                },
+                            }
+                            for depth in layer["depths"]
+                        ],
+                    }
+                    for layer in properties["layers"]
+                ] == expected
+
+    def test_too_many_nodes(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "grid_max_points", 10)
+        bbox = {"min_lon": 9.0, "min_lat": 59.0, "max_lon": 10.0, "max_lat": 60.0}
+        response = client.get("/property/grid", params={**QUERY, **bbox, "step": 0.1})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("step", [0, -0.1])
+    def test_invalid_step(self, client, step):
+        bbox = {"min_lon": 9.0, "min_lat": 59.0, "max_lon": 10.0, "max_lat": 60.0}
+        response = client.get("/property/grid", params={**QUERY, **bbox, "step": step})
+        assert response.status_code == 422
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.features import geometry_mask
+
+from soil_api.tests.conftest import PROPERTY_SOIL_MAPS
+from soil_api.utils.bbox_extraction import histogram_statistics, value_statistics
+from soil_api.utils.point_extraction import transform_geometry_to_homolosine_crs
+
+PERCENTILES = [0, 5, 33.3, 50, 95, 100]
+TRIANGLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[9.213, 59.321], [10.876, 59.654], [9.987, 60.789], [9.213, 59.321]]
+    ],
+}
+
+
+def direct_statistics(raster_path, geometry):
+    with rasterio.open(raster_path) as src:
+        values = src.read(1)
+        inside = geometry_mask(
+            [transform_geometry_to_homolosine_crs(geometry)],
+            out_shape=values.shape,
+            transform=src.transform,
+            invert=True,
+        )
+        values = values[inside & (values != src.nodata)]
+    return {
+        "count": values.size,
+        "mean": values.mean(),
+        "min": values.min(),
+        "max": values.max(),
+        "std": values.std(),
+        "percentiles": np.percentile(values, PERCENTILES),
+    }
+
+
+class TestHistogramStatistics:
+    @pytest.mark.parametrize("dtype", [np.uint8, np.int16])
+    def test_matches_numpy(self, dtype):
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 100, 1001).astype(dtype)
+        offset = -int(np.iinfo(dtype).min)
+        histogram = np.bincount(
+            values.astype(np.int64) + offset, minlength=2 ** (8 * values.itemsize)
+        )
+        statistics = histogram_statistics(histogram, offset, PERCENTILES)
+        expected = value_statistics(values, PERCENTILES)
+        assert statistics.keys() == expected.keys()
+        for key in ["count", "min", "max"]:
+            assert statistics[key] == expected[key]
+        for key in ["mean", "std"]:
+            assert statistics[key] == pytest.approx(expected[key])
+        np.testing.assert_allclose(
+            [value for _, value in statistics["percentiles"]],
+            np.percentile(values, PERCENTILES),
+        )
+
+    def test_empty_histogram(self):
+        assert histogram_statistics(np.zeros(256), 0, PERCENTILES) == {"count": 0}
+
+
+class TestPropertySummary:
+    def test_polygon_statistics_match_numpy(self, client, soil_maps_dir):
+        response = client.post(
+            "/property/summary",
+            params={
+                "properties": ["clay", "sand"],
+                "depths": ["0-5cm", "5-15cm"],
+                "values": ["mean", "Q0.5"],
+                "percentiles": PERCENTILES,
+            },
+            json=TRIANGLE,
+        )
+        assert response.status_code == 200
+        layers = response.json()["properties"]["layers"]
+        assert len(layers) == 2
+        for layer in layers:
+            for depth in layer["depths"]:
+                for value_type, statistics in depth["values"].items():
+                    fname = f"{layer['code']}_{depth['label']}_{value_type}.vrt"
+                    assert (layer["code"], fname) in PROPERTY_SOIL_MAPS
+                    expected = direct_statistics(
+                        str(soil_maps_dir / layer["code"] / fname), TRIANGLE
+                    )
+                    percentiles = statistics.pop("percentiles")
+                    assert [p["percentile"] for p in percentiles] == PERCENTILES
+                    np.testing.assert_allclose(
+                        [p["value"] for p in percentiles],
+                        expected.pop("percentiles"),
+                    )
+                    assert statistics == pytest.approx(expected)
+
+    def test_bbox_matches_rectangle_polygon(self, client):
+        min_lon, min_lat, max_lon, max_lat = 9.5, 59.5, 10.25, 60.75
+        rectangle = {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [min_lon, min_lat],
+                    [max_lon, min_lat],
+                    [max_lon, max_lat],
+                    [min_lon, max_lat],
+                    [min_lon, min_lat],
+                ]
+            ],
+        }
+        query = {"properties": ["ocs"], "depths": ["0-30cm"], "values": ["mean"]}
+        response = client.get(
+            "/property/summary",
+            params={
+                **query,
+                "min_lon": min_lon,
+                "min_lat": min_lat,
+                "max_lon": max_lon,
+                "max_lat": max_lat,
+            },
+        )
+        expected = client.post("/property/summary", params=query, json=rectangle)
+        assert response.status_code == 200
+        assert response.json()["properties"] == expected.json()["properties"]
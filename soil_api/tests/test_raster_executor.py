@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from soil_api.utils.raster_executor import QUEUE_DEPTH, RasterExecutor
+
+
+def blocking_job(release: threading.Event) -> str:
+    release.wait()
+    return threading.current_thread().name
+
+
+class TestRasterExecutor:
+    def test_runs_on_worker_threads(self):
+        executor = RasterExecutor(max_workers=2, max_queue_size=0, queue_timeout=1.0)
+        thread = asyncio.run(executor.run(threading.current_thread))
+        assert thread.name.startswith("raster-io")
+        executor.shutdown()
+
+    def test_saturated_executor_rejects_after_queue_timeout(self):
+        executor = RasterExecutor(max_workers=1, max_queue_size=1, queue_timeout=0.1)
+        release = threading.Event()
+
+        async def run_jobs():
+            jobs = [
+                asyncio.ensure_future(executor.run(blocking_job, release))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0.01)
+            assert executor.admitted == 2
+            started = time.monotonic()
+            with pytest.raises(HTTPException) as exc_info:
+                await executor.run(blocking_job, release)
+            assert exc_info.value.status_code == 503
+            assert time.monotonic() - started >= 0.1
+            release.set()
+            await asyncio.gather(*jobs)
+            assert executor.admitted == 0
+
+        asyncio.run(run_jobs())
+        executor.shutdown()
+
+    def test_waiting_job_is_admitted_when_a_slot_frees_up(self):
+        executor = RasterExecutor(max_workers=1, max_queue_size=0, queue_timeout=5.0)
+        release = threading.Event()
+
+        async def run_jobs():
+            first = asyncio.ensure_future(executor.run(blocking_job, release))
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(executor.run(time.monotonic))
+            await asyncio.sleep(0.05)
+            assert not second.done()
+            release.set()
+            await asyncio.gather(first, second)
+
+        asyncio.run(run_jobs())
+        executor.shutdown()
+
+    def test_zero_queue_timeout_rejects_immediately(self):
+        executor = RasterExecutor(max_workers=1, max_queue_size=0, queue_timeout=0)
+        release = threading.Event()
+
+        async def run_jobs():
+            job = asyncio.ensure_future(executor.run(blocking_job, release))
+            await asyncio.sleep(0.01)
+            with pytest.raises(HTTPException):
+                await executor.run(blocking_job, release)
+            release.set()
+            await job
+
+        asyncio.run(run_jobs())
+        executor.shutdown()
+
+    def test_cancelled_jobs_release_their_slot_when_done(self):
+        executor = RasterExecutor(max_workers=1, max_queue_size=1, queue_timeout=0)
+        release = threading.Event()
+        queue_depth = QUEUE_DEPTH._value.get()
+
+        async def run_jobs():
+            running = asyncio.ensure_future(executor.run(blocking_job, release))
+            await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(executor.run(blocking_job, release))
+            await asyncio.sleep(0.01)
+            assert QUEUE_DEPTH._value.get() == queue_depth + 1
+
+            # The queued job is dropped and frees its slot
+            queued.cancel()
+            await asyncio.sleep(0.01)
+            assert QUEUE_DEPTH._value.get() == queue_depth
+            assert executor.admitted == 1
+
+            # The running job keeps its slot until it finishes
+            running.cancel()
+            await asyncio.sleep(0.01)
+            assert executor.admitted == 1
+            queued = asyncio.ensure_future(executor.run(blocking_job, release))
+            await asyncio.sleep(0.01)
+            with pytest.raises(HTTPException):
+                await executor.run(blocking_job, release)
+            release.set()
+            await queued
+            await asyncio.sleep(0.01)
+            assert executor.admitted == 0
+            assert QUEUE_DEPTH._value.get() == queue_depth
+
+        try:
+            asyncio.run(run_jobs())
+        finally:
+            release.set()
+            executor.shutdown()
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+import rasterio
+
+from soil_api.utils.block_cache import block_cache, sample_points
+from soil_api.utils.raster_manifest import (
+    RasterInfo,
+    RasterManifest,
+    build_raster_manifest,
+)
+from soil_api.utils.raster_source import LocalRasterSource
+
+VRT = """<VRTDataset rasterXSize="100" rasterYSize="80">
+  <SRS>EPSG:4326</SRS>
+  <GeoTransform>10, 0.01, 0, 60, 0, -0.01</GeoTransform>
+  <VRTRasterBand dataType="Int16" band="1" blockXSize="32" blockYSize="32">
+    <NoDataValue>-32768</NoDataValue>
+    <SimpleSource>
+      <SourceFilename relativeToVRT="1">a.tif</SourceFilename>
+      <SourceBand>1</SourceBand>
+      <SrcRect xOff="5" yOff="0" xSize="40" ySize="30" />
+      <DstRect xOff="10" yOff="20" xSize="40" ySize="30" />
+    </SimpleSource>
+    <ComplexSource>
+      <SourceFilename relativeToVRT="1">b.tif</SourceFilename>
+      <SourceBand>1</SourceBand>
+      <NODATA>-32768</NODATA>
+      <SrcRect xOff="0" yOff="0" xSize="30" ySize="30" />
+      <DstRect xOff="35" yOff="40" xSize="30" ySize="30" />
+    </ComplexSource>
+  </VRTRasterBand>
+</VRTDataset>
+"""
+
+
+@pytest.fixture
+def soil_map_dir(tmp_path):
+    soil_map_dir = tmp_path / "wrb"
+    soil_map_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for fname in ["a.tif", "b.tif"]:
+        values = rng.integers(0, 1000, (30, 50), dtype=np.int16)
+        # Pixels of b.tif that are no data show a.tif through
+        values[rng.random(values.shape) < 0.3] = -32768
+        with rasterio.open(
+            soil_map_dir / fname,
+            "w",
+            driver="GTiff",
+            width=50,
+            height=30,
+            count=1,
+            dtype="int16",
+            nodata=-32768,
+        ) as dst:
+            dst.write(values, 1)
+    (soil_map_dir / "MostProbable.vrt").write_text(VRT)
+    return soil_map_dir
+
+
+class TestRasterManifest:
+    def test_manifest_round_trip(self, soil_map_dir, tmp_path):
+        manifest_path = tmp_path / "manifest.npz"
+        build_raster_manifest(
+            [("wrb", "MostProbable.vrt"), ("wrb", "missing.vrt")],
+            str(manifest_path),
+            LocalRasterSource(str(tmp_path)),
+        )
+        manifest = RasterManifest.load(str(manifest_path))
+        raster_path = str(soil_map_dir / "MostProbable.vrt")
+        assert manifest.get(str(soil_map_dir / "missing.vrt")) is None
+
+        raster_info = manifest.get(raster_path)
+        with rasterio.open(raster_path) as src:
+            assert raster_info.transform == src.transform
+            assert (raster_info.height, raster_info.width) == src.shape
+            assert raster_info.block_shapes == src.block_shapes
+            assert raster_info.dtypes == list(src.dtypes)
+            assert raster_info.nodata == src.nodata
+            assert raster_info.crs == src.crs
+        assert raster_info.source_paths == [
+            str(soil_map_dir / "a.tif"),
+            str(soil_map_dir / "b.tif"),
+        ]
+        np.testing.assert_array_equal(
+            raster_info.source_rects,
+            [[1, 5, 0, 10, 20, 40, 30, 0], [1, 0, 0, 35, 40, 30, 30, 1]],
+        )
+
+    def test_sampling_matches_gdal(self, soil_map_dir):
+        raster_path = str(soil_map_dir / "MostProbable.vrt")
+        with rasterio.open(raster_path) as src:
+            raster_info = RasterInfo.from_dataset(raster_path, src)
+            expected = src.read(1)
+        block_cache.clear()
+
+        rows, cols = np.mgrid[0:80, 0:100]
+        xs, ys = raster_info.transform * (cols.ravel() + 0.5, rows.ravel() + 0.5)
+        values = sample_points(
+            raster_info, raster_path, xs, ys, read=raster_info.read_block
+        )
+        block_cache.clear()
+        np.testing.assert_array_equal(values.reshape(80, 100), expected)
+
+    def test_unsupported_sources_read_through_gdal(self, soil_map_dir):
+        raster_path = str(soil_map_dir / "MostProbable.vrt")
+        (soil_map_dir / "MostProbable.vrt").write_text(
+            VRT.replace(
+                '<DstRect xOff="35" yOff="40" xSize="30" ySize="30" />',
+                '<DstRect xOff="35" yOff="40" xSize="60" ySize="40" />',
+            )
+        )
+        with rasterio.open(raster_path) as src:
+            assert RasterInfo.from_dataset(raster_path, src).source_paths is None
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
+from soil_api.utils.raster_source import (
+    LocalRasterSource,
+    MirrorRasterSource,
+    RasterSource,
+    RemoteRasterSource,
+    create_raster_source,
+    list_soil_maps,
+    property_soil_map_fname,
+)
+from soil_api.utils.raster_sync import sync_region
+
+SOIL_MAP = ("clay", "clay_0-5cm_mean.vrt")
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    # A 1 degree soil map of 0.01 degree pixels over 10-11E, 59-60N
+    soil_map_dir = tmp_path / "source" / SOIL_MAP[0]
+    soil_map_dir.mkdir(parents=True)
+    values = np.arange(100 * 100, dtype=np.int16).reshape(100, 100)
+    with rasterio.open(
+        soil_map_dir / SOIL_MAP[1],
+        "w",
+        driver="GTiff",
+        width=100,
+        height=100,
+        count=1,
+        dtype="int16",
+        crs="EPSG:4326",
+        transform=from_origin(10, 60, 0.01, 0.01),
+        nodata=-32768,
+        tiled=True,
+        blockxsize=128,
+        blockysize=128,
+    ) as dst:
+        dst.write(values, 1)
+    return tmp_path / "source"
+
+
+class TestRasterSource:
+    def test_property_soil_map_fname(self):
+        assert (
+            property_soil_map_fname(
+                SoilPropertiesCodes.clay,
+                SoilDepthLabels.depth_0_5,
+                SoilPropertyValueTypes.mean,
+            )
+            == "clay_0-5cm_mean.vrt"
+        )
+        assert (
+            property_soil_map_fname(
+                SoilPropertiesCodes.ocs,
+                SoilDepthLabels.depth_0_5,
+                SoilPropertyValueTypes.mean,
+            )
+            is None
+        )
+        assert (
+            property_soil_map_fname(
+                SoilPropertiesCodes.clay,
+                SoilDepthLabels.depth_0_30,
+                SoilPropertyValueTypes.mean,
+            )
+            is None
+        )
+
+    def test_list_soil_maps(self):
+        soil_maps = list_soil_maps(
+            [SoilPropertiesCodes.clay, SoilPropertiesCodes.ocs],
+            [SoilDepthLabels.depth_0_5, SoilDepthLabels.depth_0_30],
+            [SoilPropertyValueTypes.mean],
+            soil_types=False,
+        )
+        assert soil_maps == [
+            ("clay", "clay_0-5cm_mean.vrt"),
+            ("ocs", "ocs_0-30cm_mean.vrt"),
+        ]
+        assert ("wrb", "MostProbable.vrt") in list_soil_maps([], [], [])
+
+    def test_create_raster_source(self, tmp_path):
+        assert isinstance(create_raster_source("remote", None), RemoteRasterSource)
+        assert isinstance(
+            create_raster_source("local", str(tmp_path)), LocalRasterSource
+        )
+        with pytest.raises(ValueError):
+            create_raster_source("mirror", None)
+        with pytest.raises(ValueError):
+            create_raster_source("ftp", str(tmp_path))
+
+    def test_raster_source_is_abstract(self):
+        with pytest.raises(TypeError):
+            RasterSource()
+
+    def test_mirror_falls_back_to_missing_soil_maps(self, source_dir, tmp_path):
+        source = MirrorRasterSource(str(source_dir), LocalRasterSource("/fallback"))
+        assert source.path(*SOIL_MAP) == str(source_dir / "clay" / SOIL_MAP[1])
+        assert source.path("sand", "sand_0-5cm_mean.vrt") == (
+            "/fallback/sand/sand_0-5cm_mean.vrt"
+        )
+
+
+class TestRasterSync:
+    def test_sync_region(self, source_dir, tmp_path):
+        mirror_dir = tmp_path / "mirror"
+        num_synced = sync_region(
+            [10.205, 59.505, 10.495, 59.695],
+            str(mirror_dir),
+            [SOIL_MAP],
+            LocalRasterSource(str(source_dir)),
+        )
+        assert num_synced == 1
+        assert (mirror_dir / "clay" / "clay_0-5cm_mean.tif").is_file()
+
+        with rasterio.open(source_dir / "clay" / SOIL_MAP[1]) as src, rasterio.open(
+            MirrorRasterSource(str(mirror_dir), RemoteRasterSource()).path(*SOIL_MAP)
+        ) as mirror:
+            assert mirror.driver == "VRT"
+            assert mirror.transform == src.transform
+            assert mirror.crs == src.crs
+            assert mirror.shape == src.shape
+            assert mirror.nodata == src.nodata
+            assert mirror.block_shapes == src.block_shapes
+            expected = src.read(1)
+            values = mirror.read(1)
+
+        # Rows 30-50 and columns 20-50 lie in the region
+        np.testing.assert_array_equal(values[30:50, 20:50], expected[30:50, 20:50])
+        outside = np.ones(values.shape, dtype=bool)
+        outside[30:50, 20:50] = False
+        assert (values[outside] == -32768).all()
+
+    def test_sync_region_outside_soil_map(self, source_dir, tmp_path):
+        num_synced = sync_region(
+            [20, 59.5, 21, 59.7],
+            str(tmp_path / "mirror"),
+            [SOIL_MAP],
+            LocalRasterSource(str(source_dir)),
+        )
+        assert num_synced == 0
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from soil_api.utils.readiness_probe import ReadinessProbe
+
+
+def passing_check():
+    return True, "Ok"
+
+
+def failing_check():
+    raise RuntimeError("Upstream is down")
+
+
+class TestReadinessProbe:
+    def test_results_are_cached(self):
+        calls = []
+
+        def counted_check():
+            calls.append(1)
+            return True, "Ok"
+
+        probe = ReadinessProbe([counted_check, failing_check], 30.0, 1.0)
+        cached_check = probe.cached(counted_check)
+        assert cached_check.__name__ == "counted_check"
+        assert cached_check() == (False, "Not probed yet")
+
+        asyncio.run(probe.probe_all())
+        assert cached_check() == (True, "Ok")
+        assert cached_check() == (True, "Ok")
+        assert probe.result("failing_check") == (False, "Upstream is down")
+        assert len(calls) == 1
+
+    def test_slow_checks_time_out_and_are_not_restarted(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_check():
+            calls.append(1)
+            release.wait()
+            return True, "Ok"
+
+        probe = ReadinessProbe([slow_check, passing_check], 30.0, 0.2)
+
+        async def probe_until_released():
+            await probe.probe_all()
+            assert probe.result("slow_check") == (
+                False,
+                "Timed out after 0.2 seconds",
+            )
+            assert probe.result("passing_check") == (True, "Ok")
+            await probe.probe_all()
+            release.set()
+            await probe.probe_all()
+
+        asyncio.run(probe_until_released())
+        assert probe.result("slow_check") == (True, "Ok")
+        assert len(calls) == 1
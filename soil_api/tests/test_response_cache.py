@@ -0,0 +1,70 @@
+from unittest import mock
+
+from soil_api.routes import soil_routes
+from soil_api.utils.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_hits_and_misses(self):
+        cache = ResponseCache("test", max_size=2, ttl=60.0)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResponseCache("test", max_size=2, ttl=60.0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    def test_entries_expire(self):
+        cache = ResponseCache("test", max_size=2, ttl=60.0)
+        with mock.patch("time.monotonic", return_value=0.0):
+            cache.set("a", 1)
+        with mock.patch("time.monotonic", return_value=61.0):
+            assert cache.get("a") is None
+
+    def test_zero_size_disables_the_cache(self):
+        cache = ResponseCache("test", max_size=0, ttl=60.0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+class TestCachedRoutes:
+    def test_soil_type_is_cached_per_pixel(self, client):
+        response = client.get("/type", params={"lat": 60.505, "lon": 9.505})
+        assert response.status_code == 200
+
+        # Another location in the same pixel is answered without reading
+        with mock.patch.object(
+            soil_routes, "extract_point_from_raster", side_effect=AssertionError
+        ):
+            cached = client.get("/type", params={"lat": 60.506, "lon": 9.504})
+        assert cached.status_code == 200
+        assert cached.json()["properties"] == response.json()["properties"]
+        assert cached.json()["geometry"]["coordinates"] == [9.504, 60.506]
+
+    def test_soil_property_is_cached_per_pixel(self, client):
+        params = {
+            "lat": 60.0,
+            "lon": 10.0,
+            "depths": ["0-5cm"],
+            "properties": ["clay"],
+            "values": ["mean"],
+        }
+        response = client.get("/property", params=params)
+        assert response.status_code == 200
+
+        with mock.patch.object(
+            soil_routes, "extract_point_from_rasters", side_effect=AssertionError
+        ):
+            cached = client.get("/property", params={**params, "lon": 10.0001})
+        assert cached.status_code == 200
+        assert cached.json()["properties"] == response.json()["properties"]
+
+        # Other properties are not served from the cache entry
+        response = client.get("/property", params={**params, "properties": ["sand"]})
+        assert response.json()["properties"]["layers"][0]["code"] == "sand"
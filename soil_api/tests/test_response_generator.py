@@ -0,0 +1,81 @@
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+from soil_api.models.shared import FeatureType, GeometryType, PointGeometry
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyJSON,
+    SoilPropertyValueTypes,
+)
+from soil_api.utils.response_generator import (
+    generate_soil_layer_list,
+    serialize_soil_layer_list,
+    soil_property_response,
+)
+
+
+def soil_property_json(longitude, latitude, soil_layer_list):
+    # Serialized like FastAPI does for the /property route
+    return SoilPropertyJSON(
+        type=FeatureType.Feature,
+        properties=soil_layer_list,
+        geometry=PointGeometry(
+            coordinates=[longitude, latitude], type=GeometryType.Point
+        ),
+    ).model_dump_json(by_alias=True, exclude_unset=True)
+
+
+class TestSerializeSoilLayerList:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_model_serialization(self, seed):
+        rng = np.random.default_rng(seed)
+        properties = list(
+            rng.permutation(list(SoilPropertiesCodes))[: rng.integers(1, 5)]
+        )
+        depths = list(rng.permutation(list(SoilDepthLabels))[: rng.integers(1, 4)])
+        value_types = list(
+            rng.permutation(list(SoilPropertyValueTypes))[: rng.integers(1, 4)]
+        )
+        soil_maps = [
+            (property, depth, value_type, "path")
+            for property, depth, value_type in itertools.product(
+                properties, depths, value_types
+            )
+        ]
+        # Some of the values are no data
+        values = rng.choice([-32768, 0, 1, 345, 32767], len(soil_maps)).tolist()
+
+        expected = generate_soil_layer_list(properties, soil_maps, values)
+        serialized = serialize_soil_layer_list(properties, soil_maps, values)
+        assert serialized == expected.model_dump_json(by_alias=True, exclude_unset=True)
+
+        response = soil_property_response(9.5, 60, serialized)
+        assert response.body.decode() == soil_property_json(9.5, 60, expected)
+
+    def test_all_no_data_values(self):
+        soil_maps = [
+            (SoilPropertiesCodes.clay, SoilDepthLabels.depth_0_5, value_type, "path")
+            for value_type in SoilPropertyValueTypes
+        ]
+        values = [-32768] * len(soil_maps)
+        serialized = serialize_soil_layer_list(
+            [SoilPropertiesCodes.clay], soil_maps, values
+        )
+        layers = json.loads(serialized)["layers"]
+        assert serialized == generate_soil_layer_list(
+            [SoilPropertiesCodes.clay], soil_maps, values
+        ).model_dump_json(by_alias=True, exclude_unset=True)
+        assert set(layers[0]["depths"][0]["values"].values()) == {None}
+
+
+class TestSoilPropertyRoute:
+    def test_openapi_schema_uses_the_model(self, client):
+        schema = client.get("/openapi.json").json()
+        response = schema["paths"]["/property"]["get"]["responses"]["200"]
+        assert response["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/SoilPropertyJSON"
+        }
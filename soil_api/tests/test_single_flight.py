@@ -0,0 +1,172 @@
+import asyncio
+import gc
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from soil_api.tests.conftest import PROPERTY_SOIL_MAPS, PROPERTY_TRANSFORM, clear_caches
+from soil_api.utils import point_extraction
+from soil_api.utils.block_cache import BlockCache
+from soil_api.utils.single_flight import SingleFlight, wait_for_reads
+
+# Two locations in the pixel in row 50 and column 70 of the soil property maps
+X, Y = PROPERTY_TRANSFORM * (70.5, 50.5)
+OTHER_X, OTHER_Y = PROPERTY_TRANSFORM * (70.9, 50.1)
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_a_read(self):
+        single_flight = SingleFlight("test")
+        reads = []
+
+        async def read(keys):
+            reads.append(keys)
+            await asyncio.sleep(0.01)
+            return [f"value of {key}" for key in keys]
+
+        async def get(key):
+            future = single_flight.get(key)
+            if future is None:
+                future = single_flight.start([key], read([key]))[0]
+            return (await wait_for_reads([future]))[0]
+
+        async def run():
+            values = await asyncio.gather(get("a"), get("a"), get("b"), get("a"))
+            # Keys are forgotten once their read completes
+            assert single_flight.get("a") is None
+            return values
+
+        values = asyncio.run(run())
+        assert values == ["value of a", "value of a", "value of b", "value of a"]
+        assert reads == [["a"], ["b"]]
+
+    def test_errors_are_shared(self):
+        single_flight = SingleFlight("test")
+
+        async def read():
+            await asyncio.sleep(0.01)
+            raise ValueError("read failed")
+
+        async def run():
+            future = single_flight.start(["a"], read())[0]
+            waiters = [
+                wait_for_reads([future]),
+                wait_for_reads([single_flight.get("a")]),
+            ]
+            return await asyncio.gather(*waiters, return_exceptions=True)
+
+        errors = asyncio.run(run())
+        assert [type(error) for error in errors] == [ValueError, ValueError]
+
+    def test_cancelled_caller_does_not_cancel_the_read(self):
+        single_flight = SingleFlight("test")
+
+        async def read():
+            await asyncio.sleep(0.01)
+            return ["value"]
+
+        async def run():
+            future = single_flight.start(["a"], read())[0]
+            first = asyncio.ensure_future(wait_for_reads([future]))
+            second = asyncio.ensure_future(wait_for_reads([single_flight.get("a")]))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == ["value"]
+
+    def test_failed_read_of_cancelled_callers_is_not_reported(self):
+        single_flight = SingleFlight("test")
+        errors = []
+
+        async def read():
+            await asyncio.sleep(0.01)
+            raise ValueError("read failed")
+
+        async def run():
+            asyncio.get_running_loop().set_exception_handler(
+                lambda _loop, context: errors.append(context)
+            )
+            future = single_flight.start(["a"], read())[0]
+            # The read is referenced until it completes
+            assert len(single_flight._tasks) == 1
+            waiter = asyncio.ensure_future(wait_for_reads([future]))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0.05)
+            assert not single_flight._tasks
+            gc.collect()
+
+        asyncio.run(run())
+        assert errors == []
+
+
+class TestSharedReads:
+    def test_concurrent_extractions_of_a_pixel_share_a_read(self, soil_maps_dir):
+        raster_paths = [
+            str(soil_maps_dir / soil_map / fname)
+            for soil_map, fname in PROPERTY_SOIL_MAPS[:4]
+        ]
+        clear_caches()
+        expected = asyncio.run(
+            point_extraction.extract_point_from_rasters(raster_paths, Y, X)
+        )
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    point_extraction.extract_point_from_rasters(raster_paths, y, x)
+                    for x, y in [(X, Y), (OTHER_X, OTHER_Y)] * 5
+                )
+            )
+
+        with mock.patch.object(
+            point_extraction,
+            "sample_rasters_at_point",
+            wraps=point_extraction.sample_rasters_at_point,
+        ) as sample:
+            values = asyncio.run(run())
+        clear_caches()
+        assert values == [expected] * 10
+        assert sample.call_count == 1
+
+
+class TestSharedBlockReads:
+    def test_concurrent_threads_share_a_block_read(self):
+        cache = BlockCache(max_bytes=0)
+        started = threading.Event()
+        release = threading.Event()
+        reads = []
+
+        def read():
+            reads.append(1)
+            started.set()
+            release.wait()
+            return np.ones((16, 16), dtype=np.int16)
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get_or_read(("a", 0, 0), read))
+            )
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        # Let the other threads find the read in flight
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(reads) == 1
+        assert len(results) == 4
+        for block in results:
+            np.testing.assert_array_equal(block, np.ones((16, 16)))
+            # The shared block cannot be changed by one of the readers
+            with pytest.raises(ValueError):
+                block[0, 0] = 0
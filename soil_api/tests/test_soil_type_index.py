@@ -0,0 +1,50 @@
+from unittest import mock
+
+from soil_api.config import settings
+from soil_api.routes import soil_routes
+from soil_api.tests.conftest import clear_caches
+from soil_api.utils import soil_type_index
+from soil_api.utils.raster_source import LocalRasterSource
+from soil_api.utils.soil_type_index import build_soil_type_index
+
+INDEX_BBOX = [9.5, 59.5, 10.5, 60.5]
+POINTS = [(9.6, 59.7), (10.3, 60.4), (9.9, 60.05), (9.05, 60.95), (10.8, 59.2)]
+
+
+def inside_index(lon, lat):
+    return (
+        INDEX_BBOX[0] <= lon <= INDEX_BBOX[2] and INDEX_BBOX[1] <= lat <= INDEX_BBOX[3]
+    )
+
+
+class TestSoilTypeIndex:
+    def test_index_answers_match_soil_maps(
+        self, client, soil_maps_dir, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(
+            soil_type_index, "raster_source", LocalRasterSource(str(soil_maps_dir))
+        )
+        index_path = str(tmp_path / "soil_type_index.tif")
+        build_soil_type_index(INDEX_BBOX, index_path, chunk_rows=16)
+
+        expected = {
+            (lon, lat, top_k): client.get(
+                "/type", params={"lon": lon, "lat": lat, "top_k": top_k}
+            ).json()
+            for lon, lat in POINTS
+            for top_k in [1, 3]
+        }
+        clear_caches()
+        monkeypatch.setattr(settings, "soil_type_index_path", index_path)
+        for (lon, lat, top_k), response in expected.items():
+            with mock.patch.object(
+                soil_routes,
+                "extract_point_from_rasters",
+                wraps=soil_routes.extract_point_from_rasters,
+            ) as extract:
+                indexed = client.get(
+                    "/type", params={"lon": lon, "lat": lat, "top_k": top_k}
+                )
+            assert indexed.json() == response
+            # Points covered by the index are answered without the soil maps
+            assert extract.called != inside_index(lon, lat)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.windows import from_bounds
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.tests.conftest import clear_caches
+from soil_api.utils import summary_index
+from soil_api.utils.bbox_extraction import count_classes_in_bbox
+from soil_api.utils.raster_source import LocalRasterSource
+from soil_api.utils.summary_index import (
+    SummaryIndex,
+    build_summary_index,
+    load_summary_index,
+)
+
+INDEX_BBOX = [9.3, 59.4, 10.7, 60.8]
+BBOXES = [
+    # Covered by the index, with partial tiles on every edge
+    [9.333, 59.456, 10.654, 60.789],
+    # Smaller than a tile
+    [9.5, 59.5, 9.55, 59.55],
+    # Partly outside of the index
+    [9.1, 59.1, 10.0, 60.0],
+]
+
+
+def direct_counts(raster_path, bbox):
+    with rasterio.open(raster_path) as src:
+        window = from_bounds(*bbox, transform=src.transform)
+        codes = src.read(1, window=window.round_offsets().round_lengths())
+    values, counts = np.unique(codes, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+@pytest.fixture
+def index_path(soil_maps_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        summary_index, "raster_source", LocalRasterSource(str(soil_maps_dir))
+    )
+    path = str(tmp_path / "summary_index.npz")
+    build_summary_index(INDEX_BBOX, path, tile_size=16)
+    load_summary_index.cache_clear()
+    yield path
+    load_summary_index.cache_clear()
+
+
+class TestSummaryIndex:
+    def test_counts_match_direct_histogram(
+        self, soil_maps_dir, index_path, monkeypatch
+    ):
+        raster_path = str(soil_maps_dir / "wrb" / constants.SOIL_MAPS["wrb"])
+        monkeypatch.setattr(settings, "summary_index_path", index_path)
+        clear_caches()
+        with mock.patch.object(
+            SummaryIndex, "count", autospec=True, side_effect=SummaryIndex.count
+        ) as count:
+            for bbox in BBOXES:
+                counts, _ = count_classes_in_bbox(raster_path, bbox)
+                assert counts == direct_counts(raster_path, bbox)
+        # Only the bounding boxes within the index are counted with it
+        assert count.call_count == 2
+        clear_caches()
+
+    def test_table_does_not_overflow(self, index_path):
+        index = SummaryIndex.load(index_path)
+        assert index.sat.dtype == np.uint64
+        # A table whose sums exceed uint32 counts exactly
+        index.sat = index.sat * np.uint64(2**20)
+        counts = index.count(index.region, lambda window: np.zeros(256, np.int64))
+        total = int(index.region.width * index.region.height) * 2**20
+        assert total > np.iinfo(np.uint32).max
+        assert counts.sum() == total
@@ -0,0 +1,39 @@
+from unittest import mock
+
+from soil_api.routes import system_resources
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.raster_source import RemoteRasterSource
+
+
+class TestSoilGridsHealthcheck:
+    def test_remote_files_are_not_cached(self, monkeypatch):
+        monkeypatch.setattr(
+            system_resources, "raster_source", RemoteRasterSource("https://soil")
+        )
+        with mock.patch("rasterio.Env") as env, mock.patch("rasterio.open"):
+            assert system_resources.soilgrids_healthcheck()[0]
+        env.assert_called_once_with(
+            CPL_VSIL_CURL_NON_CACHED="/vsicurl/https://soil/wrb/MostProbable.vrt"
+        )
+
+    def test_unavailable_soil_maps(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(
+            system_resources, "raster_source", RemoteRasterSource(str(tmp_path))
+        )
+        assert not system_resources.soilgrids_healthcheck()[0]
+
+
+class TestReadiness:
+    def test_saturated_executor_does_not_fail_readiness(self, client, monkeypatch):
+        # The latest probe found the soil maps
+        monkeypatch.setattr(
+            system_resources.readiness_probe,
+            "_results",
+            {"soilgrids_healthcheck": (True, "SoilGrids service is available")},
+        )
+        monkeypatch.setattr(raster_executor, "admitted", raster_executor.capacity)
+
+        assert client.get("/ready").status_code == 200
+        raster_io = client.get("/health").json()["raster_io"]
+        assert raster_io["saturated"]
+        assert raster_io["admitted_jobs"] == raster_io["job_capacity"]
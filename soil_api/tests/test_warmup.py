@@ -0,0 +1,114 @@
+import asyncio
+from unittest import mock
+
+import numpy as np
+import rasterio
+from fastapi.testclient import TestClient
+from rasterio.transform import from_origin
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.utils.block_cache import block_cache
+from soil_api.utils.point_extraction import (
+    transform_coordinates_to_homolosine_crs_array,
+)
+from soil_api.utils.warmup import Warmup
+
+
+def write_soil_map(path):
+    # A soil map of 250 m pixels around 10.5E, 59.5N
+    ys, xs = transform_coordinates_to_homolosine_crs_array([59.5], [10.5])
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=100,
+        height=100,
+        count=1,
+        dtype="int16",
+        crs=constants.HOMOLOSINE_CRS_WKT,
+        transform=from_origin(xs[0] - 12500, ys[0] + 12500, 250, 250),
+        nodata=-32768,
+    ) as dst:
+        dst.write(np.zeros((100, 100), dtype=np.int16), 1)
+
+
+class TestWarmup:
+    def test_progress_and_readiness(self, tmp_path):
+        raster_paths = [str(tmp_path / f"{name}.tif") for name in "abcd"]
+        for raster_path in raster_paths:
+            write_soil_map(raster_path)
+        warmup = Warmup(raster_paths, None, concurrency=1, ready_threshold=0.5)
+        assert warmup.progress == 0 and not warmup.ready
+
+        warm_soil_map = warmup.warm_soil_map
+        progress = []
+
+        async def record_progress(raster_path, points):
+            progress.append((warmup.progress, warmup.ready))
+            await warm_soil_map(raster_path, points)
+
+        warmup.warm_soil_map = record_progress
+        asyncio.run(warmup.run())
+        assert progress == [(0, False), (0.25, False), (0.5, True), (0.75, True)]
+        assert warmup.status() == {
+            "soil_maps": 4,
+            "warmed": 4,
+            "failed": 0,
+            "progress": 1.0,
+        }
+
+    def test_failed_soil_maps_do_not_block_readiness(self, tmp_path):
+        raster_path = str(tmp_path / "a.tif")
+        write_soil_map(raster_path)
+        warmup = Warmup(
+            [raster_path, str(tmp_path / "missing.tif")],
+            points_path=None,
+            concurrency=2,
+            ready_threshold=1.0,
+        )
+        asyncio.run(warmup.run())
+        assert warmup.status() == {
+            "soil_maps": 2,
+            "warmed": 1,
+            "failed": 1,
+            "progress": 1.0,
+        }
+        assert warmup.ready
+
+    def test_prefetches_blocks_of_points(self, tmp_path):
+        raster_path = str(tmp_path / "a.tif")
+        write_soil_map(raster_path)
+        points_path = tmp_path / "points.csv"
+        points_path.write_text("10.5,59.5\n")
+        block_cache.clear()
+        asyncio.run(Warmup([raster_path], str(points_path), 1, 1.0).run())
+        assert block_cache.nbytes > 0
+        block_cache.clear()
+
+    def test_nothing_to_warm_up_is_ready(self):
+        assert Warmup([], None, 1, 1.0).ready
+
+    def test_missing_points_are_skipped(self, tmp_path, caplog):
+        raster_path = str(tmp_path / "a.tif")
+        write_soil_map(raster_path)
+        warmup = Warmup([raster_path], str(tmp_path / "missing.csv"), 1, 1.0)
+        asyncio.run(warmup.run())
+        assert warmup.status()["warmed"] == 1
+        assert warmup.ready
+        assert "Could not load the warm-up points" in caplog.text
+
+
+class TestWarmupOnStartup:
+    def test_warmup_errors_are_logged(self, monkeypatch, caplog):
+        from soil_api.__main__ import app, dataset_pool, raster_executor, warmup
+
+        monkeypatch.setattr(settings, "warmup_enabled", True)
+        with (
+            mock.patch.object(warmup, "run", side_effect=ValueError("failed")),
+            mock.patch.object(raster_executor, "shutdown"),
+            mock.patch.object(dataset_pool, "close"),
+        ):
+            with TestClient(app):
+                pass
+        assert "Background task warm-up failed" in caplog.text
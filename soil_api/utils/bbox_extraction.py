@@ -1,35 +1,467 @@
+import asyncio
+import math
+from functools import partial
+from typing import Callable, Iterator, TypeVar
+
 import numpy as np
 import rasterio
+from affine import Affine
 from fastapi import HTTPException
-from rasterio.windows import from_bounds
+from rasterio.features import bounds, geometry_mask
+from rasterio.io import DatasetReader
+from rasterio.windows import Window, from_bounds
 
+from soil_api import constants
+from soil_api.utils.block_cache import clip_window, iter_window_blocks
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.summary_index import get_summary_index
 
-def extract_bbox_from_raster(raster_path: str, bbox: list[float]) -> dict:
-    """Extracts the counts of unique elements within the
-    specified bounding box from the raster.
+T = TypeVar("T")
+
+
+def count_window_classes(
+    src: DatasetReader, cache_key: str, window: Window
+) -> np.ndarray:
+    """Counts the uint8 class codes within a window of whole pixels of the
+    raster, one block at a time.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - cache_key (str): Key of the raster in the block cache.
+    - window (Window): The window to count.
+
+    Returns:
+    np.ndarray: The count of every class code from 0 to 255.
+    """
+    counts = np.zeros(256, dtype=np.int64)
+    for _, block in iter_window_blocks(src, cache_key, window):
+        counts += np.bincount(block.ravel(), minlength=256)
+    return counts
+
+
+def iter_polygon_values(
+    src: DatasetReader, cache_key: str, window: Window, geometry: dict
+) -> Iterator[np.ndarray]:
+    """Yields the values of the pixels within a window whose centers are
+    inside the polygon, one block at a time. The polygon is rasterized
+    per block, and blocks that the polygon does not touch are not read at all.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - cache_key (str): Key of the raster in the block cache.
+    - window (Window): A window of whole pixels that contains the polygon.
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in the CRS
+        of the raster.
+
+    Yields:
+    np.ndarray: The values inside the polygon of one block, as a 1D array.
+    """
+    # Rasterize the polygon on the grid of blocks to find the touched blocks
+    block_height, block_width = src.block_shapes[0]
+    touched_blocks = geometry_mask(
+        [geometry],
+        out_shape=(
+            math.ceil(src.height / block_height),
+            math.ceil(src.width / block_width),
+        ),
+        transform=src.transform * Affine.scale(block_width, block_height),
+        all_touched=True,
+        invert=True,
+    )
+    for part, block in iter_window_blocks(
+        src,
+        cache_key,
+        window,
+        block_filter=lambda block_row, block_col: touched_blocks[block_row, block_col],
+    ):
+        inside = geometry_mask(
+            [geometry],
+            out_shape=block.shape,
+            transform=src.window_transform(part),
+            invert=True,
+        )
+        yield block[inside]
+
+
+def count_polygon_classes(
+    src: DatasetReader, cache_key: str, window: Window, geometry: dict
+) -> np.ndarray:
+    """Counts the uint8 class codes of the pixels within a window whose
+    centers are inside the polygon.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - cache_key (str): Key of the raster in the block cache.
+    - window (Window): A window of whole pixels that contains the polygon.
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in the CRS
+        of the raster.
+
+    Returns:
+    np.ndarray: The count of every class code from 0 to 255.
+    """
+    counts = np.zeros(256, dtype=np.int64)
+    for values in iter_polygon_values(src, cache_key, window, geometry):
+        counts += np.bincount(values, minlength=256)
+    return counts
+
+
+def select_overview_level(
+    src: DatasetReader,
+    bbox: list[float],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> int | None:
+    """Selects the overview level to summarize the bounding box at.
+    If resolution is given, the finest level whose pixel size is at least
+    the resolution is selected. Otherwise, the finest level at which the
+    bounding box has at most max_pixels pixels is selected. If no level
+    qualifies, the coarsest level is selected.
+
+    Args:
+    - src (DatasetReader): The raster dataset at full resolution.
+    - bbox (list[float]): The bounding box with the format
+        [minx, miny, maxx, maxy].
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
+
+    Returns:
+    int | None: The overview level, or None for full resolution.
+    """
+    levels = [None, *range(len(src.overviews(1)))]
+    factors = [1, *src.overviews(1)]
+    window = clip_window(src, from_bounds(*bbox, transform=src.transform))
+    num_pixels = 0 if window is None else window.width * window.height
+    for level, factor in zip(levels, factors):
+        if resolution is not None:
+            if src.res[0] * factor >= resolution:
+                return level
+        elif max_pixels is None or num_pixels / factor**2 <= max_pixels:
+            return level
+    return levels[-1]
+
+
+def summarize_raster(
+    raster_path: str,
+    bbox: list[float],
+    summarize: Callable[[DatasetReader, str, bool], T],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> T:
+    """Runs a summary of the bounding box on the raster, or on the overview
+    of the raster selected for max_pixels and resolution.
 
     Args:
     - raster_path (str): Path to the raster file.
-    - bbox (list[float]): The bounding box to extract from with
+    - bbox (list[float]): The bounding box to summarize with
         the format [minx, miny, maxx, maxy].
+    - summarize (Callable): Called with the open dataset, its key in the
+        block cache and whether it is at full resolution.
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
 
     Returns:
-    dict: A dictionary with the unique elements as keys and
-        their counts as values.
+    The result of summarize.
     """
     try:
-        with rasterio.open(raster_path) as src:
-            # Get the window corresponding to the bounding box
-            window = from_bounds(*bbox, transform=src.transform)
-            # Read the data within the specified window
-            data = src.read(window=window)
-            # Use numpy.unique to get unique elements and their counts
-            unique_elements, element_counts = np.unique(data, return_counts=True)
-            element_counts_dict = dict(zip(unique_elements, element_counts))
-            return element_counts_dict
+        overview_level = dataset_pool.run(
+            raster_path,
+            lambda src: select_overview_level(src, bbox, max_pixels, resolution),
+        )
+        # Blocks of overviews are cached separately from full resolution blocks
+        cache_key = raster_path
+        if overview_level is not None:
+            cache_key = f"{raster_path}?overview_level={overview_level}"
+        return dataset_pool.run(
+            raster_path,
+            lambda src: summarize(src, cache_key, overview_level is None),
+            overview_level,
+        )
     except rasterio.errors.RasterioIOError as e:
         # return HTTP exception
         raise HTTPException(
             status_code=404,
             detail=f"Error reading raster file: {raster_path}. Due to: {str(e)}",
         )
+
+
+def count_classes_in_bbox(
+    raster_path: str,
+    bbox: list[float],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+    geometry: dict | None = None,
+) -> tuple[dict, float]:
+    """Counts the uint8 class codes within the specified bounding box
+    of the raster. The window is processed one block at a time, so memory
+    use does not depend on the size of the bounding box. The counts are
+    computed on an overview of the raster when the bounding box is too
+    large for max_pixels or when a coarser resolution is requested.
+
+    Args:
+    - raster_path (str): Path to the raster file.
+    - bbox (list[float]): The bounding box to extract from with
+        the format [minx, miny, maxx, maxy].
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
+    - geometry (dict | None): If given, only the pixels inside this GeoJSON
+        Polygon or MultiPolygon within the bounding box are counted.
+
+    Returns:
+    tuple[dict, float]: A dictionary with the class codes as keys and
+        their counts as values, and the pixel size the counts are based on.
+    """
+
+    def count(
+        src: DatasetReader, cache_key: str, full_resolution: bool
+    ) -> tuple[np.ndarray, float]:
+        # Get the window corresponding to the bounding box
+        window = clip_window(
+            src,
+            from_bounds(*bbox, transform=src.transform),
+            outward=geometry is not None,
+        )
+        if window is None:
+            return np.zeros(256, dtype=np.int64), src.res[0]
+        if geometry is not None:
+            return (
+                count_polygon_classes(src, cache_key, window, geometry),
+                src.res[0],
+            )
+        count_window = partial(count_window_classes, src, cache_key)
+        # Use the precomputed summary index at full resolution if it covers
+        # the window, so that only the edges are read from the raster
+        summary_index = get_summary_index()
+        if (
+            full_resolution
+            and summary_index is not None
+            and summary_index.covers(src.transform, window)
+        ):
+            return summary_index.count(window, count_window), src.res[0]
+        return count_window(window), src.res[0]
+
+    counts, pixel_size = summarize_raster(
+        raster_path, bbox, count, max_pixels, resolution
+    )
+    counts_dict = {code: count for code, count in enumerate(counts.tolist()) if count}
+    return counts_dict, pixel_size
+
+
+def histogram_statistics(
+    histogram: np.ndarray, offset: int, percentiles: list[float]
+) -> dict:
+    """Computes summary statistics from a histogram of integer values.
+    The percentiles are exact and interpolated linearly between
+    the closest ranks, like numpy.percentile.
+
+    Args:
+    - histogram (np.ndarray): The count of every value, starting at -offset.
+    - offset (int): Offset of the values from the bin index.
+    - percentiles (list[float]): Percentiles to compute, between 0 and 100.
+
+    Returns:
+    dict: The count, mean, min, max, std and percentiles of the values.
+        Only the count is included if there are no values.
+    """
+    count = int(histogram.sum())
+    if count == 0:
+        return {"count": 0}
+    values = np.arange(histogram.size, dtype=np.float64) - offset
+    present = np.flatnonzero(histogram)
+    mean = float(np.dot(values, histogram) / count)
+    variance = float(np.dot((values - mean) ** 2, histogram) / count)
+
+    # Find the values at the closest ranks of every percentile
+    cumulative_counts = np.cumsum(histogram)
+    ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (count - 1)
+    lower_values = values[np.searchsorted(cumulative_counts, np.floor(ranks), "right")]
+    upper_values = values[np.searchsorted(cumulative_counts, np.ceil(ranks), "right")]
+    percentile_values = lower_values + (ranks - np.floor(ranks)) * (
+        upper_values - lower_values
+    )
+    return {
+        "count": count,
+        "mean": mean,
+        "min": float(values[present[0]]),
+        "max": float(values[present[-1]]),
+        "std": math.sqrt(variance),
+        "percentiles": list(zip(percentiles, percentile_values.tolist())),
+    }
+
+
+def value_statistics(values: np.ndarray, percentiles: list[float]) -> dict:
+    """Computes summary statistics of an array of values.
+
+    Args:
+    - values (np.ndarray): The values, as a 1D array.
+    - percentiles (list[float]): Percentiles to compute, between 0 and 100.
+
+    Returns:
+    dict: The count, mean, min, max, std and percentiles of the values.
+        Only the count is included if there are no values.
+    """
+    if values.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "std": float(values.std()),
+        "percentiles": list(
+            zip(percentiles, np.percentile(values, percentiles).tolist())
+        ),
+    }
+
+
+def summarize_values_in_geometry(
+    raster_path: str,
+    geometry: dict,
+    percentiles: list[float],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> tuple[dict, float]:
+    """Computes summary statistics of the values of the pixels whose centers
+    are inside the polygon, skipping no data values. Values of 8 and 16 bit
+    integer rasters are accumulated in a histogram one block at a time,
+    so memory use does not depend on the size of the polygon.
+
+    Args:
+    - raster_path (str): Path to the raster file.
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in the CRS
+        of the raster.
+    - percentiles (list[float]): Percentiles to compute, between 0 and 100.
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
+
+    Returns:
+    tuple[dict, float]: The count, mean, min, max, std and percentiles
+        of the values, and the pixel size they are based on.
+    """
+    bbox = list(bounds(geometry))
+
+    def summarize(
+        src: DatasetReader, cache_key: str, full_resolution: bool
+    ) -> tuple[dict, float]:
+        dtype = np.dtype(src.dtypes[0])
+        no_data_values = [*constants.NO_DATA_VALS_SOILGRIDS, src.nodata]
+        window = clip_window(
+            src, from_bounds(*bbox, transform=src.transform), outward=True
+        )
+        blocks = []
+        if window is not None:
+            blocks = iter_polygon_values(src, cache_key, window, geometry)
+
+        if dtype.kind in "iu" and dtype.itemsize <= 2:
+            offset = -int(np.iinfo(dtype).min)
+            histogram = np.zeros(2 ** (8 * dtype.itemsize), dtype=np.int64)
+            for values in blocks:
+                histogram += np.bincount(
+                    values.astype(np.int64) + offset, minlength=histogram.size
+                )
+            for no_data_value in no_data_values:
+                if no_data_value is not None and (
+                    0 <= no_data_value + offset < histogram.size
+                ):
+                    histogram[int(no_data_value) + offset] = 0
+            return histogram_statistics(histogram, offset, percentiles), src.res[0]
+
+        values = np.concatenate([np.empty(0, dtype=dtype), *blocks])
+        values = values[~np.isin(values, [v for v in no_data_values if v is not None])]
+        if dtype.kind == "f":
+            values = values[~np.isnan(values)]
+        return value_statistics(values, percentiles), src.res[0]
+
+    return summarize_raster(raster_path, bbox, summarize, max_pixels, resolution)
+
+
+async def extract_bbox_from_raster(
+    raster_path: str,
+    bbox: list[float],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> tuple[dict, float]:
+    """Extracts the counts of unique elements within the
+    specified bounding box from the raster. The counting runs
+    on the raster I/O executor.
+
+    Args:
+    - raster_path (str): Path to the raster file.
+    - bbox (list[float]): The bounding box to extract from with
+        the format [minx, miny, maxx, maxy].
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
+
+    Returns:
+    tuple[dict, float]: A dictionary with the unique elements as keys and
+        their counts as values, and the pixel size the counts are based on.
+    """
+    return await raster_executor.run(
+        count_classes_in_bbox, raster_path, bbox, max_pixels, resolution
+    )
+
+
+async def extract_polygon_from_raster(
+    raster_path: str,
+    geometry: dict,
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> tuple[dict, float]:
+    """Extracts the counts of unique elements within the
+    specified polygon from the raster. The counting runs
+    on the raster I/O executor.
+
+    Args:
+    - raster_path (str): Path to the raster file.
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon.
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the raster.
+
+    Returns:
+    tuple[dict, float]: A dictionary with the unique elements as keys and
+        their counts as values, and the pixel size the counts are based on.
+    """
+    bbox = list(bounds(geometry))
+    return await raster_executor.run(
+        count_classes_in_bbox, raster_path, bbox, max_pixels, resolution, geometry
+    )
+
+
+async def extract_statistics_from_rasters(
+    raster_paths: list[str | None],
+    geometry: dict,
+    percentiles: list[float],
+    max_pixels: int | None = None,
+    resolution: float | None = None,
+) -> list[tuple[dict, float] | None]:
+    """Computes summary statistics of the values inside the polygon for
+    every raster. Every raster is summarized as a separate job on the
+    raster I/O executor, so the rasters are read concurrently.
+
+    Args:
+    - raster_paths (list[str | None]): Paths to the raster files. None
+        paths are skipped.
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in the CRS
+        of the rasters.
+    - percentiles (list[float]): Percentiles to compute, between 0 and 100.
+    - max_pixels (int | None): Maximum number of pixels to summarize.
+    - resolution (float | None): Minimum pixel size in the units of the rasters.
+
+    Returns:
+    list[tuple[dict, float] | None]: The statistics and the pixel size they
+        are based on for every raster, or None for skipped rasters.
+    """
+
+    async def summarize(raster_path: str | None) -> tuple[dict, float] | None:
+        if raster_path is None:
+            return None
+        return await raster_executor.run(
+            summarize_values_in_geometry,
+            raster_path,
+            geometry,
+            percentiles,
+            max_pixels,
+            resolution,
+        )
+
+    return await asyncio.gather(*[summarize(path) for path in raster_paths])
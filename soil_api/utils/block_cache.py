@@ -0,0 +1,308 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+from rasterio.errors import WindowError
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+
+from soil_api.config import settings
+from soil_api.utils.single_flight import DEDUPLICATED, READS
+
+BLOCK_CACHE_HITS = Counter(
+    "soil_api_block_cache_hits_total",
+    "Number of raster blocks served from the block cache",
+)
+BLOCK_CACHE_MISSES = Counter(
+    "soil_api_block_cache_misses_total",
+    "Number of raster blocks that had to be read and decoded",
+)
+BLOCK_CACHE_BYTES = Gauge(
+    "soil_api_block_cache_bytes",
+    "Number of bytes held by the block cache",
+)
+
+BlockKey = tuple[str, int, int]
+
+
+class InFlightRead:
+    """A block that is being read by one thread while others wait for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.block: np.ndarray | None = None
+
+
+class BlockCache:
+    """A thread-safe LRU cache of decoded raster blocks with a memory budget.
+    Blocks are keyed by (raster path, block row, block column) and are
+    evicted least recently used first once their total size exceeds
+    `max_bytes`. A max_bytes of 0 disables the cache.
+
+    Args:
+    - max_bytes (int): Memory budget of the cache in bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._blocks: OrderedDict[BlockKey, np.ndarray] = OrderedDict()
+        self._reads: dict[BlockKey, InFlightRead] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: BlockKey) -> np.ndarray | None:
+        """Returns the cached block, or None if it is not cached."""
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+        if block is None:
+            BLOCK_CACHE_MISSES.inc()
+        else:
+            BLOCK_CACHE_HITS.inc()
+        return block
+
+    def put(self, key: BlockKey, block: np.ndarray) -> None:
+        """Stores a block, evicting the least recently used blocks as needed.
+        Blocks larger than the whole budget are not cached.
+        """
+        if block.nbytes > self.max_bytes:
+            return
+        # Cached blocks are shared between requests and must not change
+        block.setflags(write=False)
+        with self._lock:
+            previous = self._blocks.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self._blocks[key] = block
+            self.nbytes += block.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+            BLOCK_CACHE_BYTES.set(self.nbytes)
+
+    def get_or_read(self, key: BlockKey, read: Callable[[], np.ndarray]) -> np.ndarray:
+        """Returns the cached block, or reads and caches it. Threads that
+        need a block that another thread is reading wait for that read
+        instead of reading the block again. If that read fails, they read
+        the block themselves.
+
+        Args:
+        - key (BlockKey): The key of the block.
+        - read (Callable): Reads the block.
+
+        Returns:
+        np.ndarray: The block.
+        """
+        block = self.get(key)
+        if block is not None:
+            return block
+        with self._lock:
+            in_flight = self._reads.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._reads[key] = InFlightRead()
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.block is not None:
+                DEDUPLICATED.labels("block").inc()
+                return in_flight.block
+            return read()
+
+        READS.labels("block").inc()
+        try:
+            block = read()
+            self.put(key, block)
+            # Shared with the waiting threads, so it must not change either
+            block.setflags(write=False)
+            in_flight.block = block
+            return block
+        finally:
+            with self._lock:
+                del self._reads[key]
+            in_flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self.nbytes = 0
+            BLOCK_CACHE_BYTES.set(0)
+
+
+block_cache = BlockCache(settings.block_cache_max_bytes)
+
+
+def read_block(
+    src: DatasetReader, raster_path: str, block_row: int, block_col: int
+) -> np.ndarray:
+    """Reads a block of the first band of the raster through the block cache.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - raster_path (str): Path to the raster file, used as cache key.
+    - block_row (int): Row index of the block.
+    - block_col (int): Column index of the block.
+
+    Returns:
+    np.ndarray: The decoded block. Edge blocks are clipped to the raster.
+    """
+    key = (raster_path, int(block_row), int(block_col))
+    return block_cache.get_or_read(
+        key, lambda: src.read(1, window=src.block_window(1, block_row, block_col))
+    )
+
+
+def sample_points(
+    src: DatasetReader,
+    raster_path: str,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    read: Callable[[int, int], np.ndarray] | None = None,
+) -> np.ndarray:
+    """Samples the first band of the raster at many points, reading each
+    block that contains a point only once. Points outside of the raster
+    get the nodata value of the raster, or 0 if it has none.
+
+    Args:
+    - src (DatasetReader): The open raster dataset, or a raster manifest
+        entry with the same metadata.
+    - raster_path (str): Path to the raster file, used as cache key.
+    - xs (np.ndarray): X coordinates in the CRS of the raster.
+    - ys (np.ndarray): Y coordinates in the CRS of the raster.
+    - read (Callable | None): Reads a block by block row and column.
+        Defaults to read_block on src.
+
+    Returns:
+    np.ndarray: The sampled values, in the order of the points.
+    """
+    cols, rows = ~src.transform * (np.asarray(xs), np.asarray(ys))
+    rows = np.floor(rows).astype(np.int64)
+    cols = np.floor(cols).astype(np.int64)
+    values = np.full(rows.shape, src.nodata or 0, dtype=src.dtypes[0])
+
+    inside = np.flatnonzero(
+        (rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width)
+    )
+    if inside.size == 0:
+        return values
+    block_height, block_width = src.block_shapes[0]
+    block_rows = rows[inside] // block_height
+    block_cols = cols[inside] // block_width
+
+    # Group the points by block so that every block is read once
+    block_ids = block_rows * (src.width // block_width + 1) + block_cols
+    order = np.argsort(block_ids, kind="stable")
+    sorted_ids = block_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    ends = np.r_[starts[1:], len(sorted_ids)]
+    for start, end in zip(starts, ends):
+        first = order[start]
+        block_row, block_col = block_rows[first], block_cols[first]
+        if read is None:
+            block = read_block(src, raster_path, block_row, block_col)
+        else:
+            block = read(block_row, block_col)
+        members = inside[order[start:end]]
+        values[members] = block[
+            rows[members] - block_row * block_height,
+            cols[members] - block_col * block_width,
+        ]
+    return values
+
+
+def clip_window(
+    src: DatasetReader, window: Window, outward: bool = False
+) -> Window | None:
+    """Rounds the window to whole pixels and clips it to the raster.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - window (Window): The window to clip.
+    - outward (bool): Whether to round outward to include every pixel that
+        the window touches, instead of rounding to the nearest pixels.
+
+    Returns:
+    Window | None: The clipped window, or None if it is empty.
+    """
+    if outward:
+        col_off, row_off = math.floor(window.col_off), math.floor(window.row_off)
+        window = Window(
+            col_off,
+            row_off,
+            math.ceil(window.col_off + window.width) - col_off,
+            math.ceil(window.row_off + window.height) - row_off,
+        )
+    else:
+        window = window.round_offsets().round_lengths()
+    try:
+        window = window.intersection(Window(0, 0, src.width, src.height))
+    except WindowError:
+        return None
+    if window.width <= 0 or window.height <= 0:
+        return None
+    return Window(
+        int(window.col_off), int(window.row_off), int(window.width), int(window.height)
+    )
+
+
+def iter_window_blocks(
+    src: DatasetReader,
+    raster_path: str,
+    window: Window,
+    block_filter: Callable[[int, int], bool] | None = None,
+) -> Iterator[tuple[Window, np.ndarray]]:
+    """Iterates over the parts of the blocks of the first band that
+    intersect the window, one block at a time, through the block cache.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - raster_path (str): Path to the raster file, used as cache key.
+    - window (Window): A window of whole pixels within the raster.
+    - block_filter (Callable | None): If given, only the blocks for which
+        block_filter(block_row, block_col) is true are read.
+
+    Yields:
+    tuple[Window, np.ndarray]: The window of the raster covered by the
+        part of the block, and its pixels.
+    """
+    row_off, col_off = int(window.row_off), int(window.col_off)
+    row_end, col_end = row_off + int(window.height), col_off + int(window.width)
+    block_height, block_width = src.block_shapes[0]
+    for block_row in range(row_off // block_height, (row_end - 1) // block_height + 1):
+        for block_col in range(
+            col_off // block_width, (col_end - 1) // block_width + 1
+        ):
+            if block_filter is not None and not block_filter(block_row, block_col):
+                continue
+            block = read_block(src, raster_path, block_row, block_col)
+            top, left = block_row * block_height, block_col * block_width
+            r0, r1 = max(row_off, top), min(row_end, top + block.shape[0])
+            c0, c1 = max(col_off, left), min(col_end, left + block.shape[1])
+            yield Window(c0, r0, c1 - c0, r1 - r0), block[
+                r0 - top : r1 - top, c0 - left : c1 - left
+            ]
+
+
+def read_window(src: DatasetReader, raster_path: str, window: Window) -> np.ndarray:
+    """Reads a window of the first band of the raster through the block cache.
+    The window is rounded to whole pixels and clipped to the raster.
+
+    Args:
+    - src (DatasetReader): The open raster dataset.
+    - raster_path (str): Path to the raster file, used as cache key.
+    - window (Window): The window to read.
+
+    Returns:
+    np.ndarray: The pixels within the window.
+    """
+    window = clip_window(src, window)
+    if window is None:
+        return np.empty((0, 0), dtype=src.dtypes[0])
+    data = np.empty((window.height, window.width), dtype=src.dtypes[0])
+    for part, block in iter_window_blocks(src, raster_path, window):
+        row, col = part.row_off - window.row_off, part.col_off - window.col_off
+        data[row : row + part.height, col : col + part.width] = block
+    return data
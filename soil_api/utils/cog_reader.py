@@ -0,0 +1,448 @@
+import asyncio
+import importlib.util
+import logging
+import math
+import struct
+import zlib
+from typing import Awaitable, Callable
+
+import httpx
+import numpy as np
+from prometheus_client import Counter
+from rasterio.windows import Window
+
+from soil_api.config import settings
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+logger = logging.getLogger(__name__)
+
+RANGE_REQUESTS = Counter(
+    "soil_api_cog_range_requests_total",
+    "Number of HTTP range requests made by the COG reader",
+    ["kind"],
+)
+
+# Numpy type codes of the TIFF field types
+TIFF_FIELD_TYPES = {
+    1: "u1",
+    2: "u1",
+    3: "u2",
+    4: "u4",
+    6: "i1",
+    7: "u1",
+    8: "i2",
+    9: "i4",
+    11: "f4",
+    12: "f8",
+    16: "u8",
+    17: "i8",
+    18: "u8",
+}
+# Numpy kinds of the TIFF sample formats
+TIFF_SAMPLE_FORMATS = {1: "u", 2: "i", 3: "f"}
+
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+SAMPLES_PER_PIXEL = 277
+PLANAR_CONFIGURATION = 284
+PREDICTOR = 317
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+SAMPLE_FORMAT = 339
+GDAL_NODATA = 42113
+LAYOUT_TAGS = {
+    IMAGE_WIDTH,
+    IMAGE_LENGTH,
+    BITS_PER_SAMPLE,
+    COMPRESSION,
+    SAMPLES_PER_PIXEL,
+    PLANAR_CONFIGURATION,
+    PREDICTOR,
+    TILE_WIDTH,
+    TILE_LENGTH,
+    TILE_OFFSETS,
+    TILE_BYTE_COUNTS,
+    SAMPLE_FORMAT,
+    GDAL_NODATA,
+}
+
+NO_COMPRESSION = 1
+DEFLATE_COMPRESSIONS = (8, 32946)
+NO_PREDICTOR = 1
+HORIZONTAL_PREDICTOR = 2
+
+Fetch = Callable[[int, int], Awaitable[bytes]]
+
+
+class UnsupportedTiffError(ValueError):
+    """Raised for TIFF files that the COG reader cannot decode, which have
+    to be read through GDAL instead."""
+
+
+class TiffLayout:
+    """The layout of the full resolution image of a tiled GeoTIFF, with
+    the byte ranges of all of its tiles.
+
+    Args:
+    - width (int): The width of the image.
+    - height (int): The height of the image.
+    - tile_shape (tuple[int, int]): The height and width of the tiles.
+    - dtype (np.dtype): The data type of the samples, in file byte order.
+    - samples (int): The number of samples per pixel.
+    - planar (bool): Whether every band is stored in its own tiles.
+    - compression (int): The TIFF compression code.
+    - predictor (int): The TIFF predictor code.
+    - nodata (float | None): The GDAL no data value.
+    - tile_offsets (np.ndarray): The byte offset of every tile.
+    - tile_byte_counts (np.ndarray): The compressed size of every tile.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        tile_shape: tuple[int, int],
+        dtype: np.dtype,
+        samples: int,
+        planar: bool,
+        compression: int,
+        predictor: int,
+        nodata: float | None,
+        tile_offsets: np.ndarray,
+        tile_byte_counts: np.ndarray,
+    ):
+        self.width = width
+        self.height = height
+        self.tile_shape = tile_shape
+        self.dtype = dtype
+        self.samples = samples
+        self.planar = planar
+        self.compression = compression
+        self.predictor = predictor
+        self.nodata = nodata
+        self.tile_offsets = tile_offsets
+        self.tile_byte_counts = tile_byte_counts
+
+    def tile_index(self, band: int, tile_row: int, tile_col: int) -> int:
+        """Returns the index of a tile in the tile offsets."""
+        tiles_across = math.ceil(self.width / self.tile_shape[1])
+        index = tile_row * tiles_across + tile_col
+        if self.planar:
+            tiles_down = math.ceil(self.height / self.tile_shape[0])
+            index += (band - 1) * tiles_across * tiles_down
+        return index
+
+    def decode_tile(self, data: bytes, band: int) -> np.ndarray:
+        """Decodes a compressed tile to the samples of a band.
+
+        Args:
+        - data (bytes): The compressed tile.
+        - band (int): The band to decode, starting at 1.
+
+        Returns:
+        np.ndarray: The full tile, including the padding of edge tiles.
+        """
+        if self.compression in DEFLATE_COMPRESSIONS:
+            data = zlib.decompress(data)
+        samples = 1 if self.planar else self.samples
+        dtype = self.dtype.newbyteorder("=")
+        tile = np.frombuffer(data, dtype=self.dtype).reshape(*self.tile_shape, samples)
+        tile = tile.astype(dtype)
+        if self.predictor == HORIZONTAL_PREDICTOR:
+            # Differences wrap around like the encoder's
+            tile = np.cumsum(tile, axis=1, dtype=dtype)
+        return tile[:, :, 0 if self.planar else band - 1]
+
+
+async def parse_tiff_layout(header: bytes, fetch: Fetch) -> TiffLayout:
+    """Parses the first image file directory of a tiled GeoTIFF. Cloud
+    Optimized GeoTIFFs keep it at the start of the file, so it is usually
+    within the header, and only the tile offsets and byte counts of large
+    images need further range requests.
+    If the TIFF cannot be decoded by the COG reader, raises an
+    UnsupportedTiffError.
+
+    Args:
+    - header (bytes): The first bytes of the file.
+    - fetch (Fetch): Fetches a byte range of the file by offset and size.
+
+    Returns:
+    TiffLayout: The layout of the full resolution image.
+    """
+
+    async def read(offset: int, size: int) -> bytes:
+        if offset + size <= len(header):
+            return header[offset : offset + size]
+        return await fetch(offset, size)
+
+    byte_order = {b"II": "<", b"MM": ">"}.get(header[:2])
+    if byte_order is None:
+        raise UnsupportedTiffError("Not a TIFF file")
+    (version,) = struct.unpack(f"{byte_order}H", header[2:4])
+    if version == 42:
+        (ifd_offset,) = struct.unpack(f"{byte_order}I", header[4:8])
+        count_format, offset_format, entry_size = "H", "I", 12
+    elif version == 43:
+        (ifd_offset,) = struct.unpack(f"{byte_order}Q", header[8:16])
+        count_format, offset_format, entry_size = "Q", "Q", 20
+    else:
+        raise UnsupportedTiffError(f"Unknown TIFF version {version}")
+
+    # Entries are a tag, a field type, a value count and an inline value
+    # or the offset of the values
+    inline_size = entry_size - 4 - struct.calcsize(offset_format)
+    entry_format = f"{byte_order}HH{offset_format}{inline_size}s"
+    count_size = struct.calcsize(count_format)
+    (num_entries,) = struct.unpack(
+        f"{byte_order}{count_format}", await read(ifd_offset, count_size)
+    )
+    entries = await read(ifd_offset + count_size, num_entries * entry_size)
+    tags = {}
+    for i in range(num_entries):
+        tag, field_type, count, field = struct.unpack(
+            entry_format, entries[i * entry_size : (i + 1) * entry_size]
+        )
+        if tag not in LAYOUT_TAGS or field_type not in TIFF_FIELD_TYPES:
+            continue
+        dtype = np.dtype(TIFF_FIELD_TYPES[field_type]).newbyteorder(byte_order)
+        size = count * dtype.itemsize
+        if size > inline_size:
+            (offset,) = struct.unpack(f"{byte_order}{offset_format}", field)
+            field = await read(offset, size)
+        tags[tag] = np.frombuffer(field[:size], dtype=dtype)
+
+    def value(tag: int, default: int | None = None) -> int:
+        if tag not in tags:
+            if default is None:
+                raise UnsupportedTiffError(f"Missing TIFF tag {tag}")
+            return default
+        return int(tags[tag][0])
+
+    if TILE_OFFSETS not in tags:
+        raise UnsupportedTiffError("Only tiled TIFF files are supported")
+    compression = value(COMPRESSION, NO_COMPRESSION)
+    if compression != NO_COMPRESSION and compression not in DEFLATE_COMPRESSIONS:
+        raise UnsupportedTiffError(f"Unsupported TIFF compression {compression}")
+    predictor = value(PREDICTOR, NO_PREDICTOR)
+    if predictor not in (NO_PREDICTOR, HORIZONTAL_PREDICTOR):
+        raise UnsupportedTiffError(f"Unsupported TIFF predictor {predictor}")
+    bits = value(BITS_PER_SAMPLE)
+    kind = TIFF_SAMPLE_FORMATS.get(value(SAMPLE_FORMAT, 1))
+    if kind is None or bits % 8 != 0:
+        raise UnsupportedTiffError("Unsupported TIFF sample format")
+    nodata = None
+    if GDAL_NODATA in tags:
+        nodata = float(tags[GDAL_NODATA].tobytes().rstrip(b"\0").decode())
+    return TiffLayout(
+        width=value(IMAGE_WIDTH),
+        height=value(IMAGE_LENGTH),
+        tile_shape=(value(TILE_LENGTH), value(TILE_WIDTH)),
+        dtype=np.dtype(f"{kind}{bits // 8}").newbyteorder(byte_order),
+        samples=value(SAMPLES_PER_PIXEL, 1),
+        planar=value(PLANAR_CONFIGURATION, 1) == 2,
+        compression=compression,
+        predictor=predictor,
+        nodata=nodata,
+        tile_offsets=tags[TILE_OFFSETS].astype(np.int64),
+        tile_byte_counts=tags[TILE_BYTE_COUNTS].astype(np.int64),
+    )
+
+
+class CogReader:
+    """Reads windows of Cloud Optimized GeoTIFFs over HTTP on the event loop.
+    Every file's header and tile offsets are fetched once and cached, and
+    after that a read only fetches the compressed tiles it needs, with one
+    range request per tile over a pooled connection.
+
+    Args:
+    - max_connections (int): Maximum number of pooled connections.
+    - timeout (float): Seconds to wait for a response.
+    - header_size (int): Number of bytes fetched to parse a file header.
+    - http2 (bool): Whether to use HTTP/2 if the h2 package is installed.
+    """
+
+    def __init__(
+        self, max_connections: int, timeout: float, header_size: int, http2: bool
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.header_size = header_size
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning(
+                "HTTP/2 is enabled for the COG reader, but the h2 package is "
+                "not installed. Install httpx[http2] to use HTTP/2."
+            )
+        self._layouts: dict[str, TiffLayout | UnsupportedTiffError] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections and cached futures are bound to their loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections),
+            )
+            self._pending = {}
+            self._loop = loop
+        return self._client
+
+    async def fetch(self, url: str, offset: int, size: int, kind: str) -> bytes:
+        """Fetches a byte range of a file.
+
+        Args:
+        - url (str): The URL of the file.
+        - offset (int): The offset of the range.
+        - size (int): The size of the range.
+        - kind (str): What is fetched, for the metrics.
+
+        Returns:
+        bytes: The bytes of the range. Shorter at the end of the file.
+        """
+        RANGE_REQUESTS.labels(kind).inc()
+        response = await self._get_client().get(
+            url, headers={"Range": f"bytes={offset}-{offset + size - 1}"}
+        )
+        response.raise_for_status()
+        if response.status_code == 206:
+            return response.content
+        # Servers that ignore the range send the whole file
+        return response.content[offset : offset + size]
+
+    async def layout(self, url: str) -> TiffLayout:
+        """Returns the cached layout of a file, or fetches and parses it.
+        Concurrent calls for the same file share one fetch.
+
+        Args:
+        - url (str): The URL of the file.
+
+        Returns:
+        TiffLayout: The layout of the full resolution image.
+        """
+        layout = self._layouts.get(url)
+        if isinstance(layout, UnsupportedTiffError):
+            raise layout
+        if layout is not None:
+            return layout
+        self._get_client()
+        future = self._pending.get(url)
+        if future is None:
+            future = self._pending[url] = asyncio.ensure_future(self._read_layout(url))
+        return await asyncio.shield(future)
+
+    async def _read_layout(self, url: str) -> TiffLayout:
+        try:
+            header = await self.fetch(url, 0, self.header_size, "header")
+            layout = await parse_tiff_layout(
+                header, lambda offset, size: self.fetch(url, offset, size, "header")
+            )
+        except UnsupportedTiffError as e:
+            # Files that cannot be decoded are not fetched again
+            self._layouts[url] = e
+            raise
+        finally:
+            self._pending.pop(url, None)
+        self._layouts[url] = layout
+        return layout
+
+    async def read_tile(
+        self, url: str, layout: TiffLayout, band: int, tile_row: int, tile_col: int
+    ) -> np.ndarray:
+        """Fetches and decodes a tile. Tiles that are not in the file are
+        no data, like GDAL reads them.
+
+        Args:
+        - url (str): The URL of the file.
+        - layout (TiffLayout): The layout of the file.
+        - band (int): The band to read, starting at 1.
+        - tile_row (int): The row of the tile.
+        - tile_col (int): The column of the tile.
+
+        Returns:
+        np.ndarray: The full tile, including the padding of edge tiles.
+        """
+        index = layout.tile_index(band, tile_row, tile_col)
+        offset = int(layout.tile_offsets[index])
+        size = int(layout.tile_byte_counts[index])
+        if offset == 0 or size == 0:
+            return np.full(
+                layout.tile_shape,
+                layout.nodata or 0,
+                dtype=layout.dtype.newbyteorder("="),
+            )
+        data = await self.fetch(url, offset, size, "tile")
+        return layout.decode_tile(data, band)
+
+    async def read_window(self, url: str, band: int, window: Window) -> np.ndarray:
+        """Reads a window of a band, fetching the tiles it overlaps
+        concurrently.
+        If the file cannot be decoded by the COG reader, raises an
+        UnsupportedTiffError.
+
+        Args:
+        - url (str): The URL of the file.
+        - band (int): The band to read, starting at 1.
+        - window (Window): A window of whole pixels within the image.
+
+        Returns:
+        np.ndarray: The pixels within the window.
+        """
+        layout = await self.layout(url)
+        row_off, col_off = int(window.row_off), int(window.col_off)
+        row_end, col_end = row_off + int(window.height), col_off + int(window.width)
+        if (
+            row_off < 0
+            or col_off < 0
+            or row_end > layout.height
+            or col_end > layout.width
+        ):
+            raise ValueError(f"Window {window} is outside of {url}")
+        tile_height, tile_width = layout.tile_shape
+        tiles = [
+            (tile_row, tile_col)
+            for tile_row in range(
+                row_off // tile_height, (row_end - 1) // tile_height + 1
+            )
+            for tile_col in range(
+                col_off // tile_width, (col_end - 1) // tile_width + 1
+            )
+        ]
+        decoded = await asyncio.gather(
+            *(self.read_tile(url, layout, band, *tile) for tile in tiles)
+        )
+        data = np.empty(
+            (row_end - row_off, col_end - col_off),
+            dtype=layout.dtype.newbyteorder("="),
+        )
+        for (tile_row, tile_col), tile in zip(tiles, decoded):
+            top, left = tile_row * tile_height, tile_col * tile_width
+            r0, r1 = max(row_off, top), min(row_end, top + tile_height)
+            c0, c1 = max(col_off, left), min(col_end, left + tile_width)
+            data[r0 - row_off : r1 - row_off, c0 - col_off : c1 - col_off] = tile[
+                r0 - top : r1 - top, c0 - left : c1 - left
+            ]
+        return data
+
+    async def close(self) -> None:
+        """Closes the pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+cog_reader = CogReader(
+    max_connections=settings.cog_reader_max_connections,
+    timeout=settings.cog_reader_timeout,
+    header_size=settings.cog_reader_header_size,
+    http2=settings.cog_reader_http2,
+)
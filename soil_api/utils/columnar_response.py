@@ -0,0 +1,317 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import Response
+
+from soil_api import constants
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
+from soil_api.models.soil_type import soil_type_dict
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+NPY_MEDIA_TYPE = "application/x-npy"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+TABLE_MEDIA_TYPES = [ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+BATCH_MEDIA_TYPES = [ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE, NDJSON_MEDIA_TYPE]
+GRID_MEDIA_TYPES = [
+    ARROW_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+]
+
+
+def negotiate_media_type(accept: str | None, media_types: list[str]) -> str:
+    """Selects the media type of the response from the Accept header.
+    The accepted media type with the highest quality among JSON and the
+    given media types is selected, preferring the first one listed on ties.
+    JSON is selected if the header does not ask for any of the given
+    media types, so clients that do not negotiate keep getting JSON.
+
+    Args:
+    - accept (str | None): The Accept header of the request.
+    - media_types (list[str]): The binary media types the route supports.
+
+    Returns:
+    str: The selected media type.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    accepted = []
+    for position, entry in enumerate(accept.split(",")):
+        media_type, *parameters = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+    for *_, media_type in sorted(accepted):
+        if media_type in media_types:
+            return media_type
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def binary_response_docs(media_types: list[str]) -> dict:
+    """Documents the binary media types of a route in the OpenAPI schema.
+
+    Args:
+    - media_types (list[str]): The binary media types the route supports.
+
+    Returns:
+    dict: The responses argument of the route decorator.
+    """
+    return {200: {"content": {media_type: {} for media_type in media_types}}}
+
+
+def table_response(columns: dict, media_type: str) -> Response:
+    """Serializes columns to an Arrow IPC stream or a Parquet file.
+
+    Args:
+    - columns (dict): The columns of the table, as NumPy or Arrow arrays.
+    - media_type (str): ARROW_MEDIA_TYPE or PARQUET_MEDIA_TYPE.
+
+    Returns:
+    Response: The serialized table.
+    """
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    if media_type == PARQUET_MEDIA_TYPE:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=media_type)
+
+
+def npy_response(array: np.ndarray, headers: dict[str, str]) -> Response:
+    """Serializes an array to the NPY format.
+
+    Args:
+    - array (np.ndarray): The array to serialize.
+    - headers (dict[str, str]): Headers describing the array.
+
+    Returns:
+    Response: The serialized array.
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return Response(
+        content=buffer.getvalue(), media_type=NPY_MEDIA_TYPE, headers=headers
+    )
+
+
+def dictionary_column(
+    indices: np.ndarray, labels: list[str], mask: np.ndarray | None = None
+) -> "pa.Array":
+    """Creates a dictionary encoded string column without creating
+    a Python string per row.
+
+    Args:
+    - indices (np.ndarray): The index of the label of every row.
+    - labels (list[str]): The labels.
+    - mask (np.ndarray | None): Rows that are null.
+
+    Returns:
+    pa.Array: The dictionary encoded column.
+    """
+    return pa.DictionaryArray.from_arrays(
+        pa.array(indices.astype(np.int32), mask=mask),
+        pa.array(labels, type=pa.string()),
+    )
+
+
+def soil_map_value_columns(
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    values: list[np.ndarray],
+    id_columns: dict[str, np.ndarray],
+) -> dict:
+    """Creates the columns of a long table with one row per location and
+    available soil map, built directly from the sampled arrays. Soilgrids
+    no data values are null.
+
+    Args:
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - values (list[np.ndarray]): The sampled values of every soil map, with
+        one value per location.
+    - id_columns (dict[str, np.ndarray]): Columns identifying the locations.
+
+    Returns:
+    dict: The id columns followed by the property, depth, value_type and
+        value columns.
+    """
+    available = [
+        (soil_map, value.ravel())
+        for soil_map, value in zip(soil_maps, values)
+        if soil_map[-1] is not None
+    ]
+    num_locations = np.size(next(iter(id_columns.values())))
+    map_indices = np.repeat(np.arange(len(available)), num_locations)
+    value_column = np.concatenate(
+        [np.empty(0, dtype=np.int16), *(value for _, value in available)]
+    )
+    columns = {
+        name: np.tile(np.asarray(column).ravel(), len(available))
+        for name, column in id_columns.items()
+    }
+    columns["property"] = dictionary_column(
+        map_indices, [property.value for (property, *_), _ in available]
+    )
+    columns["depth"] = dictionary_column(
+        map_indices, [depth.value for (_, depth, *_), _ in available]
+    )
+    columns["value_type"] = dictionary_column(
+        map_indices, [value_type.value for (*_, value_type, _), _ in available]
+    )
+    columns["value"] = pa.array(
+        value_column,
+        mask=np.isin(value_column, constants.NO_DATA_VALS_SOILGRIDS),
+    )
+    return columns
+
+
+def soil_map_statistics_columns(
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    statistics: list[tuple[dict, float] | None],
+    percentiles: list[float],
+) -> dict:
+    """Creates the columns of a table with one row per available soil map
+    and its statistics. Statistics of soil maps without values are null.
+
+    Args:
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - statistics (list[tuple[dict, float] | None]): The statistics and the
+        pixel size they are based on for every soil map, or None for soil
+        maps that are not available.
+    - percentiles (list[float]): The queried percentiles.
+
+    Returns:
+    dict: The property, depth, value_type, resolution, count, mean, min,
+        max and std columns, and a percentile_<percentile> column for
+        every percentile.
+    """
+    rows = [
+        (soil_map, *map_statistics)
+        for soil_map, map_statistics in zip(soil_maps, statistics)
+        if map_statistics is not None
+    ]
+    columns = {
+        "property": pa.array(
+            [property.value for (property, *_), *_ in rows], type=pa.string()
+        ),
+        "depth": pa.array(
+            [depth.value for (_, depth, *_), *_ in rows], type=pa.string()
+        ),
+        "value_type": pa.array(
+            [value_type.value for (*_, value_type, _), *_ in rows], type=pa.string()
+        ),
+        "resolution": pa.array([resolution for *_, resolution in rows], pa.float64()),
+        "count": pa.array([values["count"] for _, values, _ in rows], pa.int64()),
+    }
+    for name in ["mean", "min", "max", "std"]:
+        columns[name] = pa.array(
+            [values.get(name) for _, values, _ in rows], pa.float64()
+        )
+    for index, percentile in enumerate(percentiles):
+        columns[f"percentile_{percentile:g}"] = pa.array(
+            [
+                values["percentiles"][index][1] if "percentiles" in values else None
+                for _, values, _ in rows
+            ],
+            pa.float64(),
+        )
+    return columns
+
+
+def soil_type_column(codes: np.ndarray, mask: np.ndarray | None = None) -> "pa.Array":
+    """Creates a dictionary encoded column of soil type names from
+    WRB class codes.
+
+    Args:
+    - codes (np.ndarray): The WRB class codes.
+    - mask (np.ndarray | None): Rows that are null.
+
+    Returns:
+    pa.Array: The soil type names.
+    """
+    labels = [
+        soil_type_dict[code].name if code in soil_type_dict else str(code)
+        for code in range(256)
+    ]
+    return dictionary_column(np.asarray(codes), labels, mask)
+
+
+def soil_type_batch_columns(
+    most_probable_codes: np.ndarray,
+    top_k_codes: np.ndarray,
+    top_k_probabilities: np.ndarray,
+    id_columns: dict[str, np.ndarray],
+) -> dict:
+    """Creates the columns of a table with one row per location with the
+    most probable soil type and the top k soil types and probabilities.
+    Soil types with a probability of 0 are null, like in the JSON response.
+
+    Args:
+    - most_probable_codes (np.ndarray): The most probable WRB class code
+        of every location.
+    - top_k_codes (np.ndarray): The WRB class codes of the top k soil types
+        of every location, with one column per rank.
+    - top_k_probabilities (np.ndarray): The probabilities of the top k
+        soil types of every location, with one column per rank.
+    - id_columns (dict[str, np.ndarray]): Columns identifying the locations.
+
+    Returns:
+    dict: The id columns followed by the most_probable_soil_type column and
+        a soil_type_<rank> and probability_<rank> column for every rank.
+    """
+    columns = dict(id_columns)
+    columns["most_probable_soil_type"] = soil_type_column(most_probable_codes)
+    for rank in range(top_k_codes.shape[1]):
+        missing = top_k_probabilities[:, rank] == 0
+        columns[f"soil_type_{rank + 1}"] = soil_type_column(
+            top_k_codes[:, rank], missing
+        )
+        columns[f"probability_{rank + 1}"] = pa.array(
+            top_k_probabilities[:, rank], mask=missing
+        )
+    return columns
+
+
+def soil_type_count_columns(types_counts: dict[int, int], resolution: float) -> dict:
+    """Creates the columns of a table with one row per soil type and its
+    number of occurrences, sorted by the number of occurrences.
+
+    Args:
+    - types_counts (dict[int, int]): The number of occurrences of every
+        WRB class code.
+    - resolution (float): The pixel size the counts are based on.
+
+    Returns:
+    dict: The soil_type, count and resolution columns.
+    """
+    counts = sorted(types_counts.items(), key=lambda x: x[1], reverse=True)
+    return {
+        "soil_type": soil_type_column(np.array([code for code, _ in counts], int)),
+        "count": pa.array([count for _, count in counts], pa.int64()),
+        "resolution": pa.array([resolution] * len(counts), pa.float64()),
+    }
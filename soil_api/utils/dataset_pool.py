@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, TypeVar
+
+import rasterio
+from rasterio.io import DatasetReader
+
+from soil_api.config import settings
+
+T = TypeVar("T")
+
+
+class ThreadHandles:
+    """The open handles of one thread, keyed by raster path and overview
+    level, in least recently used order. The lock is held while a handle
+    is in use, so that other threads can close idle handles safely.
+    """
+
+    def __init__(self):
+        self.handles: OrderedDict = OrderedDict()
+        self.lock = threading.RLock()
+
+
+class DatasetPool:
+    """A pool of open raster datasets, keyed by raster path.
+
+    GDAL dataset handles are not thread-safe, so every thread gets its own
+    set of handles, keyed by raster path and overview level. Each set is
+    bounded by an LRU policy. Handles that have not been used for
+    `idle_timeout` seconds are closed by a sweep over the sets of all
+    threads, so the handles of threads that stop receiving work are
+    closed as well. The sweep runs at most every `idle_timeout / 2`
+    seconds, and skips the sets that are in use.
+
+    Args:
+    - max_size (int): Maximum number of open handles per thread.
+    - idle_timeout (float): Seconds after which an unused handle is closed.
+    """
+
+    def __init__(self, max_size: int, idle_timeout: float):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all_handles: list[ThreadHandles] = []
+        self._last_sweep = time.monotonic()
+
+    def _thread_handles(self) -> ThreadHandles:
+        thread_handles = getattr(self._local, "handles", None)
+        if thread_handles is None:
+            thread_handles = ThreadHandles()
+            self._local.handles = thread_handles
+            with self._lock:
+                self._all_handles.append(thread_handles)
+        return thread_handles
+
+    def sweep(self) -> None:
+        """Closes the handles of all threads that have been idle for more
+        than `idle_timeout` seconds. Sets of handles that another thread is
+        using are skipped until the next sweep."""
+        now = time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            all_handles = list(self._all_handles)
+        for thread_handles in all_handles:
+            if not thread_handles.lock.acquire(blocking=False):
+                continue
+            try:
+                handles = thread_handles.handles
+                expired = [
+                    key
+                    for key, (_, last_used) in handles.items()
+                    if now - last_used > self.idle_timeout
+                ]
+                for key in expired:
+                    handles.pop(key)[0].close()
+            finally:
+                thread_handles.lock.release()
+
+    def _acquire(
+        self, raster_path: str, overview_level: int | None
+    ) -> tuple[DatasetReader, bool]:
+        handles = self._thread_handles().handles
+        now = time.monotonic()
+        if now - self._last_sweep > self.idle_timeout / 2:
+            self.sweep()
+
+        key = (raster_path, overview_level)
+        entry = handles.pop(key, None)
+        reused = entry is not None and not entry[0].closed
+        if reused:
+            src = entry[0]
+        elif overview_level is None:
+            src = rasterio.open(raster_path)
+        else:
+            src = rasterio.open(raster_path, overview_level=overview_level)
+        handles[key] = (src, now)
+
+        # Evict the least recently used handles
+        while len(handles) > self.max_size:
+            _, (evicted, _) = handles.popitem(last=False)
+            evicted.close()
+        return src, reused
+
+    def get(self, raster_path: str, overview_level: int | None = None) -> DatasetReader:
+        """Returns an open dataset for the raster, owned by the calling thread.
+        Other threads may close the dataset once it has been idle for
+        `idle_timeout` seconds, so prefer `run`, which holds it in use.
+
+        Args:
+        - raster_path (str): Path to the raster file.
+        - overview_level (int | None): Overview level to open, or None
+            for full resolution.
+
+        Returns:
+        DatasetReader: The open dataset.
+        """
+        return self._acquire(raster_path, overview_level)[0]
+
+    def discard(self, raster_path: str, overview_level: int | None = None) -> None:
+        """Closes and forgets the calling thread's handle for the raster."""
+        entry = self._thread_handles().handles.pop((raster_path, overview_level), None)
+        if entry is not None:
+            entry[0].close()
+
+    def run(
+        self,
+        raster_path: str,
+        func: Callable[[DatasetReader], T],
+        overview_level: int | None = None,
+    ) -> T:
+        """Calls `func` with a pooled dataset for the raster.
+        If a reused handle fails, it is re-opened and `func` is retried once.
+
+        Args:
+        - raster_path (str): Path to the raster file.
+        - func (Callable): Function to call with the open dataset.
+        - overview_level (int | None): Overview level to open, or None
+            for full resolution.
+
+        Returns:
+        The return value of `func`.
+        """
+        with self._thread_handles().lock:
+            src, reused = self._acquire(raster_path, overview_level)
+            try:
+                return func(src)
+            except rasterio.errors.RasterioError:
+                self.discard(raster_path, overview_level)
+                if not reused:
+                    raise
+            return func(self.get(raster_path, overview_level))
+
+    def size(self) -> int:
+        """Returns the number of open handles across all threads."""
+        with self._lock:
+            return sum(len(handles.handles) for handles in self._all_handles)
+
+    def close(self) -> None:
+        """Closes all handles of all threads.
+        Only call this when no thread is using the pool.
+        """
+        with self._lock:
+            for thread_handles in self._all_handles:
+                with thread_handles.lock:
+                    while thread_handles.handles:
+                        _, (src, _) = thread_handles.handles.popitem()
+                        src.close()
+
+
+dataset_pool = DatasetPool(
+    max_size=settings.raster_pool_size,
+    idle_timeout=settings.raster_pool_idle_timeout,
+)
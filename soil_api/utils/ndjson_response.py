@@ -0,0 +1,58 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from soil_api.config import settings
+from soil_api.utils.columnar_response import NDJSON_MEDIA_TYPE
+
+
+def ndjson_response(
+    extract_features: Callable[[slice], Awaitable[list[BaseModel]]],
+    num_items: int,
+    chunk_size: int | None = None,
+    **dump_options,
+) -> StreamingResponse:
+    """Streams features as newline delimited JSON, one chunk of items at
+    a time. The next chunk is extracted while the current one is sent, so
+    at most two chunks are in memory regardless of the number of items.
+
+    Args:
+    - extract_features (Callable): Extracts the features of a slice of items.
+    - num_items (int): The number of items.
+    - chunk_size (int | None): Number of items per chunk. Defaults to
+        settings.stream_chunk_size.
+    - dump_options: Options for serializing each feature, like the
+        response_model_exclude options of the route.
+
+    Returns:
+    StreamingResponse: The streamed features, in the order of the items.
+    """
+    chunk_size = chunk_size or settings.stream_chunk_size
+    chunks = [
+        slice(start, min(start + chunk_size, num_items))
+        for start in range(0, num_items, chunk_size)
+    ]
+
+    async def stream_lines() -> AsyncIterator[str]:
+        pending = None
+        try:
+            for index, chunk in enumerate(chunks):
+                if pending is None:
+                    pending = asyncio.ensure_future(extract_features(chunk))
+                features = await pending
+                pending = None
+                # Start extracting the next chunk before sending this one
+                if index + 1 < len(chunks):
+                    pending = asyncio.ensure_future(extract_features(chunks[index + 1]))
+                yield "".join(
+                    feature.model_dump_json(by_alias=True, **dump_options) + "\n"
+                    for feature in features
+                )
+        finally:
+            # Stop extracting if the client disconnected
+            if pending is not None:
+                pending.cancel()
+
+    return StreamingResponse(stream_lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Callable
+
+import numpy as np
+from prometheus_client import Histogram
+
+from soil_api.config import settings
+from soil_api.utils.raster_executor import raster_executor
+
+BATCH_SIZE = Histogram(
+    "soil_api_point_batch_size",
+    "Number of points sampled together by a batched raster read",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+PendingRead = tuple[float, float, asyncio.Future]
+
+
+class PointBatcher:
+    """Merges point reads of concurrent requests into batched raster reads.
+    Point reads are collected for up to `window` seconds, or until
+    `max_points` points are waiting, and then every raster is sampled at all
+    of its collected points. The rasters are split into jobs of at most
+    settings.raster_fused_job_size rasters, and each job runs in a single
+    call on the raster I/O executor.
+    The sampling groups the points by block, so nearby points of different
+    requests share a single block read. This adds at most `window` seconds
+    of latency to every read.
+
+    Args:
+    - sample (Callable): Samples a raster at arrays of y and x coordinates
+        and returns an array of values.
+    - window (float): Seconds to collect point reads for.
+    - max_points (int): Number of waiting points that triggers a read
+        before the window ends.
+    """
+
+    def __init__(
+        self,
+        sample: Callable[[str, np.ndarray, np.ndarray], np.ndarray],
+        window: float,
+        max_points: int,
+    ):
+        self.sample = sample
+        self.window = window
+        self.max_points = max_points
+        self._pending: dict[str, list[PendingRead]] = {}
+        self._num_pending = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        # Pending reads are bound to the loop they are collected on
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._pending = {}
+            self._num_pending = 0
+            self._flush_handle = None
+            self._loop = loop
+        return loop
+
+    async def sample_rasters(
+        self, raster_paths: list[str], latitude: float, longitude: float
+    ) -> list[int]:
+        """Samples several rasters at the same point in the next batch.
+
+        Args:
+        - raster_paths (list[str]): Paths to raster files.
+        - latitude (float): Y coordinate in the CRS of the rasters.
+        - longitude (float): X coordinate in the CRS of the rasters.
+
+        Returns:
+        list[int]: Values at given point, in the order of raster_paths.
+        """
+        loop = self._get_loop()
+        futures = []
+        for raster_path in raster_paths:
+            future = loop.create_future()
+            self._pending.setdefault(raster_path, []).append(
+                (latitude, longitude, future)
+            )
+            futures.append(future)
+        self._num_pending += len(raster_paths)
+
+        if self._num_pending >= self.max_points:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await asyncio.gather(*futures)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        self._num_pending = 0
+        batches = list(pending.items())
+        job_size = settings.raster_fused_job_size
+        for i in range(0, len(batches), job_size):
+            asyncio.ensure_future(self._read(batches[i : i + job_size]))
+
+    def _sample_rasters(
+        self, samples: list[tuple[str, np.ndarray, np.ndarray]]
+    ) -> list[np.ndarray]:
+        return [
+            self.sample(raster_path, latitudes, longitudes)
+            for raster_path, latitudes, longitudes in samples
+        ]
+
+    async def _read(self, batches: list[tuple[str, list[PendingRead]]]) -> None:
+        samples = []
+        for raster_path, reads in batches:
+            BATCH_SIZE.observe(len(reads))
+            latitudes = np.array([latitude for latitude, _, _ in reads])
+            longitudes = np.array([longitude for _, longitude, _ in reads])
+            samples.append((raster_path, latitudes, longitudes))
+        try:
+            values = await raster_executor.run(self._sample_rasters, samples)
+        except Exception as e:
+            for _, reads in batches:
+                for *_, future in reads:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for (_, reads), raster_values in zip(batches, values):
+            for index, (*_, future) in enumerate(reads):
+                # The requests that were cancelled while waiting are skipped
+                if not future.done():
+                    future.set_result(raster_values[index])
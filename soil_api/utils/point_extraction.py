@@ -1,12 +1,49 @@
 import asyncio
-from functools import partial
 
+import httpx
+import numpy as np
 import rasterio
+from affine import Affine
 from fastapi import HTTPException
 from rasterio.crs import CRS
-from rasterio.warp import transform_geom
+from rasterio.transform import rowcol
+from rasterio.warp import transform
 
 from soil_api import constants
+from soil_api.config import settings
+from soil_api.utils.block_cache import block_cache, sample_points
+from soil_api.utils.cog_reader import UnsupportedTiffError
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.point_batcher import PointBatcher
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.raster_manifest import RasterInfo, get_raster_manifest
+from soil_api.utils.single_flight import point_reads, wait_for_reads
+
+WGS84_CRS = CRS.from_epsg(4326)
+HOMOLOSINE_CRS = CRS.from_wkt(constants.HOMOLOSINE_CRS_WKT)
+
+_raster_transforms: dict[str, Affine] = {}
+
+
+def transform_coordinates_to_homolosine_crs_array(
+    latitudes: np.ndarray, longitudes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Transforms arrays of coordinates to the Homolosine CRS in one call.
+
+    Args:
+    - latitudes (np.ndarray): Latitudes in decimal degrees.
+    - longitudes (np.ndarray): Longitudes in decimal degrees.
+
+    Returns:
+    tuple: Transformed y and x coordinates as arrays.
+    """
+    xs, ys = transform(
+        WGS84_CRS,
+        HOMOLOSINE_CRS,
+        np.asarray(longitudes, dtype=np.float64).ravel(),
+        np.asarray(latitudes, dtype=np.float64).ravel(),
+    )
+    return np.asarray(ys), np.asarray(xs)
 
 
 def transfrom_coordinates_to_homolosine_crs(
@@ -21,20 +58,124 @@ def transfrom_coordinates_to_homolosine_crs(
     Returns:
     tuple: Transformed coordinates.
     """
-    feature = {"type": "Point", "coordinates": [longitude, latitude]}
-    crs = CRS.from_string(constants.HOMOLOSINE_CRS_WKT)
-    feature_proj = transform_geom(CRS.from_epsg(4326), crs, feature)
-    latitude = feature_proj["coordinates"][1]
-    longitude = feature_proj["coordinates"][0]
-    return latitude, longitude
+    ys, xs = transform_coordinates_to_homolosine_crs_array([latitude], [longitude])
+    return float(ys[0]), float(xs[0])
 
 
-async def extract_point_from_raster(
-    raster_path: str, latitude: float, longitude: float
-) -> int:
-    """Extracts value from raster at given point.
-    If raster_path is None, returns constants.NO_DATA_VAL.
-    If the raster file cannot be read, returns an HTTPException.
+def transform_geometry_to_homolosine_crs(
+    geometry: dict, segment_points: int = 16
+) -> dict:
+    """Transforms a GeoJSON Polygon or MultiPolygon to the Homolosine CRS.
+    Every edge is densified first, because straight edges in decimal degrees
+    are curved in the Homolosine CRS.
+
+    Args:
+    - geometry (dict): A GeoJSON Polygon or MultiPolygon in decimal degrees.
+    - segment_points (int): Number of points to split every edge into.
+
+    Returns:
+    dict: The GeoJSON geometry in the Homolosine CRS.
+    """
+    polygons = geometry["coordinates"]
+    if geometry["type"] == "Polygon":
+        polygons = [polygons]
+    steps = np.arange(segment_points) / segment_points
+    transformed_polygons = []
+    for polygon in polygons:
+        transformed_rings = []
+        for ring in polygon:
+            positions = np.asarray(ring, dtype=np.float64)
+            starts, ends = positions[:-1], positions[1:]
+            densified = (
+                starts[:, None, :] + steps[None, :, None] * (ends - starts)[:, None, :]
+            )
+            densified = np.vstack([densified.reshape(-1, 2), positions[-1:]])
+            ys, xs = transform_coordinates_to_homolosine_crs_array(
+                latitudes=densified[:, 1], longitudes=densified[:, 0]
+            )
+            transformed_rings.append(np.column_stack([xs, ys]).tolist())
+        transformed_polygons.append(transformed_rings)
+    if geometry["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": transformed_polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": transformed_polygons}
+
+
+async def get_raster_transform(raster_path: str) -> Affine:
+    """Returns the geotransform of the raster. The geotransform of a raster
+    never changes, so it is only read once per raster, or taken from the
+    raster manifest without any read.
+
+    Args:
+    - raster_path (str): Path to raster file.
+
+    Returns:
+    Affine: The geotransform of the raster.
+    """
+    if raster_path not in _raster_transforms:
+        manifest = get_raster_manifest()
+        raster_info = manifest.get(raster_path) if manifest is not None else None
+        if raster_info is not None:
+            _raster_transforms[raster_path] = raster_info.transform
+            return raster_info.transform
+        try:
+            _raster_transforms[raster_path] = await raster_executor.run(
+                dataset_pool.run, raster_path, lambda src: src.transform
+            )
+        except rasterio.errors.RasterioIOError as e:
+            # return HTTP exception
+            raise HTTPException(
+                status_code=404,
+                detail=f"Error reading raster file: {raster_path}. Due to: {str(e)}",
+            )
+    return _raster_transforms[raster_path]
+
+
+def pixel_index(
+    raster_transform: Affine, latitude: float, longitude: float
+) -> tuple[int, int]:
+    """Returns the row and column of the pixel that contains the point.
+
+    Args:
+    - raster_transform (Affine): The geotransform of the raster.
+    - latitude (float): Latitude in the CRS of the raster.
+    - longitude (float): Longitude in the CRS of the raster.
+
+    Returns:
+    tuple[int, int]: Row and column of the pixel.
+    """
+    row, col = rowcol(raster_transform, longitude, latitude)
+    return int(row), int(col)
+
+
+def sample_raster(raster_path: str, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Samples the raster at many points using the block cache. If the
+    raster is in the raster manifest, the points are mapped to blocks from
+    the manifest and only the blocks that are not cached are read.
+    Otherwise the raster is opened from the dataset pool.
+    Must run on a single thread, since pooled datasets are thread-affine.
+
+    Args:
+    - raster_path (str): Path to raster file.
+    - xs (np.ndarray): X coordinates in the CRS of the raster.
+    - ys (np.ndarray): Y coordinates in the CRS of the raster.
+
+    Returns:
+    np.ndarray: Values at the given points.
+    """
+    manifest = get_raster_manifest()
+    raster_info = manifest.get(raster_path) if manifest is not None else None
+    if raster_info is not None:
+        return sample_points(
+            raster_info, raster_path, xs, ys, read=raster_info.read_block
+        )
+    return dataset_pool.run(
+        raster_path, lambda src: sample_points(src, raster_path, xs, ys)
+    )
+
+
+def sample_point(raster_path: str, latitude: float, longitude: float) -> int:
+    """Samples the raster at the given point using the block cache.
+    Must run on a single thread, since pooled datasets are thread-affine.
 
     Args:
     - raster_path (str): Path to raster file.
@@ -44,20 +185,241 @@ async def extract_point_from_raster(
     Returns:
     int: Value at given point.
     """
-    if raster_path is None:
-        return constants.NO_DATA_VAL
-    loop = asyncio.get_running_loop()
-    try:
-        src = await loop.run_in_executor(None, rasterio.open, raster_path)
-        value_generator = await loop.run_in_executor(
-            None, partial(src.sample, [[longitude, latitude]])
+    return sample_raster(raster_path, [longitude], [latitude])[0]
+
+
+def sample_rasters_at_point(
+    raster_paths: list[str | None], latitude: float, longitude: float
+) -> list[int]:
+    """Samples several rasters at the same point as a single unit of work,
+    so that opening, sampling and releasing the datasets all happen on the
+    calling thread. Rasters whose path is None get constants.NO_DATA_VAL.
+    If a raster file cannot be read, raises an HTTPException.
+
+    Args:
+    - raster_paths (list[str | None]): Paths to raster files.
+    - latitude (float): Latitude in decimal degrees.
+    - longitude (float): Longitude in decimal degrees.
+
+    Returns:
+    list[int]: Values at given point, in the order of raster_paths.
+    """
+    values = []
+    for raster_path in raster_paths:
+        if raster_path is None:
+            values.append(constants.NO_DATA_VAL)
+            continue
+        try:
+            values.append(sample_point(raster_path, latitude, longitude))
+        except rasterio.errors.RasterioIOError as e:
+            # return HTTP exception
+            raise HTTPException(
+                status_code=404,
+                detail=f"Error reading raster file: {raster_path}. Due to: {str(e)}",
+            )
+    return values
+
+
+def get_cog_raster(raster_path: str) -> RasterInfo | None:
+    """Returns the manifest entry of the raster if it can be read with the
+    COG reader, or None if it has to be read through GDAL."""
+    if not settings.cog_reader_enabled:
+        return None
+    manifest = get_raster_manifest()
+    raster_info = manifest.get(raster_path) if manifest is not None else None
+    if raster_info is None or raster_info.cog_urls is None:
+        return None
+    return raster_info
+
+
+async def sample_cog_raster(raster_path: str, latitude: float, longitude: float) -> int:
+    """Samples a raster at the given point using the block cache, reading
+    missing blocks from the remote COGs of the raster on the event loop.
+    Rasters with COGs that the COG reader cannot decode are sampled through
+    GDAL on the raster I/O executor. If a COG cannot be fetched, raises
+    an HTTPException.
+
+    Args:
+    - raster_path (str): Path to a raster with cog_urls in the manifest.
+    - latitude (float): Latitude in the CRS of the raster.
+    - longitude (float): Longitude in the CRS of the raster.
+
+    Returns:
+    int: Value at given point.
+    """
+    raster_info = get_cog_raster(raster_path)
+    row, col = pixel_index(raster_info.transform, latitude, longitude)
+    if not (0 <= row < raster_info.height and 0 <= col < raster_info.width):
+        return np.asarray(raster_info.nodata or 0, dtype=raster_info.dtypes[0])[()]
+    block_height, block_width = raster_info.block_shapes[0]
+    block_row, block_col = row // block_height, col // block_width
+    key = (raster_path, block_row, block_col)
+    block = block_cache.get(key)
+    if block is None:
+        try:
+            block = await raster_info.read_block_async(block_row, block_col)
+        except UnsupportedTiffError:
+            return await raster_executor.run(
+                sample_point, raster_path, latitude, longitude
+            )
+        except httpx.HTTPError as e:
+            # return HTTP exception
+            raise HTTPException(
+                status_code=404,
+                detail=f"Error reading raster file: {raster_path}. Due to: {str(e)}",
+            )
+        block_cache.put(key, block)
+    return block[row - block_row * block_height, col - block_col * block_width]
+
+
+async def sample_cog_rasters(
+    raster_paths: list[str], latitude: float, longitude: float
+) -> list[int]:
+    """Samples several rasters at the same point with sample_cog_raster."""
+    return await asyncio.gather(
+        *(sample_cog_raster(path, latitude, longitude) for path in raster_paths)
+    )
+
+
+async def extract_point_from_rasters(
+    raster_paths: list[str | None], latitude: float, longitude: float
+) -> list[int]:
+    """Extracts values from several rasters at given point.
+    The rasters are split into jobs of at most settings.raster_fused_job_size
+    rasters, and each job runs in a single call on the raster I/O executor.
+    If settings.point_batch_window is set, the reads are instead merged with
+    the point reads of concurrent requests by the point batcher.
+    If settings.cog_reader_enabled is set, rasters in the raster manifest
+    that are VRTs of remote COGs are read on the event loop instead.
+    Concurrent extractions of the same pixel of a raster share a single read.
+    Rasters whose path is None get constants.NO_DATA_VAL.
+
+    Args:
+    - raster_paths (list[str | None]): Paths to raster files.
+    - latitude (float): Latitude in decimal degrees.
+    - longitude (float): Longitude in decimal degrees.
+
+    Returns:
+    list[int]: Values at given point, in the order of raster_paths.
+    """
+    # Join the in-flight reads of the same pixels, and read the other rasters
+    paths = [path for path in dict.fromkeys(raster_paths) if path is not None]
+    raster_transforms = await asyncio.gather(*map(get_raster_transform, paths))
+    keys = {}
+    futures = {}
+    for raster_path, raster_transform in zip(paths, raster_transforms):
+        keys[raster_path] = (
+            raster_path,
+            *pixel_index(raster_transform, latitude, longitude),
+        )
+        future = point_reads.get(keys[raster_path])
+        if future is not None:
+            futures[raster_path] = future
+    unread_paths = [path for path in keys if path not in futures]
+
+    cog_paths = [path for path in unread_paths if get_cog_raster(path) is not None]
+    if cog_paths:
+        job_futures = point_reads.start(
+            [keys[path] for path in cog_paths],
+            sample_cog_rasters(cog_paths, latitude, longitude),
         )
-        value = next(value_generator)[0]
-        src.close()
+        futures.update(zip(cog_paths, job_futures))
+        unread_paths = [path for path in unread_paths if path not in futures]
+
+    if point_batcher.enabled and unread_paths:
+        job_futures = point_reads.start(
+            [keys[path] for path in unread_paths],
+            point_batcher.sample_rasters(unread_paths, latitude, longitude),
+        )
+        futures.update(zip(unread_paths, job_futures))
+    elif unread_paths:
+        job_size = settings.raster_fused_job_size
+        for i in range(0, len(unread_paths), job_size):
+            job_paths = unread_paths[i : i + job_size]
+            job_futures = point_reads.start(
+                [keys[path] for path in job_paths],
+                raster_executor.run(
+                    sample_rasters_at_point, job_paths, latitude, longitude
+                ),
+            )
+            futures.update(zip(job_paths, job_futures))
+
+    values = dict(zip(futures, await wait_for_reads(list(futures.values()))))
+    return [values.get(path, constants.NO_DATA_VAL) for path in raster_paths]
+
+
+def sample_raster_at_points(
+    raster_path: str, latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    """Samples a raster at many points using the block cache, reading
+    each block that contains a point only once.
+    If the raster file cannot be read, raises an HTTPException.
+
+    Args:
+    - raster_path (str): Path to raster file.
+    - latitudes (np.ndarray): Latitudes in the CRS of the raster.
+    - longitudes (np.ndarray): Longitudes in the CRS of the raster.
+
+    Returns:
+    np.ndarray: Values at the given points.
+    """
+    try:
+        return sample_raster(raster_path, longitudes, latitudes)
     except rasterio.errors.RasterioIOError as e:
         # return HTTP exception
         raise HTTPException(
             status_code=404,
             detail=f"Error reading raster file: {raster_path}. Due to: {str(e)}",
         )
-    return value
+
+
+point_batcher = PointBatcher(
+    sample_raster_at_points,
+    window=settings.point_batch_window,
+    max_points=settings.point_batch_max_points,
+)
+
+
+async def extract_points_from_rasters(
+    raster_paths: list[str | None], latitudes: np.ndarray, longitudes: np.ndarray
+) -> list[np.ndarray]:
+    """Extracts values from several rasters at many points.
+    Every raster is sampled at all points in a single call on the raster
+    I/O executor. Rasters whose path is None get constants.NO_DATA_VAL.
+
+    Args:
+    - raster_paths (list[str | None]): Paths to raster files.
+    - latitudes (np.ndarray): Latitudes in the CRS of the rasters.
+    - longitudes (np.ndarray): Longitudes in the CRS of the rasters.
+
+    Returns:
+    list[np.ndarray]: Values at the given points, one array per raster.
+    """
+
+    async def extract(raster_path: str | None) -> np.ndarray:
+        if raster_path is None:
+            return np.full(len(latitudes), constants.NO_DATA_VAL)
+        return await raster_executor.run(
+            sample_raster_at_points, raster_path, latitudes, longitudes
+        )
+
+    return await asyncio.gather(*(extract(path) for path in raster_paths))
+
+
+async def extract_point_from_raster(
+    raster_path: str, latitude: float, longitude: float
+) -> int:
+    """Extracts value from raster at given point.
+    If raster_path is None, returns constants.NO_DATA_VAL.
+    If the raster file cannot be read, returns an HTTPException.
+
+    Args:
+    - raster_path (str): Path to raster file.
+    - latitude (float): Latitude in decimal degrees.
+    - longitude (float): Longitude in decimal degrees.
+
+    Returns:
+    int: Value at given point.
+    """
+    values = await extract_point_from_rasters([raster_path], latitude, longitude)
+    return values[0]
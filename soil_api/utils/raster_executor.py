@@ -0,0 +1,146 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from prometheus_client import Counter, Gauge, Histogram
+
+from soil_api.config import settings
+
+QUEUE_DEPTH = Gauge(
+    "soil_api_raster_io_queue_depth",
+    "Number of raster I/O jobs waiting for a worker",
+)
+ACTIVE_WORKERS = Gauge(
+    "soil_api_raster_io_active_workers",
+    "Number of raster I/O workers currently running a job",
+)
+WAIT_TIME = Histogram(
+    "soil_api_raster_io_wait_seconds",
+    "Time raster I/O jobs spent waiting before a worker picked them up",
+)
+REJECTED = Counter(
+    "soil_api_raster_io_rejected_total",
+    "Number of raster I/O jobs rejected because the executor was saturated",
+)
+
+
+class RasterExecutor:
+    """A dedicated thread pool for blocking raster I/O with admission control.
+
+    At most `max_workers + max_queue_size` jobs are admitted at a time. When
+    the executor is saturated, new jobs wait up to `queue_timeout` seconds
+    for a slot before they are rejected with an HTTP 503.
+
+    Args:
+    - max_workers (int): Number of worker threads.
+    - max_queue_size (int): Number of admitted jobs that may wait for a worker.
+    - queue_timeout (float): Seconds to wait for a slot. 0 rejects immediately.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, queue_timeout: float):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue_size
+        self.queue_timeout = queue_timeout
+        self.admitted = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="raster-io"
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.capacity)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _admit(self, slots: asyncio.Semaphore) -> None:
+        if not slots.locked():
+            await slots.acquire()
+            return
+        if self.queue_timeout > 0:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+                return
+            except asyncio.TimeoutError:
+                pass
+        REJECTED.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="The service is busy reading soil maps. Please try again later.",
+        )
+
+    def _work(
+        self, started: list[bool], submitted: float, func: Callable, *args: Any
+    ) -> Any:
+        started[0] = True
+        QUEUE_DEPTH.dec()
+        WAIT_TIME.observe(time.monotonic() - submitted)
+        ACTIVE_WORKERS.inc()
+        try:
+            return func(*args)
+        finally:
+            ACTIVE_WORKERS.dec()
+
+    def _release(self, slots: asyncio.Semaphore) -> None:
+        self.admitted -= 1
+        slots.release()
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Runs `func(*args)` on a raster I/O worker thread.
+        If no slot frees up in time, raises an HTTPException with status code 503.
+        If the caller is cancelled, a job that has not started is dropped, and
+        a job that has started keeps its slot until it finishes.
+
+        Args:
+        - func (Callable): The blocking function to run.
+        - args: Positional arguments for `func`.
+
+        Returns:
+        The return value of `func`.
+        """
+        submitted = time.monotonic()
+        QUEUE_DEPTH.inc()
+        slots = self._get_slots()
+        try:
+            await self._admit(slots)
+        except BaseException:
+            QUEUE_DEPTH.dec()
+            raise
+        self.admitted += 1
+        loop = asyncio.get_running_loop()
+        started = [False]
+        try:
+            future = self._executor.submit(self._work, started, submitted, func, *args)
+        except BaseException:
+            QUEUE_DEPTH.dec()
+            self._release(slots)
+            raise
+
+        def done(future: Future) -> None:
+            # A job cancelled before a worker picked it up is still queued
+            if not started[0]:
+                QUEUE_DEPTH.dec()
+            try:
+                loop.call_soon_threadsafe(self._release, slots)
+            except RuntimeError:
+                # The loop is closed, so its slots are not used anymore
+                pass
+
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Waits for running jobs and stops the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+raster_executor = RasterExecutor(
+    max_workers=settings.raster_executor_workers,
+    max_queue_size=settings.raster_executor_max_queue_size,
+    queue_timeout=settings.raster_executor_queue_timeout,
+)
@@ -0,0 +1,436 @@
+import asyncio
+import logging
+import math
+import os
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.dtypes import dtype_rev, typename_fwd
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+
+from soil_api.config import settings
+from soil_api.utils.block_cache import block_cache
+from soil_api.utils.cog_reader import cog_reader
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.raster_source import RasterSource
+
+logger = logging.getLogger(__name__)
+
+# Children of a VRT source that do not change the values read from it,
+# as long as its NODATA is the no data value of the band
+PASSTHROUGH_SOURCE_TAGS = {
+    "SourceFilename",
+    "SourceBand",
+    "SourceProperties",
+    "SrcRect",
+    "DstRect",
+    "NODATA",
+}
+
+
+class RasterInfo:
+    """The metadata of a raster that is needed to sample it, snapshotted
+    in a raster manifest. It has the same attributes as an open dataset for
+    sampling, so the raster can be sampled without opening it.
+
+    For VRTs, the sources are the tiles of the VRT that are copied without
+    resampling or scaling, as rows of (source band, source column offset,
+    source row offset, column offset, row offset, width, height, whether
+    no data pixels of the source are transparent). Blocks are then read
+    directly from the tiles they overlap, in the order of the VRT, and
+    blocks outside of all tiles are no data without any read.
+
+    Args:
+    - path (str): Path to the raster file.
+    - transform (Affine): The geotransform of the raster.
+    - shape (tuple[int, int]): The height and width of the raster.
+    - block_shape (tuple[int, int]): The height and width of the blocks.
+    - dtype (str): The data type of the first band.
+    - nodata (float | None): The no data value of the raster.
+    - crs_wkt (str): The CRS of the raster as WKT.
+    - source_paths (list[str] | None): The paths of the VRT sources, or None
+        if the raster is not a VRT whose sources are all known.
+    - source_rects (np.ndarray): The windows of the VRT sources.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        transform: Affine,
+        shape: tuple[int, int],
+        block_shape: tuple[int, int],
+        dtype: str,
+        nodata: float | None,
+        crs_wkt: str,
+        source_paths: list[str] | None,
+        source_rects: np.ndarray,
+    ):
+        self.path = path
+        self.transform = transform
+        self.height, self.width = shape
+        self.block_shapes = [block_shape]
+        self.dtypes = [dtype]
+        self.nodata = nodata
+        self.crs_wkt = crs_wkt
+        self.source_paths = source_paths
+        self.source_rects = source_rects
+
+    @property
+    def crs(self) -> CRS:
+        return CRS.from_wkt(self.crs_wkt)
+
+    @classmethod
+    def from_dataset(cls, path: str, src: DatasetReader) -> "RasterInfo":
+        source_paths, source_rects = None, np.empty((0, 8), dtype=np.int64)
+        if src.driver == "VRT":
+            sources = parse_vrt_sources(path, src.tags(ns="xml:VRT")["xml:VRT"], src)
+            if sources is not None:
+                source_paths = [source_path for source_path, _ in sources]
+                source_rects = np.array(
+                    [rect for _, rect in sources], dtype=np.int64
+                ).reshape(-1, 8)
+        return cls(
+            path=path,
+            transform=src.transform,
+            shape=(src.height, src.width),
+            block_shape=src.block_shapes[0],
+            dtype=src.dtypes[0],
+            nodata=src.nodata,
+            crs_wkt=src.crs.to_wkt(),
+            source_paths=source_paths,
+            source_rects=source_rects,
+        )
+
+    def block_window(self, block_row: int, block_col: int) -> Window:
+        """Returns the window of a block, clipped to the raster."""
+        block_height, block_width = self.block_shapes[0]
+        row_off, col_off = block_row * block_height, block_col * block_width
+        return Window(
+            col_off,
+            row_off,
+            min(block_width, self.width - col_off),
+            min(block_height, self.height - row_off),
+        )
+
+    def block_sources(self, window: Window) -> np.ndarray | None:
+        """Returns the indices of the VRT sources that overlap the window,
+        in the order of the VRT, or None if the window has to be read
+        through the raster itself.
+        """
+        if self.source_paths is None:
+            return None
+        col, row, width, height = self.source_rects[:, 3:7].T
+        return np.flatnonzero(
+            (col < window.col_off + window.width)
+            & (col + width > window.col_off)
+            & (row < window.row_off + window.height)
+            & (row + height > window.row_off)
+        )
+
+    def read_block(self, block_row: int, block_col: int) -> np.ndarray:
+        """Reads a block of the first band through the block cache, from
+        the VRT sources it overlaps if they are known.
+        Must run on a single thread, since pooled datasets are thread-affine.
+
+        Args:
+        - block_row (int): Row index of the block.
+        - block_col (int): Column index of the block.
+
+        Returns:
+        np.ndarray: The decoded block. Edge blocks are clipped to the raster.
+        """
+        key = (self.path, int(block_row), int(block_col))
+        return block_cache.get_or_read(key, lambda: self._read(block_row, block_col))
+
+    def _source_windows(
+        self, window: Window, sources: np.ndarray
+    ) -> list[tuple[int, int, Window, tuple[slice, slice], bool]]:
+        # The part of every source that overlaps the window, and where it
+        # goes in the window
+        source_windows = []
+        for source in sources:
+            band, src_col, src_row, col, row, width, height, transparent = (
+                self.source_rects[source].tolist()
+            )
+            c0 = max(col, window.col_off)
+            c1 = min(col + width, window.col_off + window.width)
+            r0 = max(row, window.row_off)
+            r1 = min(row + height, window.row_off + window.height)
+            source_window = Window(
+                c0 - col + src_col, r0 - row + src_row, c1 - c0, r1 - r0
+            )
+            target = (
+                slice(r0 - window.row_off, r1 - window.row_off),
+                slice(c0 - window.col_off, c1 - window.col_off),
+            )
+            source_windows.append(
+                (int(source), band, source_window, target, bool(transparent))
+            )
+        return source_windows
+
+    def _paint(
+        self,
+        window: Window,
+        source_windows: list[tuple[int, int, Window, tuple[slice, slice], bool]],
+        source_values: list[np.ndarray],
+    ) -> np.ndarray:
+        # Paint the sources over the block like GDAL does
+        block = np.full(
+            (window.height, window.width), self.nodata or 0, dtype=self.dtypes[0]
+        )
+        for (*_, target, transparent), values in zip(source_windows, source_values):
+            if transparent:
+                np.copyto(block[target], values, where=values != self.nodata)
+            else:
+                block[target] = values
+        return block
+
+    def _read(self, block_row: int, block_col: int) -> np.ndarray:
+        window = self.block_window(block_row, block_col)
+        sources = self.block_sources(window)
+        if sources is None:
+            return dataset_pool.run(self.path, lambda src: src.read(1, window=window))
+        source_windows = self._source_windows(window, sources)
+        source_values = [
+            dataset_pool.run(
+                self.source_paths[source],
+                lambda src: src.read(band, window=source_window),
+            )
+            for source, band, source_window, *_ in source_windows
+        ]
+        return self._paint(window, source_windows, source_values)
+
+    @property
+    def cog_urls(self) -> list[str] | None:
+        """The URLs of the VRT sources, or None if the raster is not a VRT
+        of GeoTIFFs served over HTTP with known sources."""
+        if self.source_paths is None:
+            return None
+        urls = [path.removeprefix("/vsicurl/") for path in self.source_paths]
+        if not all(url.startswith(("http://", "https://")) for url in urls):
+            return None
+        return urls
+
+    async def read_block_async(self, block_row: int, block_col: int) -> np.ndarray:
+        """Reads a block of the first band from its VRT sources with the
+        COG reader, on the event loop. The raster must have cog_urls.
+        If a source cannot be decoded by the COG reader, raises an
+        UnsupportedTiffError.
+
+        Args:
+        - block_row (int): Row index of the block.
+        - block_col (int): Column index of the block.
+
+        Returns:
+        np.ndarray: The decoded block. Edge blocks are clipped to the raster.
+        """
+        window = self.block_window(block_row, block_col)
+        source_windows = self._source_windows(window, self.block_sources(window))
+        urls = self.cog_urls
+        source_values = await asyncio.gather(
+            *(
+                cog_reader.read_window(urls[source], band, source_window)
+                for source, band, source_window, *_ in source_windows
+            )
+        )
+        return self._paint(window, source_windows, source_values)
+
+
+def parse_vrt_sources(
+    raster_path: str, vrt_xml: str, src: DatasetReader
+) -> list[tuple[str, list[int]]] | None:
+    """Lists the sources of the first band of a VRT. Returns None if any
+    source changes the values it copies, e.g. by resampling or scaling,
+    so that the VRT has to be read through GDAL.
+
+    Args:
+    - raster_path (str): Path to the VRT, for sources relative to it.
+    - vrt_xml (str): The XML of the VRT.
+    - src (DatasetReader): The open VRT.
+
+    Returns:
+    list[tuple[str, list[int]]] | None: The path and row of source_rects
+        of every source.
+    """
+    band_element = ET.fromstring(vrt_xml).find("VRTRasterBand[@band='1']")
+    if band_element is None:
+        return None
+    data_type = typename_fwd[dtype_rev[src.dtypes[0]]]
+    sources = []
+    for element in band_element:
+        if element.tag not in ("SimpleSource", "ComplexSource"):
+            if element.tag.endswith("Source"):
+                return None
+            continue
+        if any(child.tag not in PASSTHROUGH_SOURCE_TAGS for child in element):
+            return None
+        # No data pixels of a source with a NODATA are not copied
+        nodata = element.findtext("NODATA")
+        if nodata is not None and (src.nodata is None or float(nodata) != src.nodata):
+            return None
+        properties = element.find("SourceProperties")
+        if properties is not None and properties.get("DataType") != data_type:
+            return None
+        src_rect, dst_rect = element.find("SrcRect"), element.find("DstRect")
+        if src_rect is None or dst_rect is None:
+            return None
+        rect = [
+            float(rect.get(name))
+            for rect in (src_rect, dst_rect)
+            for name in ("xOff", "yOff", "xSize", "ySize")
+        ]
+        if rect[2:4] != rect[6:8] or any(not value.is_integer() for value in rect):
+            return None
+        if properties is not None and (
+            rect[0] + rect[2] > float(properties.get("RasterXSize", math.inf))
+            or rect[1] + rect[3] > float(properties.get("RasterYSize", math.inf))
+        ):
+            return None
+        filename = element.find("SourceFilename")
+        source_path = filename.text
+        if filename.get("relativeToVRT") == "1":
+            source_path = os.path.join(os.path.dirname(raster_path), source_path)
+        band = int(element.findtext("SourceBand", "1"))
+        src_col, src_row, width, height, col, row = (int(value) for value in rect[:6])
+        transparent = int(nodata is not None)
+        sources.append(
+            (
+                source_path,
+                [band, src_col, src_row, col, row, width, height, transparent],
+            )
+        )
+    return sources
+
+
+class RasterManifest:
+    """A snapshot of the metadata of the rasters the API reads, so that
+    points can be mapped to blocks and tiles without opening the rasters.
+
+    Args:
+    - rasters (list[RasterInfo]): The rasters in the manifest.
+    """
+
+    def __init__(self, rasters: list[RasterInfo]):
+        self.rasters = {raster.path: raster for raster in rasters}
+
+    def get(self, raster_path: str) -> RasterInfo | None:
+        """Returns the manifest entry of the raster, or None if the raster
+        is not in the manifest."""
+        return self.rasters.get(raster_path)
+
+    @classmethod
+    def load(cls, path: str) -> "RasterManifest":
+        with np.load(path) as data:
+            offsets = data["source_offsets"]
+            rasters = [
+                RasterInfo(
+                    path=str(raster_path),
+                    transform=Affine(*data["transforms"][i]),
+                    shape=tuple(data["shapes"][i].tolist()),
+                    block_shape=tuple(data["block_shapes"][i].tolist()),
+                    dtype=str(data["dtypes"][i]),
+                    nodata=(
+                        None
+                        if np.isnan(data["nodata"][i])
+                        else float(data["nodata"][i])
+                    ),
+                    crs_wkt=str(data["crs_wkts"][i]),
+                    source_paths=(
+                        data["source_paths"][offsets[i] : offsets[i + 1]].tolist()
+                        if data["has_sources"][i]
+                        else None
+                    ),
+                    source_rects=data["source_rects"][offsets[i] : offsets[i + 1]],
+                )
+                for i, raster_path in enumerate(data["paths"])
+            ]
+        return cls(rasters)
+
+    def save(self, path: str) -> None:
+        rasters = list(self.rasters.values())
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                paths=np.array([raster.path for raster in rasters], dtype=str),
+                transforms=np.array(
+                    [raster.transform[:6] for raster in rasters], dtype=np.float64
+                ).reshape(-1, 6),
+                shapes=np.array(
+                    [(raster.height, raster.width) for raster in rasters],
+                    dtype=np.int64,
+                ).reshape(-1, 2),
+                block_shapes=np.array(
+                    [raster.block_shapes[0] for raster in rasters], dtype=np.int64
+                ).reshape(-1, 2),
+                dtypes=np.array([raster.dtypes[0] for raster in rasters], dtype=str),
+                nodata=np.array(
+                    [
+                        np.nan if raster.nodata is None else raster.nodata
+                        for raster in rasters
+                    ],
+                    dtype=np.float64,
+                ),
+                crs_wkts=np.array([raster.crs_wkt for raster in rasters], dtype=str),
+                has_sources=np.array(
+                    [raster.source_paths is not None for raster in rasters], dtype=bool
+                ),
+                source_offsets=np.cumsum(
+                    [0] + [len(raster.source_rects) for raster in rasters]
+                ),
+                source_paths=np.array(
+                    [
+                        source_path
+                        for raster in rasters
+                        for source_path in raster.source_paths or []
+                    ],
+                    dtype=str,
+                ),
+                source_rects=np.concatenate(
+                    [np.empty((0, 8), dtype=np.int64)]
+                    + [raster.source_rects for raster in rasters]
+                ),
+            )
+
+
+def build_raster_manifest(
+    soil_maps: list[tuple[str, str]], output_path: str, source: RasterSource
+) -> None:
+    """Builds a manifest of the soil maps as resolved by the raster source.
+    The manifest must be rebuilt whenever the soil maps change, e.g. after
+    syncing a mirror.
+
+    Args:
+    - soil_maps (list[tuple[str, str]]): The soil map directory and file
+        name of every soil map.
+    - output_path (str): Path of the manifest file to write.
+    - source (RasterSource): The source the API reads the soil maps from.
+
+    Returns:
+    None
+    """
+    rasters = []
+    for soil_map, fname in soil_maps:
+        raster_path = source.path(soil_map, fname)
+        try:
+            with rasterio.open(raster_path) as src:
+                rasters.append(RasterInfo.from_dataset(raster_path, src))
+        except rasterio.errors.RasterioIOError as e:
+            logger.warning(f"Skipping {raster_path}: {e}")
+    RasterManifest(rasters).save(output_path)
+
+
+@lru_cache(maxsize=1)
+def load_raster_manifest(path: str) -> RasterManifest:
+    return RasterManifest.load(path)
+
+
+def get_raster_manifest() -> RasterManifest | None:
+    """Returns the configured raster manifest, or None if there is none."""
+    if settings.raster_manifest_path is None:
+        return None
+    return load_raster_manifest(settings.raster_manifest_path)
@@ -0,0 +1,172 @@
+import abc
+import os
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
+from soil_api.models.soil_type import SoilTypes
+
+
+class RasterSource(abc.ABC):
+    """Resolves soil maps to paths that rasterio can open. Soil maps are
+    identified like on SoilGrids, by the name of the soil map directory
+    (e.g. "wrb" or "clay") and the file name of the VRT in it.
+    """
+
+    @abc.abstractmethod
+    def path(self, soil_map: str, fname: str) -> str:
+        """Returns the path of a soil map.
+
+        Args:
+        - soil_map (str): The soil map directory, e.g. "wrb".
+        - fname (str): The file name of the soil map, e.g. "MostProbable.vrt".
+
+        Returns:
+        str: The path of the soil map.
+        """
+
+
+class RemoteRasterSource(RasterSource):
+    """Reads the soil maps from the SoilGrids server, or from another server
+    or directory with the same layout.
+
+    Args:
+    - url (str | None): The root of the soil maps. Defaults to
+        constants.SOIL_MAPS_URL.
+    """
+
+    def __init__(self, url: str | None = None):
+        self.url = url
+
+    def path(self, soil_map: str, fname: str) -> str:
+        return os.path.join(self.url or constants.SOIL_MAPS_URL, soil_map, fname)
+
+
+class LocalRasterSource(RasterSource):
+    """Reads the soil maps from a local copy of SoilGrids.
+
+    Args:
+    - root (str): The directory with the soil map directories.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, soil_map: str, fname: str) -> str:
+        return os.path.join(self.root, soil_map, fname)
+
+
+class MirrorRasterSource(RasterSource):
+    """Reads the soil maps from a local mirror created by `python -m soil_api
+    sync`, and the soil maps that were not synced from a fallback source.
+    The mirror is inspected once per soil map, so soil maps synced while
+    the API is running are used after a restart.
+
+    Args:
+    - root (str): The directory of the mirror.
+    - fallback (RasterSource): The source of the soil maps not in the mirror.
+    """
+
+    def __init__(self, root: str, fallback: RasterSource):
+        self.root = root
+        self.fallback = fallback
+        self._paths: dict[tuple[str, str], str] = {}
+
+    def path(self, soil_map: str, fname: str) -> str:
+        path = self._paths.get((soil_map, fname))
+        if path is None:
+            path = os.path.join(self.root, soil_map, fname)
+            if not os.path.isfile(path):
+                path = self.fallback.path(soil_map, fname)
+            self._paths[(soil_map, fname)] = path
+        return path
+
+
+def create_raster_source(kind: str, root: str | None) -> RasterSource:
+    """Creates the raster source selected in the settings.
+
+    Args:
+    - kind (str): "remote", "local" or "mirror".
+    - root (str | None): The root of the soil maps. For "remote", defaults
+        to constants.SOIL_MAPS_URL. Required for "local" and "mirror".
+
+    Returns:
+    RasterSource: The raster source.
+    """
+    if kind == "remote":
+        return RemoteRasterSource(root)
+    if root is None:
+        raise ValueError(f"A raster source path is required for {kind} sources")
+    if kind == "local":
+        return LocalRasterSource(root)
+    if kind == "mirror":
+        return MirrorRasterSource(root, RemoteRasterSource())
+    raise ValueError(f"Unknown raster source: {kind}")
+
+
+def property_soil_map_fname(
+    property: SoilPropertiesCodes,
+    depth: SoilDepthLabels,
+    value_type: SoilPropertyValueTypes,
+) -> str | None:
+    """Returns the file name of the soil map of a soil property, depth and
+    value type, or None if SoilGrids has no such soil map. ocs is only
+    available for 0-30cm, and 0-30cm only for ocs.
+
+    Args:
+    - property (SoilPropertiesCodes): The soil property.
+    - depth (SoilDepthLabels): The soil depth.
+    - value_type (SoilPropertyValueTypes): The value type.
+
+    Returns:
+    str | None: The file name of the soil map in the property directory.
+    """
+    if (property == SoilPropertiesCodes.ocs) != (depth == SoilDepthLabels.depth_0_30):
+        return None
+    return f"{property.value}_{depth.value}_{value_type.value}.vrt"
+
+
+def list_soil_maps(
+    properties: list[SoilPropertiesCodes],
+    depths: list[SoilDepthLabels],
+    value_types: list[SoilPropertyValueTypes],
+    soil_types: bool = True,
+) -> list[tuple[str, str]]:
+    """Lists the soil maps that the API reads for the given soil property
+    combinations, and optionally all WRB soil maps.
+
+    Args:
+    - properties (list[SoilPropertiesCodes]): The soil properties.
+    - depths (list[SoilDepthLabels]): The soil depths.
+    - value_types (list[SoilPropertyValueTypes]): The value types.
+    - soil_types (bool): Whether to include the WRB soil maps.
+
+    Returns:
+    list[tuple[str, str]]: The soil map directory and file name of every
+        soil map.
+    """
+    soil_maps = []
+    if soil_types:
+        wrb_soil_map = "wrb"
+        soil_maps.append((wrb_soil_map, constants.SOIL_MAPS[wrb_soil_map]))
+        soil_maps.extend(
+            (wrb_soil_map, f"{soil_type.name}.vrt")
+            for soil_type in SoilTypes
+            if soil_type != SoilTypes.No_information
+        )
+    for property in properties:
+        for depth in depths:
+            for value_type in value_types:
+                fname = property_soil_map_fname(property, depth, value_type)
+                if fname is not None:
+                    soil_maps.append((property.value, fname))
+    return soil_maps
+
+
+raster_source = create_raster_source(
+    settings.raster_source, settings.raster_source_path
+)
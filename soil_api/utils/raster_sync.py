@@ -0,0 +1,186 @@
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+import rasterio
+import rasterio.shutil
+from rasterio.dtypes import dtype_rev, typename_fwd
+from rasterio.io import DatasetReader
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window, from_bounds
+
+from soil_api.utils.block_cache import clip_window
+from soil_api.utils.point_extraction import WGS84_CRS
+from soil_api.utils.raster_source import RasterSource
+
+logger = logging.getLogger(__name__)
+
+
+def sync_region(
+    bbox: list[float],
+    output_dir: str,
+    soil_maps: list[tuple[str, str]],
+    source: RasterSource,
+) -> int:
+    """Copies the soil maps of a region from a raster source to a local
+    mirror that can be served with the "mirror" or "local" raster source.
+    Every soil map is cropped to the region and written as a Cloud
+    Optimized GeoTIFF, next to a VRT with the path, grid and block size of
+    the source soil map. Since the grids match, pixel indices, caches and
+    precomputed indexes stay valid, and locations outside the region read
+    as no data.
+
+    Args:
+    - bbox (list[float]): The region to sync with the format
+        [min_lon, min_lat, max_lon, max_lat].
+    - output_dir (str): The directory of the mirror.
+    - soil_maps (list[tuple[str, str]]): The soil map directory and file
+        name of every soil map to sync.
+    - source (RasterSource): The source of the soil maps.
+
+    Returns:
+    int: The number of soil maps that were synced.
+    """
+    num_synced = 0
+    for index, (soil_map, fname) in enumerate(soil_maps):
+        source_path = source.path(soil_map, fname)
+        logger.info(f"Syncing {source_path} ({index + 1}/{len(soil_maps)})")
+        if sync_soil_map(source_path, os.path.join(output_dir, soil_map), fname, bbox):
+            num_synced += 1
+    return num_synced
+
+
+def sync_soil_map(
+    source_path: str,
+    output_dir: str,
+    fname: str,
+    bbox: list[float],
+    chunk_rows: int = 1024,
+) -> bool:
+    """Crops a soil map to a region and writes it to a Cloud Optimized
+    GeoTIFF and a VRT on the grid of the source soil map.
+
+    Args:
+    - source_path (str): Path to the source soil map.
+    - output_dir (str): The directory to write the soil map to.
+    - fname (str): The file name of the VRT.
+    - bbox (list[float]): The region with the format
+        [min_lon, min_lat, max_lon, max_lat].
+    - chunk_rows (int): Number of rows read and written at a time.
+
+    Returns:
+    bool: False if the region is outside the soil map.
+    """
+    with rasterio.open(source_path) as src:
+        bounds = transform_bounds(WGS84_CRS, src.crs, *bbox, densify_pts=21)
+        window = clip_window(
+            src, from_bounds(*bounds, transform=src.transform), outward=True
+        )
+        if window is None:
+            logger.warning(f"The region is outside {source_path}")
+            return False
+
+        os.makedirs(output_dir, exist_ok=True)
+        cog_fname = f"{os.path.splitext(fname)[0]}.tif"
+        cog_path = os.path.join(output_dir, cog_fname)
+        tmp_path = f"{cog_path}.tmp"
+        profile = {
+            "driver": "GTiff",
+            "width": window.width,
+            "height": window.height,
+            "count": src.count,
+            "dtype": src.dtypes[0],
+            "crs": src.crs,
+            "transform": src.window_transform(window),
+            "nodata": src.nodata,
+            "tiled": True,
+            "blockxsize": 512,
+            "blockysize": 512,
+            "compress": "deflate",
+            "bigtiff": "if_safer",
+        }
+        with rasterio.open(tmp_path, "w", **profile) as dst:
+            for row in range(0, window.height, chunk_rows):
+                num_rows = min(chunk_rows, window.height - row)
+                chunk = Window(
+                    window.col_off, window.row_off + row, window.width, num_rows
+                )
+                dst.write(
+                    src.read(window=chunk),
+                    window=Window(0, row, window.width, num_rows),
+                )
+        # Nearest overviews keep class codes and no data values intact
+        rasterio.shutil.copy(
+            tmp_path,
+            cog_path,
+            driver="COG",
+            compress="deflate",
+            blocksize=512,
+            resampling="nearest",
+            bigtiff="if_safer",
+        )
+        os.remove(tmp_path)
+
+        vrt_path = os.path.join(output_dir, fname)
+        write_mirror_vrt(src, window, cog_fname, f"{vrt_path}.tmp")
+        os.replace(f"{vrt_path}.tmp", vrt_path)
+    return True
+
+
+def write_mirror_vrt(
+    src: DatasetReader, window: Window, source_fname: str, vrt_path: str
+) -> None:
+    """Writes a VRT with the grid, data type, no data value and block size
+    of a soil map, which reads the window of the soil map from a file
+    next to the VRT.
+
+    Args:
+    - src (DatasetReader): The open source soil map.
+    - window (Window): The window of the soil map in the file.
+    - source_fname (str): The file name of the file with the window.
+    - vrt_path (str): Path of the VRT to write.
+
+    Returns:
+    None
+    """
+    dataset = ET.Element(
+        "VRTDataset", rasterXSize=str(src.width), rasterYSize=str(src.height)
+    )
+    ET.SubElement(dataset, "SRS").text = src.crs.to_wkt()
+    ET.SubElement(dataset, "GeoTransform").text = ", ".join(
+        repr(value) for value in src.transform.to_gdal()
+    )
+    for band, (dtype, (block_height, block_width)) in enumerate(
+        zip(src.dtypes, src.block_shapes), start=1
+    ):
+        data_type = typename_fwd[dtype_rev[dtype]]
+        band_element = ET.SubElement(
+            dataset,
+            "VRTRasterBand",
+            dataType=data_type,
+            band=str(band),
+            blockXSize=str(block_width),
+            blockYSize=str(block_height),
+        )
+        if src.nodata is not None:
+            ET.SubElement(band_element, "NoDataValue").text = repr(src.nodata)
+        source = ET.SubElement(band_element, "SimpleSource")
+        ET.SubElement(source, "SourceFilename", relativeToVRT="1").text = source_fname
+        ET.SubElement(source, "SourceBand").text = str(band)
+        ET.SubElement(
+            source,
+            "SrcRect",
+            xOff="0",
+            yOff="0",
+            xSize=str(window.width),
+            ySize=str(window.height),
+        )
+        ET.SubElement(
+            source,
+            "DstRect",
+            xOff=str(window.col_off),
+            yOff=str(window.row_off),
+            xSize=str(window.width),
+            ySize=str(window.height),
+        )
+    ET.ElementTree(dataset).write(vrt_path, encoding="unicode")
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Callable
+
+from prometheus_client import Histogram
+
+PROBE_DURATION = Histogram(
+    "soil_api_readiness_probe_seconds",
+    "Duration of the readiness checks run by the readiness probe",
+    ["check"],
+)
+
+Check = Callable[[], tuple[bool, str]]
+
+
+class ReadinessProbe:
+    """Runs readiness checks in the background on a fixed schedule and keeps
+    their latest results, so readiness can be reported without any I/O.
+    Checks are blocking functions that return whether they passed and a
+    message, like the checks of a HealthCheck. Every check runs on its own
+    thread. A check that does not return within `timeout` seconds fails,
+    and is not started again until it returns.
+
+    Args:
+    - checks (list[Check]): The checks to run.
+    - interval (float): Seconds between the end of a probe and the next one.
+    - timeout (float): Seconds to wait for a check.
+    """
+
+    def __init__(self, checks: list[Check], interval: float, timeout: float):
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self._results: dict[str, tuple[bool, str]] = {}
+        self._running: dict[str, asyncio.Future] = {}
+
+    def result(self, name: str) -> tuple[bool, str]:
+        """Returns the latest result of the check with the given name."""
+        return self._results.get(name, (False, "Not probed yet"))
+
+    def cached(self, check: Check) -> Check:
+        """Returns a check with the same name that returns the latest
+        result of `check` instead of running it."""
+
+        def cached_check() -> tuple[bool, str]:
+            return self.result(check.__name__)
+
+        cached_check.__name__ = check.__name__
+        return cached_check
+
+    @staticmethod
+    def _run_check(check: Check) -> tuple[bool, str]:
+        with PROBE_DURATION.labels(check.__name__).time():
+            return check()
+
+    async def probe(self, check: Check) -> None:
+        """Runs the check, unless it is still running from an earlier
+        probe, and stores its result."""
+        name = check.__name__
+        future = self._running.get(name)
+        if future is None or future.done():
+            future = asyncio.ensure_future(asyncio.to_thread(self._run_check, check))
+            self._running[name] = future
+        # Unlike wait_for, wait leaves a check that times out running
+        done, _ = await asyncio.wait({future}, timeout=self.timeout)
+        if not done:
+            self._results[name] = (False, f"Timed out after {self.timeout} seconds")
+            return
+        try:
+            self._results[name] = future.result()
+        except Exception as e:
+            self._results[name] = (False, str(e))
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*map(self.probe, self.checks))
+
+    async def run(self) -> None:
+        """Probes every `interval` seconds until cancelled."""
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
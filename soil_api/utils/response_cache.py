@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from prometheus_client import Counter
+
+from soil_api.config import settings
+
+CACHE_HITS = Counter(
+    "soil_api_response_cache_hits_total",
+    "Number of responses served from the response cache",
+    ["cache"],
+)
+CACHE_MISSES = Counter(
+    "soil_api_response_cache_misses_total",
+    "Number of response cache lookups that had to query the soil maps",
+    ["cache"],
+)
+
+
+class ResponseCache:
+    """A size-bounded LRU cache whose entries expire after a fixed TTL.
+    A max_size of 0 disables the cache.
+
+    Args:
+    - name (str): Name of the cache, used as the metrics label.
+    - max_size (int): Maximum number of entries.
+    - ttl (float): Seconds after which an entry expires.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Returns the cached value for the key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] <= self.ttl:
+            self._entries.move_to_end(key)
+            CACHE_HITS.labels(self.name).inc()
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        CACHE_MISSES.labels(self.name).inc()
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores the value, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+soil_type_cache = ResponseCache(
+    "soil_type", settings.response_cache_size, settings.response_cache_ttl
+)
+soil_property_cache = ResponseCache(
+    "soil_property", settings.response_cache_size, settings.response_cache_ttl
+)
@@ -1,14 +1,109 @@
+import json
+
+import numpy as np
+from fastapi.responses import Response
+
+from soil_api import constants
+from soil_api.models.shared import FeatureType, GeometryType, PointGeometry
 from soil_api.models.soil_property import (
     DepthRange,
     SoilDepth,
+    SoilDepthGrid,
     SoilDepthLabels,
+    SoilDepthSummary,
     SoilLayer,
+    SoilLayerGrid,
+    SoilLayerGridList,
+    SoilLayerList,
+    SoilLayerSummary,
+    SoilLayerSummaryList,
     SoilPropertiesCodes,
+    SoilPropertyGridValues,
+    SoilPropertyJSON,
+    SoilPropertyStatistics,
+    SoilPropertySummaryValues,
     SoilPropertyUnit,
     SoilPropertyValues,
+    SoilPropertyValueTypes,
     soil_depth_dict,
     soil_property_dict,
 )
+from soil_api.models.soil_type import (
+    SoilTypeInfo,
+    SoilTypeJSON,
+    SoilTypeProbability,
+    soil_type_dict,
+)
+
+
+def generate_soil_layer_list(
+    properties: list[SoilPropertiesCodes],
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    values: list[int],
+) -> SoilLayerList:
+    """Generate a soil layer list from the values extracted from the soil maps.
+
+    Parameters:
+    - properties (list[SoilPropertiesCodes]): The queried soil properties.
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - values (list[int]): The extracted value of every soil map.
+
+    Returns:
+    SoilLayerList: The generated soil layer list.
+    """
+    soil_map_info = group_soil_map_values(soil_maps, values)
+
+    # Create a list of SoilLayer objects and fill them using
+    # the soil_map_info dictionary. Skip the properties that
+    # are not in the dictionary (i.e., the ones with all no data values)
+    all_soil_layers = []
+    for property in properties:
+        if property in soil_map_info:
+            all_soil_layers.append(
+                generate_soil_layer(property, soil_map_info[property])
+            )
+
+    return SoilLayerList(
+        layers=all_soil_layers,
+    )
+
+
+def group_soil_map_values(
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    values: list[int],
+) -> dict[SoilPropertiesCodes, dict[SoilDepthLabels, dict[str, int | None]]]:
+    """Group the values extracted from the soil maps by property and depth.
+
+    Parameters:
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - values (list[int]): The extracted value of every soil map.
+
+    Returns:
+    dict: The values of every value type by property and depth.
+    """
+    # Create a dictionary to store the extracted values
+    soil_map_info = {}
+    for (property, depth, value_type, _), value in zip(soil_maps, values):
+        # If the value is a no data value, skip it
+        if value != constants.NO_DATA_VAL:
+            # If the property is not in the dictionary, add it
+            if property not in soil_map_info:
+                soil_map_info[property] = {}
+            # If the depth is not in the dictionary, add it
+            if depth not in soil_map_info[property]:
+                soil_map_info[property][depth] = {}
+            # If the value is a soilgrids no data value, set it to None
+            # A soilgrids no data value often represents a body of water
+            if value in constants.NO_DATA_VALS_SOILGRIDS:
+                value = None
+            soil_map_info[property][depth][value_type.value] = value
+    return soil_map_info
 
 
 def generate_soil_layer(
@@ -29,21 +124,31 @@ def generate_soil_layer(
         values = soil_map_info[depth]
         soil_depths.append(generate_soil_depth(values, depth))
 
-    unit_measure = SoilPropertyUnit(
-        conversion_factor=soil_property_dict[property]["conversion_factor"],
-        mapped_units=soil_property_dict[property]["mapped_units"],
-        target_units=soil_property_dict[property]["target_units"],
-        uncertainty_unit="",
-    )
-
     return SoilLayer(
         code=property,
         name=soil_property_dict[property]["name"],
-        unit_measure=unit_measure,
+        unit_measure=generate_soil_property_unit(property),
         depths=soil_depths,
     )
 
 
+def generate_soil_property_unit(property: SoilPropertiesCodes) -> SoilPropertyUnit:
+    """Generate the unit of a soil property.
+
+    Parameters:
+    - property (SoilPropertiesCodes): The soil property.
+
+    Returns:
+    SoilPropertyUnit: The generated soil property unit.
+    """
+    return SoilPropertyUnit(
+        conversion_factor=soil_property_dict[property]["conversion_factor"],
+        mapped_units=soil_property_dict[property]["mapped_units"],
+        target_units=soil_property_dict[property]["target_units"],
+        uncertainty_unit="",
+    )
+
+
 def generate_soil_depth(
     values: dict[str, int],
     depth: SoilDepthLabels,
@@ -65,3 +170,302 @@ def generate_soil_depth(
         label=depth.value,
         values=soil_prop_values,
     )
+
+
+def generate_soil_layer_summary_list(
+    properties: list[SoilPropertiesCodes],
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    statistics: list[tuple[dict, float] | None],
+) -> SoilLayerSummaryList:
+    """Generate a soil layer summary list from the statistics computed
+    on the soil maps.
+
+    Parameters:
+    - properties (list[SoilPropertiesCodes]): The queried soil properties.
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - statistics (list[tuple[dict, float] | None]): The statistics and the
+        pixel size they are based on for every soil map, or None for soil
+        maps that are not available.
+
+    Returns:
+    SoilLayerSummaryList: The generated soil layer summary list.
+    """
+    # Group the statistics by property and depth, skipping the
+    # combinations that are not available
+    soil_map_info = {}
+    resolution = None
+    for (property, depth, value_type, _), map_statistics in zip(soil_maps, statistics):
+        if map_statistics is None:
+            continue
+        values, resolution = map_statistics
+        percentiles = [
+            {"percentile": percentile, "value": value}
+            for percentile, value in values.get("percentiles", [])
+        ]
+        soil_map_info.setdefault(property, {}).setdefault(depth, {})[
+            value_type.value
+        ] = SoilPropertyStatistics(**{**values, "percentiles": percentiles or None})
+
+    all_soil_layers = []
+    for property in properties:
+        if property in soil_map_info:
+            all_soil_layers.append(
+                SoilLayerSummary(
+                    code=property,
+                    name=soil_property_dict[property]["name"],
+                    unit_measure=generate_soil_property_unit(property),
+                    depths=[
+                        SoilDepthSummary(
+                            range=DepthRange(**soil_depth_dict[depth]),
+                            label=depth.value,
+                            values=SoilPropertySummaryValues(**values),
+                        )
+                        for depth, values in soil_map_info[property].items()
+                    ],
+                )
+            )
+
+    return SoilLayerSummaryList(layers=all_soil_layers, resolution=resolution)
+
+
+def generate_soil_layer_grid_list(
+    properties: list[SoilPropertiesCodes],
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    grids: list[np.ndarray],
+    lons: list[float],
+    lats: list[float],
+) -> SoilLayerGridList:
+    """Generate a soil layer grid list from the values sampled from the
+    soil maps at the grid nodes.
+
+    Parameters:
+    - properties (list[SoilPropertiesCodes]): The queried soil properties.
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - grids (list[np.ndarray]): The sampled values of every soil map,
+        with one row per latitude and one column per longitude.
+    - lons (list[float]): The longitudes of the grid columns.
+    - lats (list[float]): The latitudes of the grid rows.
+
+    Returns:
+    SoilLayerGridList: The generated soil layer grid list.
+    """
+    # Group the grids by property and depth, skipping the
+    # combinations that are not available
+    soil_map_info = {}
+    for (property, depth, value_type, soil_map_path), grid in zip(soil_maps, grids):
+        if soil_map_path is None:
+            continue
+        # Soilgrids no data values often represent a body of water
+        values = np.where(
+            np.isin(grid, constants.NO_DATA_VALS_SOILGRIDS), None, grid.astype(object)
+        )
+        soil_map_info.setdefault(property, {}).setdefault(depth, {})[
+            value_type.value
+        ] = values.tolist()
+
+    all_soil_layers = []
+    for property in properties:
+        if property in soil_map_info:
+            all_soil_layers.append(
+                SoilLayerGrid(
+                    code=property,
+                    name=soil_property_dict[property]["name"],
+                    unit_measure=generate_soil_property_unit(property),
+                    depths=[
+                        SoilDepthGrid(
+                            range=DepthRange(**soil_depth_dict[depth]),
+                            label=depth.value,
+                            values=SoilPropertyGridValues(**values),
+                        )
+                        for depth, values in soil_map_info[property].items()
+                    ],
+                )
+            )
+
+    return SoilLayerGridList(lons=lons, lats=lats, layers=all_soil_layers)
+
+
+def generate_soil_property_features(
+    properties: list[SoilPropertiesCodes],
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    points: list[list[float]],
+    values: list[np.ndarray],
+) -> list[SoilPropertyJSON]:
+    """Generate a soil property feature for every location from the values
+    sampled from the soil maps at all locations.
+
+    Parameters:
+    - properties (list[SoilPropertiesCodes]): The queried soil properties.
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - points (list[list[float]]): The [longitude, latitude] of every location.
+    - values (list[np.ndarray]): The sampled values of every soil map,
+        with one value per location.
+
+    Returns:
+    list[SoilPropertyJSON]: The generated features, in the order of the points.
+    """
+    values_per_point = np.column_stack(values).tolist()
+    return [
+        SoilPropertyJSON(
+            type=FeatureType.Feature,
+            properties=generate_soil_layer_list(properties, soil_maps, point_values),
+            geometry=PointGeometry(coordinates=point, type=GeometryType.Point),
+        )
+        for point, point_values in zip(points, values_per_point)
+    ]
+
+
+def generate_soil_type_features(
+    points: list[list[float]],
+    most_probable_codes: np.ndarray,
+    top_k_codes: np.ndarray,
+    top_k_probabilities: np.ndarray,
+) -> list[SoilTypeJSON]:
+    """Generate a soil type feature for every location.
+
+    Parameters:
+    - points (list[list[float]]): The [longitude, latitude] of every location.
+    - most_probable_codes (np.ndarray): The most probable WRB class code
+        of every location.
+    - top_k_codes (np.ndarray): The WRB class codes of the top k soil types
+        of every location, with one column per rank.
+    - top_k_probabilities (np.ndarray): The probabilities of the top k
+        soil types of every location, with one column per rank.
+
+    Returns:
+    list[SoilTypeJSON]: The generated features, in the order of the points.
+    """
+    features = []
+    for point, code, point_codes, point_probabilities in zip(
+        points,
+        most_probable_codes.tolist(),
+        top_k_codes.tolist(),
+        top_k_probabilities.tolist(),
+    ):
+        # Remove all soil types where the probability is 0
+        probabilities = [
+            SoilTypeProbability(
+                soil_type=soil_type_dict[soil_type_code],
+                probability=type_probability,
+            )
+            for soil_type_code, type_probability in zip(
+                point_codes, point_probabilities
+            )
+            if type_probability != 0
+        ]
+        soil_type_info = SoilTypeInfo(
+            most_probable_soil_type=soil_type_dict[code],
+            probabilities=probabilities or None,
+        )
+        features.append(
+            SoilTypeJSON(
+                type=FeatureType.Feature,
+                properties=soil_type_info,
+                geometry=PointGeometry(coordinates=point, type=GeometryType.Point),
+            )
+        )
+    return features
+
+
+# Serialized soil layers up to their depths and serialized soil depths up to
+# their values, dumped from the models so that they match the models exactly
+SOIL_LAYER_FRAGMENTS = {
+    property: SoilLayer(
+        code=property,
+        name=soil_property_dict[property]["name"],
+        unit_measure=generate_soil_property_unit(property),
+        depths=[],
+    ).model_dump_json()[: -len("]}")]
+    for property in SoilPropertiesCodes
+}
+SOIL_DEPTH_FRAGMENTS = {
+    depth: SoilDepth(
+        range=DepthRange(**soil_depth_dict[depth]),
+        label=depth,
+        values=SoilPropertyValues(),
+    ).model_dump_json(exclude_unset=True)[: -len("{}}")]
+    for depth in SoilDepthLabels
+}
+SOIL_PROPERTY_VALUE_KEYS = [value_type.value for value_type in SoilPropertyValueTypes]
+
+
+def serialize_soil_layer_list(
+    properties: list[SoilPropertiesCodes],
+    soil_maps: list[
+        tuple[SoilPropertiesCodes, SoilDepthLabels, SoilPropertyValueTypes, str | None]
+    ],
+    values: list[int],
+) -> str:
+    """Serialize a soil layer list from the values extracted from the soil
+    maps, without building the models. The result is the same as serializing
+    the result of generate_soil_layer_list, but only the values are encoded
+    per request and the unit and depth metadata are precomputed.
+
+    Parameters:
+    - properties (list[SoilPropertiesCodes]): The queried soil properties.
+    - soil_maps (list[tuple]): The property, depth, value type and soil map
+        path of every queried combination.
+    - values (list[int]): The extracted value of every soil map.
+
+    Returns:
+    str: The serialized soil layer list.
+    """
+    soil_map_info = group_soil_map_values(soil_maps, values)
+    layers = []
+    for property in properties:
+        if property in soil_map_info:
+            depths = [
+                SOIL_DEPTH_FRAGMENTS[depth]
+                + json.dumps(
+                    {
+                        key: None if values[key] is None else float(values[key])
+                        for key in SOIL_PROPERTY_VALUE_KEYS
+                        if key in values
+                    },
+                    separators=(",", ":"),
+                )
+                + "}"
+                for depth, values in soil_map_info[property].items()
+            ]
+            layers.append(SOIL_LAYER_FRAGMENTS[property] + ",".join(depths) + "]}")
+    return '{"layers":[' + ",".join(layers) + "]}"
+
+
+def soil_property_response(
+    longitude: float, latitude: float, soil_layer_list: str
+) -> Response:
+    """Generate the response of a soil property query from a serialized
+    soil layer list. The response body is the same as serializing a
+    SoilPropertyJSON with the soil layer list.
+
+    Parameters:
+    - longitude (float): Longitude of the queried location.
+    - latitude (float): Latitude of the queried location.
+    - soil_layer_list (str): The serialized soil layer list.
+
+    Returns:
+    Response: The soil property response.
+    """
+    geometry = json.dumps(
+        {"coordinates": [float(longitude), float(latitude)], "type": "Point"},
+        separators=(",", ":"),
+    )
+    return Response(
+        content=(
+            '{"type":"Feature","geometry":'
+            + geometry
+            + ',"properties":'
+            + soil_layer_list
+            + "}"
+        ),
+        media_type="application/json",
+    )
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Coroutine, Hashable
+
+from prometheus_client import Counter
+
+READS = Counter(
+    "soil_api_single_flight_reads_total",
+    "Number of raster reads that were started",
+    ["reader"],
+)
+DEDUPLICATED = Counter(
+    "soil_api_single_flight_deduplicated_total",
+    "Number of raster reads that were served by an identical in-flight read",
+    ["reader"],
+)
+
+
+class SingleFlight:
+    """Shares in-flight reads between concurrent callers. A read is started
+    once for any number of keys, and callers asking for a key while its read
+    is in flight wait for the same result instead of reading it again.
+    Keys are forgotten as soon as their read completes, so results are never
+    cached beyond the lifetime of the read.
+
+    Args:
+    - reader (str): Name of the reader in the metrics.
+    """
+
+    def __init__(self, reader: str):
+        self.reader = reader
+        self._futures: dict[Hashable, asyncio.Future] = {}
+        self._futures_loop: asyncio.AbstractEventLoop | None = None
+        # The event loop only keeps weak references to tasks, so the reads
+        # are referenced here until they complete
+        self._tasks: set[asyncio.Task] = set()
+
+    def _get_futures(self) -> dict[Hashable, asyncio.Future]:
+        # Futures are bound to the loop they are created on
+        loop = asyncio.get_running_loop()
+        if self._futures_loop is not loop:
+            self._futures = {}
+            self._tasks = set()
+            self._futures_loop = loop
+        return self._futures
+
+    def get(self, key: Hashable) -> asyncio.Future | None:
+        """Returns the future of the in-flight read of the key, or None if
+        the key is not being read.
+        """
+        future = self._get_futures().get(key)
+        if future is not None:
+            DEDUPLICATED.labels(self.reader).inc()
+        return future
+
+    def start(
+        self, keys: list[Hashable], read: Coroutine[Any, Any, list]
+    ) -> list[asyncio.Future]:
+        """Starts a read of several keys at once. The read runs as its own
+        task, so it completes for the other callers even if the caller
+        that started it is cancelled.
+
+        Args:
+        - keys (list[Hashable]): The keys that are read.
+        - read (Coroutine): Reads the keys and returns one result per key.
+
+        Returns:
+        list[asyncio.Future]: The future of the result of every key.
+        """
+        futures = self._get_futures()
+        loop = asyncio.get_running_loop()
+        key_futures = [loop.create_future() for _ in keys]
+        for key, future in zip(keys, key_futures):
+            futures[key] = future
+        READS.labels(self.reader).inc(len(keys))
+
+        tasks = self._tasks
+
+        def complete(task: asyncio.Task) -> None:
+            tasks.discard(task)
+            error = None if task.cancelled() else task.exception()
+            for index, (key, future) in enumerate(zip(keys, key_futures)):
+                if futures.get(key) is future:
+                    del futures[key]
+                if task.cancelled():
+                    future.cancel()
+                elif error is not None:
+                    future.set_exception(error)
+                    # Retrieving the exceptions keeps the loop from logging
+                    # them as never retrieved when all the callers were
+                    # cancelled, as the callers still get them when awaiting
+                    future.exception()
+                else:
+                    future.set_result(task.result()[index])
+
+        task = asyncio.ensure_future(read)
+        tasks.add(task)
+        task.add_done_callback(complete)
+        return key_futures
+
+
+async def wait_for_reads(futures: list[asyncio.Future]) -> list:
+    """Waits for the results of shared reads. Cancelling the caller does not
+    cancel the reads, which other callers may be waiting for.
+
+    Args:
+    - futures (list[asyncio.Future]): The futures of the reads.
+
+    Returns:
+    list: The results of the reads.
+    """
+    return await asyncio.gather(*(asyncio.shield(future) for future in futures))
+
+
+point_reads = SingleFlight("pixel")
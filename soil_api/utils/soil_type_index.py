@@ -0,0 +1,144 @@
+import logging
+
+import numpy as np
+import rasterio
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window, from_bounds
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.models.soil_type import SoilTypes, soil_type_dict
+from soil_api.utils.dataset_pool import dataset_pool
+from soil_api.utils.point_extraction import WGS84_CRS, pixel_index
+from soil_api.utils.raster_executor import raster_executor
+from soil_api.utils.raster_source import raster_source
+
+# Band i + 1 of the index holds the probability of soil type code i,
+# and the last band holds the code of the most probable soil type
+SOIL_TYPE_CODES = [code for code in soil_type_dict if code != 255]
+MOST_PROBABLE_BAND = len(SOIL_TYPE_CODES) + 1
+
+
+def build_soil_type_index(
+    bbox: list[float], output_path: str, chunk_rows: int = 512
+) -> None:
+    """Builds a precomputed soil type probability index for the bounding box.
+    The index is a pixel-interleaved uint8 GeoTIFF on the grid of the WRB
+    soil maps, so that all probabilities of a pixel come from one read.
+
+    Args:
+    - bbox (list[float]): The region to index with the format
+        [min_lon, min_lat, max_lon, max_lat].
+    - output_path (str): Path of the GeoTIFF to write.
+    - chunk_rows (int): Number of rows read and written at a time.
+
+    Returns:
+    None
+    """
+    wrb_soil_map = "wrb"
+    soil_map_paths = [
+        raster_source.path(wrb_soil_map, f"{soil_type_dict[code].name}.vrt")
+        for code in SOIL_TYPE_CODES
+    ] + [raster_source.path(wrb_soil_map, constants.SOIL_MAPS[wrb_soil_map])]
+    sources = [rasterio.open(path) for path in soil_map_paths]
+    try:
+        reference = sources[0]
+        for src in sources[1:]:
+            if src.transform != reference.transform or src.crs != reference.crs:
+                raise ValueError(f"{src.name} is not on the grid of {reference.name}")
+
+        bounds = transform_bounds(WGS84_CRS, reference.crs, *bbox)
+        window = from_bounds(*bounds, transform=reference.transform)
+        window = window.round_offsets().round_lengths()
+        window = window.intersection(Window(0, 0, reference.width, reference.height))
+        profile = {
+            "driver": "GTiff",
+            "dtype": "uint8",
+            "count": len(sources),
+            "height": int(window.height),
+            "width": int(window.width),
+            "crs": reference.crs,
+            "transform": reference.window_transform(window),
+            "tiled": True,
+            "blockxsize": 256,
+            "blockysize": 256,
+            "interleave": "pixel",
+            "compress": "deflate",
+        }
+        with rasterio.open(output_path, "w", **profile) as dst:
+            for code in SOIL_TYPE_CODES:
+                dst.set_band_description(code + 1, soil_type_dict[code].name)
+            dst.set_band_description(MOST_PROBABLE_BAND, "MostProbable")
+            for row in range(0, int(window.height), chunk_rows):
+                chunk = Window(
+                    window.col_off,
+                    window.row_off + row,
+                    window.width,
+                    min(chunk_rows, int(window.height) - row),
+                )
+                data = np.stack([src.read(1, window=chunk) for src in sources])
+                dst.write(data, window=Window(0, row, chunk.width, chunk.height))
+                logging.info(
+                    f"Indexed {row + chunk.height} of {int(window.height)} rows"
+                )
+    finally:
+        for src in sources:
+            src.close()
+
+
+def sample_soil_type_index(
+    index_path: str, latitude: float, longitude: float
+) -> list[int] | None:
+    """Reads all bands of the soil type index at the given point.
+
+    Args:
+    - index_path (str): Path to the soil type index.
+    - latitude (float): Latitude in decimal degrees.
+    - longitude (float): Longitude in decimal degrees.
+
+    Returns:
+    list[int] | None: The band values, or None if the index
+        does not cover the point.
+    """
+
+    def sample(src: rasterio.io.DatasetReader) -> list[int] | None:
+        row, col = pixel_index(src.transform, latitude, longitude)
+        if not (0 <= row < src.height and 0 <= col < src.width):
+            return None
+        return src.read(window=Window(col, row, 1, 1))[:, 0, 0].tolist()
+
+    return dataset_pool.run(index_path, sample)
+
+
+async def read_soil_type_index(
+    latitude: float, longitude: float
+) -> tuple[int, dict[SoilTypes, int]] | None:
+    """Reads the most probable soil type code and the probabilities of all
+    soil types at the given point from the precomputed soil type index.
+    Returns None if no index is configured, the index does not cover the
+    point or the index cannot be read.
+
+    Args:
+    - latitude (float): Latitude in decimal degrees.
+    - longitude (float): Longitude in decimal degrees.
+
+    Returns:
+    tuple | None: The most probable soil type code and a mapping of
+        each soil type to its probability.
+    """
+    if settings.soil_type_index_path is None:
+        return None
+    try:
+        values = await raster_executor.run(
+            sample_soil_type_index,
+            settings.soil_type_index_path,
+            latitude,
+            longitude,
+        )
+    except rasterio.errors.RasterioIOError as e:
+        logging.warning(f"Soil type index could not be read: {str(e)}")
+        return None
+    if values is None:
+        return None
+    probabilities = {soil_type_dict[code]: values[code] for code in SOIL_TYPE_CODES}
+    return values[MOST_PROBABLE_BAND - 1], probabilities
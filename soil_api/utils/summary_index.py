@@ -0,0 +1,224 @@
+import logging
+import math
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window, from_bounds
+
+from soil_api import constants
+from soil_api.config import settings
+from soil_api.models.soil_type import soil_type_dict
+from soil_api.utils.point_extraction import WGS84_CRS
+from soil_api.utils.raster_source import raster_source
+
+
+class SummaryIndex:
+    """A precomputed class histogram index over a region of a class raster.
+    The region is split into square tiles, and the index holds a summed-area
+    table of the per-tile class counts. The counts of any window are then a
+    few table lookups for the tiles it fully covers, plus the counts of the
+    edge strips that are only partially covered by tiles.
+
+    Args:
+    - sat (np.ndarray): Summed-area table of tile class counts with shape
+        (tile rows + 1, tile columns + 1, number of codes).
+    - codes (np.ndarray): The class code of each entry of the last axis.
+    - source_transform (Affine): The geotransform of the indexed raster.
+    - region (Window): The indexed window of the raster.
+    - tile_size (int): The size of the tiles in pixels.
+    """
+
+    def __init__(
+        self,
+        sat: np.ndarray,
+        codes: np.ndarray,
+        source_transform: Affine,
+        region: Window,
+        tile_size: int,
+    ):
+        self.sat = sat
+        self.codes = codes
+        self.source_transform = source_transform
+        self.region = region
+        self.tile_size = tile_size
+
+    @classmethod
+    def load(cls, path: str) -> "SummaryIndex":
+        with np.load(path) as data:
+            return cls(
+                sat=data["sat"],
+                codes=data["codes"],
+                source_transform=Affine(*data["source_transform"]),
+                region=Window(*data["region"].tolist()),
+                tile_size=int(data["tile_size"]),
+            )
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                sat=self.sat,
+                codes=self.codes,
+                source_transform=np.array(self.source_transform[:6]),
+                region=np.array(
+                    [
+                        self.region.col_off,
+                        self.region.row_off,
+                        self.region.width,
+                        self.region.height,
+                    ]
+                ),
+                tile_size=np.array(self.tile_size),
+            )
+
+    def covers(self, transform: Affine, window: Window) -> bool:
+        """Returns whether the index can count the window of a raster
+        with the given geotransform."""
+        return (
+            transform.almost_equals(self.source_transform)
+            and window.col_off >= self.region.col_off
+            and window.row_off >= self.region.row_off
+            and window.col_off + window.width <= self.region.col_off + self.region.width
+            and window.row_off + window.height
+            <= self.region.row_off + self.region.height
+        )
+
+    def _tile_start(self, tile: int, size: int) -> int:
+        return min(tile * self.tile_size, size)
+
+    def count(
+        self, window: Window, count_edge: Callable[[Window], np.ndarray]
+    ) -> np.ndarray:
+        """Counts the class codes within a window covered by the index.
+
+        Args:
+        - window (Window): A window of whole pixels of the indexed raster.
+        - count_edge (Callable): Function that counts the class codes of
+            a window of the raster, used for the edges not covered by tiles.
+
+        Returns:
+        np.ndarray: The count of every class code from 0 to 255.
+        """
+        height, width = int(self.region.height), int(self.region.width)
+        r0 = int(window.row_off - self.region.row_off)
+        c0 = int(window.col_off - self.region.col_off)
+        r1, c1 = r0 + int(window.height), c0 + int(window.width)
+
+        # Find the tiles that are fully covered by the window. The last
+        # tile row and column may be smaller than the tile size
+        num_tile_rows, num_tile_cols = self.sat.shape[0] - 1, self.sat.shape[1] - 1
+        tr0, tc0 = math.ceil(r0 / self.tile_size), math.ceil(c0 / self.tile_size)
+        tr1 = num_tile_rows if r1 == height else r1 // self.tile_size
+        tc1 = num_tile_cols if c1 == width else c1 // self.tile_size
+        if tr0 >= tr1 or tc0 >= tc1:
+            return count_edge(window)
+
+        counts = np.zeros(256, dtype=np.int64)
+        sat = self.sat.astype(np.int64, copy=False)
+        counts[self.codes] = (
+            sat[tr1, tc1] - sat[tr0, tc1] - sat[tr1, tc0] + sat[tr0, tc0]
+        )
+
+        # Count the edge strips around the covered tiles from the raster
+        ir0, ir1 = self._tile_start(tr0, height), self._tile_start(tr1, height)
+        ic0, ic1 = self._tile_start(tc0, width), self._tile_start(tc1, width)
+        edges = [
+            (r0, ir0, c0, c1),
+            (ir1, r1, c0, c1),
+            (ir0, ir1, c0, ic0),
+            (ir0, ir1, ic1, c1),
+        ]
+        for row_start, row_end, col_start, col_end in edges:
+            if row_end > row_start and col_end > col_start:
+                counts += count_edge(
+                    Window(
+                        self.region.col_off + col_start,
+                        self.region.row_off + row_start,
+                        col_end - col_start,
+                        row_end - row_start,
+                    )
+                )
+        return counts
+
+
+def build_summary_index(
+    bbox: list[float], output_path: str, tile_size: int = 64
+) -> None:
+    """Builds a class histogram index of the WRB soil map for the bounding box.
+
+    Args:
+    - bbox (list[float]): The region to index with the format
+        [min_lon, min_lat, max_lon, max_lat].
+    - output_path (str): Path of the index file to write.
+    - tile_size (int): The size of the tiles in pixels.
+
+    Returns:
+    None
+    """
+    wrb_soil_map = "wrb"
+    wrb_soil_map_path = raster_source.path(
+        wrb_soil_map, constants.SOIL_MAPS[wrb_soil_map]
+    )
+    with rasterio.open(wrb_soil_map_path) as src:
+        bounds = transform_bounds(WGS84_CRS, src.crs, *bbox)
+        region = from_bounds(*bounds, transform=src.transform)
+        region = region.round_offsets().round_lengths()
+        region = region.intersection(Window(0, 0, src.width, src.height))
+        region = Window(*(int(value) for value in region.flatten()))
+        num_tile_rows = math.ceil(region.height / tile_size)
+        num_tile_cols = math.ceil(region.width / tile_size)
+        tile_cols = np.arange(region.width) // tile_size
+
+        # Only the WRB class codes are counted, so that the table does not
+        # hold a count of every possible uint8 value for every tile
+        codes = np.array(sorted(soil_type_dict))
+        code_indices = np.full(256, -1)
+        code_indices[codes] = np.arange(len(codes))
+
+        # The per-tile counts are accumulated in place into the summed-area
+        # table. The sums of large regions overflow uint32, so it is uint64
+        sat = np.zeros((num_tile_rows + 1, num_tile_cols + 1, len(codes)), np.uint64)
+        for tile_row in range(num_tile_rows):
+            row = tile_row * tile_size
+            chunk = code_indices[
+                src.read(
+                    1,
+                    window=Window(
+                        region.col_off,
+                        region.row_off + row,
+                        region.width,
+                        min(tile_size, region.height - row),
+                    ),
+                )
+            ]
+            if (chunk < 0).any():
+                raise ValueError(
+                    f"{wrb_soil_map_path} has pixels that are not WRB class codes"
+                )
+            # Count all tiles of the row at once by offsetting
+            # the code indices by the number of codes per tile column
+            keys = tile_cols[np.newaxis, :] * len(codes) + chunk
+            sat[tile_row + 1, 1:] = np.bincount(
+                keys.ravel(), minlength=num_tile_cols * len(codes)
+            ).reshape(num_tile_cols, len(codes))
+            logging.info(f"Indexed {tile_row + 1} of {num_tile_rows} tile rows")
+        np.cumsum(sat, axis=0, out=sat)
+        np.cumsum(sat, axis=1, out=sat)
+        index = SummaryIndex(sat, codes, src.transform, region, tile_size)
+    index.save(output_path)
+
+
+@lru_cache(maxsize=1)
+def load_summary_index(path: str) -> SummaryIndex:
+    return SummaryIndex.load(path)
+
+
+def get_summary_index() -> SummaryIndex | None:
+    """Returns the configured summary index, or None if there is none."""
+    if settings.summary_index_path is None:
+        return None
+    return load_summary_index(settings.summary_index_path)
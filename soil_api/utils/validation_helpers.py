@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 
 from soil_api import constants
+from soil_api.config import settings
 
 ISRIC_ROI = constants.ISRIC_ROI
 
@@ -48,3 +49,46 @@ def validate_bbox(bbox: list[float]) -> None:
                 "left corner and the last two values must be the upper right corner."
             ),
         )
+
+
+def validate_batch_size(num_points: int) -> None:
+    """Validate the number of points in a batch query. If there are more
+    points than settings.batch_max_points, raise an HTTPException with
+    status code 400.
+
+    Parameters:
+    - num_points (int): The number of queried points.
+
+    Returns:
+    None
+    """
+    if num_points > settings.batch_max_points:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Too many points: {num_points}. At most "
+                f"{settings.batch_max_points} points can be queried at once."
+            ),
+        )
+
+
+def validate_grid_size(num_points: int) -> None:
+    """Validate the number of nodes in a grid query. If there are more
+    nodes than settings.grid_max_points, raise an HTTPException with
+    status code 400.
+
+    Parameters:
+    - num_points (int): The number of grid nodes.
+
+    Returns:
+    None
+    """
+    if num_points > settings.grid_max_points:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Too many grid nodes: {num_points}. At most "
+                f"{settings.grid_max_points} grid nodes can be queried at once. "
+                "Use a larger step or a smaller bbox."
+            ),
+        )
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+
+import numpy as np
+from prometheus_client import Gauge
+
+from soil_api.config import settings
+from soil_api.models.soil_property import (
+    SoilDepthLabels,
+    SoilPropertiesCodes,
+    SoilPropertyValueTypes,
+)
+from soil_api.utils.cog_reader import cog_reader
+from soil_api.utils.point_extraction import (
+    extract_points_from_rasters,
+    get_cog_raster,
+    get_raster_transform,
+    transform_coordinates_to_homolosine_crs_array,
+)
+from soil_api.utils.raster_source import list_soil_maps, raster_source
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PROGRESS = Gauge(
+    "soil_api_warmup_progress",
+    "Fraction of the soil maps that are done warming up, including failures",
+)
+
+
+def load_warmup_points(points_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Loads the points to prefetch the blocks of, one "longitude,latitude"
+    line per point, and transforms them to the Homolosine CRS.
+
+    Args:
+    - points_path (str): Path to the CSV file of points.
+
+    Returns:
+    tuple: The y and x coordinates of the points in the Homolosine CRS.
+    """
+    points = np.loadtxt(points_path, delimiter=",", ndmin=2)
+    return transform_coordinates_to_homolosine_crs_array(
+        latitudes=points[:, 1], longitudes=points[:, 0]
+    )
+
+
+class Warmup:
+    """Warms up the soil maps before the service takes traffic, so the first
+    requests after a restart do not fetch every VRT and source header cold.
+    Every soil map is opened once on the raster I/O executor, which fills
+    GDAL's process-wide cache of remote file headers and the cache of
+    raster transforms. The tile layouts of soil maps read with the COG
+    reader are fetched as well. If a file of points is given, the blocks
+    that contain the points are read into the block cache. Soil maps that
+    fail to warm up count as done for the readiness, so a transient failure
+    does not keep the service unready, and are reported as failed.
+
+    Args:
+    - raster_paths (list[str]): Paths to the soil maps to warm up.
+    - points_path (str | None): Path to a CSV file of "longitude,latitude"
+        points to prefetch the blocks of.
+    - concurrency (int): Number of soil maps to warm up at a time.
+    - ready_threshold (float): Fraction of the soil maps that must be done
+        warming up for the service to be ready.
+    """
+
+    def __init__(
+        self,
+        raster_paths: list[str],
+        points_path: str | None,
+        concurrency: int,
+        ready_threshold: float,
+    ):
+        self.raster_paths = raster_paths
+        self.points_path = points_path
+        self.concurrency = concurrency
+        self.ready_threshold = ready_threshold
+        self.warmed = 0
+        self.failed = 0
+
+    @property
+    def progress(self) -> float:
+        """The fraction of the soil maps that are done warming up,
+        whether they were warmed up or failed."""
+        if not self.raster_paths:
+            return 1.0
+        return (self.warmed + self.failed) / len(self.raster_paths)
+
+    @property
+    def ready(self) -> bool:
+        return self.progress >= self.ready_threshold
+
+    def status(self) -> dict:
+        return {
+            "soil_maps": len(self.raster_paths),
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "progress": round(self.progress, 3),
+        }
+
+    async def warm_soil_map(
+        self,
+        raster_path: str,
+        points: tuple[np.ndarray, np.ndarray] | None,
+    ) -> None:
+        await get_raster_transform(raster_path)
+        raster_info = get_cog_raster(raster_path)
+        if raster_info is not None:
+            await asyncio.gather(*map(cog_reader.layout, raster_info.cog_urls))
+        if points is not None:
+            await extract_points_from_rasters([raster_path], *points)
+
+    async def run(self) -> None:
+        """Warms up all soil maps, reporting the progress in the log and
+        in the soil_api_warmup_progress metric. Soil maps that fail to warm
+        up are logged and skipped, and if the points cannot be loaded, the
+        soil maps are warmed up without them."""
+        self.warmed = self.failed = 0
+        WARMUP_PROGRESS.set(self.progress)
+        points = None
+        if self.points_path is not None:
+            try:
+                points = await asyncio.to_thread(load_warmup_points, self.points_path)
+            except Exception as e:
+                logger.error(f"Could not load the warm-up points: {e}")
+        num_soil_maps = len(self.raster_paths)
+        log_every = max(num_soil_maps // 10, 1)
+        logger.info(f"Warming up {num_soil_maps} soil maps")
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def warm(raster_path: str) -> None:
+            async with slots:
+                try:
+                    await self.warm_soil_map(raster_path, points)
+                    self.warmed += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"Could not warm up {raster_path}: {e}")
+            WARMUP_PROGRESS.set(self.progress)
+            done = self.warmed + self.failed
+            if done % log_every == 0 or done == num_soil_maps:
+                logger.info(f"Warmed up {done} of {num_soil_maps} soil maps")
+
+        await asyncio.gather(*map(warm, self.raster_paths))
+
+
+def list_warmup_raster_paths(soil_map_names: list[str] | None) -> list[str]:
+    """Lists the paths of the soil maps in the given soil map directories,
+    such as "wrb" or "clay", or of all soil maps if soil_map_names is None.
+
+    Args:
+    - soil_map_names (list[str] | None): The soil map directories.
+
+    Returns:
+    list[str]: The paths of the soil maps.
+    """
+    soil_maps = list_soil_maps(
+        list(SoilPropertiesCodes), list(SoilDepthLabels), list(SoilPropertyValueTypes)
+    )
+    return [
+        raster_source.path(soil_map, fname)
+        for soil_map, fname in soil_maps
+        if soil_map_names is None or soil_map in soil_map_names
+    ]
+
+
+warmup = Warmup(
+    (
+        list_warmup_raster_paths(settings.warmup_soil_maps)
+        if settings.warmup_enabled
+        else []
+    ),
+    points_path=settings.warmup_points_path,
+    concurrency=settings.warmup_concurrency,
+    ready_threshold=settings.warmup_ready_threshold,
+)